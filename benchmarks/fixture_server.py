@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (method, path pattern, fixture file). Named groups and query/form parameters fill the
+# {{domain}}, {{DOMAIN}}, {{ip}} and {{server}} placeholders in the fixture.
+ROUTES = [
+    ("GET", r"^/urlvoid/?$", "urlvoid/home.html"),
+    ("GET", r"^/urlvoid/scan/(?P<domain>[^/]+)/?$", "urlvoid/report.html"),
+    ("POST", r"^/ipvoid/ip-blacklist-check/?$", "ipvoid/report.html"),
+    ("GET", r"^/godaddy/whois/results\.aspx$", "godaddy/results.html"),
+    ("GET", r"^/mxtoolbox/emailhealth/(?P<domain>[^/]+)/?$", "mxtoolbox/emailhealth.html"),
+    ("GET", r"^/ssl_org/report/(?P<domain>[^/]+)/?$", "ssl_org/report.html"),
+    ("GET", r"^/ssltrust/ssl-tools/website-security-check/?$", "ssltrust/check.html"),
+    ("GET", r"^/google_safe_browsing/safe-browsing/search$", "google_safe_browsing/search.html"),
+    ("GET", r"^/tranco/query/?$", "tranco/query.html"),
+    ("GET", r"^/similarweb/website/(?P<domain>[^/]+)/?$", "similarweb/website.html"),
+    ("GET", r"^/linkedin/company/(?P<company>[^/]+)/?$", "linkedin/company.html"),
+    ("GET", r"^/merchant/(?P<domain>[^/]+)/(?P<page>[\w-]+\.html)?$", "merchant/{page}")
+]
+COMPILED_ROUTES = [(method, re.compile(pattern), fixture) for method, pattern, fixture in ROUTES]
+
+# Merchant subresources are generated (deterministic bytes of a typical size) rather than stored
+ASSET_RE = re.compile(r"^/merchant/[^/]+/static/(?P<asset>.+)$")
+ASSET_SIZES = {".css": 24 * 1024, ".js": 160 * 1024, ".jpg": 220 * 1024, ".png": 90 * 1024}
+ASSET_TYPES = {".css": "text/css", ".js": "application/javascript", ".jpg": "image/jpeg", ".png": "image/png"}
+
+# Query/form parameters that carry the domain or IP being looked up
+DOMAIN_PARAMS = ("domainName", "url", "domain")
+
+# Cloudflare URL Scanner stand-in: scans are submitted as JSON and their result is 404 until
+# `scan_delay` seconds have passed. Domains containing one of these words get a malicious verdict.
+CLOUDFLARE_SCAN_RE = re.compile(r"^/cloudflare/accounts/(?P<account>[^/]+)/urlscanner/v2/(?:(?P<scan>scan)|result/(?P<uuid>[\w-]+))/?$")
+MALICIOUS_WORDS = ("malicious", "phish", "scam")
+
+
+def render_fixture(name, variables):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as file:
+        content = file.read()
+    for key, value in variables.items():
+        content = content.replace("{{" + key + "}}", value)
+    return content.encode("utf-8")
+
+
+def synthetic_asset(name):
+    extension = os.path.splitext(name)[1].lower()
+    size = ASSET_SIZES.get(extension, 8 * 1024)
+    block = hashlib.sha256(name.encode("utf-8")).hexdigest().encode("ascii")
+    return (block * (size // len(block) + 1))[:size], ASSET_TYPES.get(extension, "application/octet-stream")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _source(self):
+        return self.path.lstrip("/").split("/", 1)[0].split("?", 1)[0] or "root"
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        server = self.server
+        parsed = urlparse(self.path)
+        source = self._source()
+        server.count(source)
+        if server.latency:
+            time.sleep(server.latency)  # Simulated remote think time / round trip
+
+        scan = CLOUDFLARE_SCAN_RE.match(parsed.path)
+        if scan:
+            self._cloudflare(method, scan)
+            return
+
+        asset = ASSET_RE.match(parsed.path)
+        if asset and method == "GET":
+            body, content_type = synthetic_asset(asset.group("asset"))
+            self._send(200, body, content_type)
+            return
+
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            params.update({key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()})
+
+        for route_method, pattern, fixture in COMPILED_ROUTES:
+            match = pattern.match(parsed.path)
+            if route_method != method or not match:
+                continue
+            groups = {key: unquote(value) for key, value in match.groupdict().items() if value}
+            domain = groups.get("domain") or next((params[p] for p in DOMAIN_PARAMS if params.get(p)), "example.com")
+            variables = {
+                "domain": domain,
+                "DOMAIN": domain.upper(),
+                "ip": params.get("ipaddr", "203.0.113.24"),
+                "server": f"http://{self.headers.get('Host', '127.0.0.1')}"
+            }
+            try:
+                self._send(200, render_fixture(fixture.format(page=groups.get("page", "index.html")), variables))
+            except FileNotFoundError:
+                self._send(404, b"Not found")
+            return
+        self._send(404, b"Not found")
+
+    def _cloudflare(self, method, match):
+        server = self.server
+        if method == "POST" and match.group("scan"):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                url = json.loads(self.rfile.read(length) or b"{}")["url"]
+            except (ValueError, KeyError):
+                self._send(400, b'{"success": false, "errors": [{"message": "url is required"}]}', "application/json")
+                return
+            scan_id = str(uuid.uuid4())
+            with server.requests_lock:
+                server.scans[scan_id] = {"url": url, "submitted": time.monotonic()}
+            api = f"http://{self.headers.get('Host', '127.0.0.1')}{self.path.rsplit('/scan', 1)[0]}/result/{scan_id}"
+            body = {"uuid": scan_id, "api": api, "visibility": "public", "url": url, "message": "Submission successful"}
+            self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+            return
+        with server.requests_lock:
+            scan = server.scans.get(match.group("uuid") or "")
+        if method != "GET" or scan is None or time.monotonic() - scan["submitted"] < server.scan_delay:
+            self._send(404, b'{"success": false, "errors": [{"message": "Scan is not finished yet"}]}', "application/json")
+            return
+        domain = urlparse(scan["url"]).hostname or "example.com"
+        malicious = any(word in domain for word in MALICIOUS_WORDS)
+        variables = {"uuid": match.group("uuid"), "domain": domain, "DOMAIN": domain.upper(),
+                     "time": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"), "malicious": json.dumps(malicious),
+                     "categories": json.dumps([{"id": 128, "name": "Phishing"}] if malicious else [])}
+        self._send(200, render_fixture("cloudflare/result.json", variables), "application/json")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, *args):
+        pass  # Request counts are kept instead
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves the recorded pages in benchmarks/fixtures as stand-ins for every third-party source.
+    Point the scrapers at it with RISK_FIXTURE_URL=<server.url> (see utils/source_urls.py).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, scan_delay=3.0):
+        super().__init__((host, port), FixtureHandler)
+        self.latency = latency
+        self.scan_delay = scan_delay
+        self.scans = {}
+        self.requests = {}
+        self.requests_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, source):
+        with self.requests_lock:
+            self.requests[source] = self.requests.get(source, 0) + 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="fixture-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded third-party pages for offline scraper runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--scan-delay", type=float, default=3.0, help="Seconds until a submitted Cloudflare scan is finished")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.latency, args.scan_delay)
+    print(f"🧪 Fixture server on {server.url} (export RISK_FIXTURE_URL={server.url})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
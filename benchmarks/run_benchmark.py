@@ -0,0 +1,253 @@
+"""
+Offline benchmark: runs the scrapers against the recorded pages in benchmarks/fixtures, served
+by a local stand-in server, and reports per-scraper wall time, CPU and peak RSS plus end-to-end
+domains per minute at several concurrency levels.
+
+    python -m benchmarks.run_benchmark --repeat 3 --domains 8 --concurrency 1,2,4
+
+Sources that need real TLS or WHOIS servers (check_https, get_ssl_fingerprint, get_whois_data)
+have no stand-in and are not benchmarked. CPU covers this process and the browsers and drivers
+it has reaped; a browser kept alive by the CDP pool is counted when the pool closes.
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.admission import process_rss, process_tree_pids
+from utils.concurrency import classify_outcome
+
+# name -> (module, function, extra kwargs). The target is a domain unless "ip" is set.
+BENCH_SCRAPERS = {
+    "privacy_and_terms": ("scrapers.check_privacy_term", "check_privacy_term", {}),
+    "social_presence": ("scrapers.check_linkedin", "check_social_presence", {}),
+    "godaddy_whois": ("scrapers.godaddy_whois_scraper", "scrape_godaddy_whois", {}),
+    "urlvoid": ("scrapers.urlvoid_scraper", "scrape_urlvoid", {}),
+    "ipvoid": ("scrapers.ipvoid_scraper", "scrape_ipvoid", {"ip": True}),
+    "ssltrust_blacklist": ("scrapers.ssltrust_blacklist_scraper", "scrape_ssltrust_blacklist", {}),
+    "ssl_org_report": ("scrapers.ssl_org_scraper", "scrape_ssl_org", {}),
+    "google_safe_browsing": ("scrapers.google_safe_browsing_scraper", "scrape_google_safe_browsing", {}),
+    "tranco_list": ("scrapers.tranco_list_scraper", "scrape_tranco_list", {}),
+    "similarweb_data": ("scrapers.scrape_similarweb_data", "scrape_similarweb_data", {}),
+    "mxtoolbox": ("scrapers.mxtool_scraper", "scrape_mxtoolbox", {}),
+    "page_size": ("scrapers.pagesize_scraper", "scrape_page_size", {"include_resources": True}),
+    "popup_and_ads": ("scrapers.check_popup_ads", "check_popups_ads", {})
+}
+
+FIXTURE_IP = "203.0.113.24"
+RESULTS_DIR = os.path.join("benchmarks", "results")
+MB = 1024 * 1024
+
+
+def load_scrapers(names=None):
+    """
+    Imports the selected scrapers. One whose dependencies are missing is skipped with a warning.
+    """
+    loaded = {}
+    for name, (module, function, options) in BENCH_SCRAPERS.items():
+        if names and name not in names:
+            continue
+        try:
+            loaded[name] = (getattr(importlib.import_module(module), function), options)
+        except ImportError as e:
+            print(f"⚠️ Skipping {name}: {e}")
+    return loaded
+
+
+def call_scraper(func, options, domain):
+    kwargs = {k: v for k, v in options.items() if k != "ip"}
+    return func(FIXTURE_IP if options.get("ip") else domain, **kwargs)
+
+
+def cpu_seconds():
+    """
+    User + system CPU of this process and its reaped children (drivers and browsers).
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class PeakRSSSampler:
+    """
+    Samples the resident memory of this process tree (browsers included, the fixture server
+    excluded) in a background thread and keeps the peak.
+    """
+
+    def __init__(self, exclude_pids=(), interval=0.05):
+        self.exclude_pids = set(exclude_pids)
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        pids = [pid for pid in process_tree_pids(os.getpid()) if pid not in self.exclude_pids]
+        self.peak = max(self.peak, sum(process_rss(pid) for pid in pids))
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+
+
+def measure(work, exclude_pids):
+    """
+    Runs `work()` and returns (its result, wall seconds, CPU seconds, peak RSS in MB).
+    """
+    cpu_before = cpu_seconds()
+    with PeakRSSSampler(exclude_pids) as sampler:
+        start = time.perf_counter()
+        result = work()
+        wall = time.perf_counter() - start
+    return result, wall, cpu_seconds() - cpu_before, sampler.peak / MB
+
+
+def bench_scrapers(scrapers, repeat, exclude_pids):
+    """
+    Runs each scraper alone, `repeat` times, against a fresh fixture domain each time.
+    """
+    report = {}
+    for name, (func, options) in scrapers.items():
+        runs = []
+        for i in range(repeat):
+            domain = f"bench-{name.replace('_', '-')}-{i}.example"
+            result, wall, cpu, peak = measure(lambda: call_scraper(func, options, domain), exclude_pids)
+            runs.append({"wall_s": wall, "cpu_s": cpu, "peak_rss_mb": peak,
+                         "outcome": classify_outcome(json.loads(result) if isinstance(result, str) else result)})
+        walls = sorted(run["wall_s"] for run in runs)
+        report[name] = {
+            "runs": len(runs),
+            "wall_s_median": round(walls[len(walls) // 2], 3),
+            "wall_s_max": round(walls[-1], 3),
+            "cpu_s_mean": round(sum(run["cpu_s"] for run in runs) / len(runs), 3),
+            "peak_rss_mb": round(max(run["peak_rss_mb"] for run in runs), 1),
+            "failures": sum(1 for run in runs if run["outcome"] != "ok")
+        }
+        row = report[name]
+        print(f"⏱️ {name:<22} wall {row['wall_s_median']:>7.2f}s (max {row['wall_s_max']:.2f}s)  "
+              f"cpu {row['cpu_s_mean']:>6.2f}s  peak {row['peak_rss_mb']:>7.1f} MB  failures {row['failures']}")
+    return report
+
+
+def assess_domain(domain, scrapers):
+    """
+    All selected scrapers for one domain, concurrently, as in the pipeline's scraper stage.
+    Returns the number of failed sources.
+    """
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+        futures = [executor.submit(call_scraper, func, options, domain) for func, options in scrapers.values()]
+    failures = 0
+    for future in futures:
+        try:
+            result = future.result()
+            failures += classify_outcome(json.loads(result) if isinstance(result, str) else result) != "ok"
+        except Exception:
+            failures += 1
+    return failures
+
+
+def bench_end_to_end(scrapers, domains, levels, exclude_pids):
+    """
+    Assesses `domains` fixture domains with 1..N domains in flight and reports domains per minute.
+    """
+    report = {}
+    for level in levels:
+        names = [f"shop-{level}-{i:03d}.example" for i in range(domains)]
+
+        def work():
+            with ThreadPoolExecutor(max_workers=level) as executor:
+                return sum(executor.map(lambda d: assess_domain(d, scrapers), names))
+
+        failures, wall, cpu, peak = measure(work, exclude_pids)
+        report[level] = {
+            "domains": domains,
+            "wall_s": round(wall, 2),
+            "domains_per_minute": round(domains / wall * 60, 2),
+            "cpu_s": round(cpu, 2),
+            "peak_rss_mb": round(peak, 1),
+            "failed_sources": failures
+        }
+        row = report[level]
+        print(f"🚀 concurrency {level:>2}: {row['domains_per_minute']:>7.2f} domains/min  wall {row['wall_s']:.1f}s  "
+              f"cpu {row['cpu_s']:.1f}s  peak {row['peak_rss_mb']:.1f} MB  failed sources {row['failed_sources']}")
+    return report
+
+
+def start_fixture_server(latency):
+    """
+    Starts the fixture server in its own process, so its CPU and memory stay out of the numbers.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fixture_server", "--port", "0", "--latency", str(latency)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if "RISK_FIXTURE_URL=" not in line:
+        process.kill()
+        raise RuntimeError(f"Fixture server did not start: {line!r}")
+    return process, line.strip().rsplit("RISK_FIXTURE_URL=", 1)[1].rstrip(")")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded pages.")
+    parser.add_argument("--scrapers", help="Comma-separated subset of: " + ", ".join(BENCH_SCRAPERS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scraper")
+    parser.add_argument("--domains", type=int, default=8, help="Domains per end-to-end run")
+    parser.add_argument("--concurrency", default="1,2,4", help="Domains in flight, comma-separated levels")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-in server adds per response")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only benchmark scrapers one by one")
+    parser.add_argument("--output", help="Report path (default benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    scrapers = load_scrapers(set(args.scrapers.split(",")) if args.scrapers else None)
+    if not scrapers:
+        print("❌ No scrapers to benchmark.")
+        return
+
+    server, url = start_fixture_server(args.latency)
+    os.environ["RISK_FIXTURE_URL"] = url
+    print(f"🧪 Fixture server on {url}")
+    exclude = [server.pid]
+
+    try:
+        report = {
+            "started_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            "cpu_count": os.cpu_count(),
+            "settings": {"repeat": args.repeat, "domains": args.domains, "latency_s": args.latency,
+                         "browser_backend": os.environ.get("RISK_BROWSER_BACKEND", "selenium")},
+            "scrapers": bench_scrapers(scrapers, args.repeat, exclude)
+        }
+        if not args.skip_e2e:
+            levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+            report["end_to_end"] = bench_end_to_end(scrapers, args.domains, levels, exclude)
+    finally:
+        server.terminate()
+        server.wait()
+
+    path = args.output or os.path.join(RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=4)
+    print(f"📄 Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
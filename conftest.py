@@ -0,0 +1 @@
+# Lets `pytest` import the repo's packages (utils, scrapers) from the repo root
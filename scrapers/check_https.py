@@ -1,6 +1,8 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from utils.admission import track_driver
+from utils.metrics import phase
 import time
 
 def check_https(domain):
@@ -19,12 +21,16 @@ def check_https(domain):
 
     # Initialize WebDriver without ChromeDriverManager
     service = Service()  # Use the default installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=service, options=options))
 
     try:
-        driver.get(https_url)
-        time.sleep(2)  # Wait for the page to load
-        page_title = driver.title
+        with phase("navigation"):
+            driver.get(https_url)
+        with phase("sleep"):
+            time.sleep(2)  # Wait for the page to load
+        with phase("extraction"):
+            page_title = driver.title
         return {
             "has_https": True,
             "protocol": "HTTPS",
@@ -33,15 +39,18 @@ def check_https(domain):
         }
     except Exception:
         try:
-            driver.get(http_url)
-            time.sleep(2)  # Wait for the page to load
-            page_title = driver.title
+            with phase("navigation"):
+                driver.get(http_url)
+            with phase("sleep"):
+                time.sleep(2)  # Wait for the page to load
+            with phase("extraction"):
+                page_title = driver.title
             return {
                 "has_https": False,
                 "protocol": "HTTP",
                 "status": "Accessible",
                 "page_title": page_title,
-                "error": "HTTPS failed, but HTTP is accessible"
+                "note": "HTTPS failed, but HTTP is accessible"  # A finding, not a failed check
             }
         except Exception:
             return {
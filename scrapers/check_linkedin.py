@@ -1,11 +1,43 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+from utils.admission import track_driver
+import requests
 import tldextract
 import json
 import time
 import re
+from utils.social_links import extract_social_links, first_links
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.metrics import phase
+from utils.snapshots import save_snapshot, snapshot_driver
+from utils.source_urls import merchant_url, rebase_url, source_url
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+# About Us fields read from a LinkedIn company page
+LINKEDIN_ABOUT_FIELDS = ("about_us", "website", "industry", "company_size", "type", "founded", "specialties")
+
+LINKEDIN_FIELDS = {
+    "title": {"selector": "title"},
+    "about_us": {"selector": "p[data-test-id='about-us__description']"},
+    "website": {"selector": "a[data-tracking-control-name='about_website']", "attr": "href"},
+    "industry": {"selector": "dd[data-test-id='about-us__industry']"},
+    "company_size": {"selector": "dd[data-test-id='about-us__size']"},
+    "type": {"selector": "dd[data-test-id='about-us__organizationType']"},
+    "founded": {"selector": "dd[data-test-id='about-us__foundedOn']"},
+    "specialties": {"selector": "dd[data-test-id='about-us__specialties']"},
+    "employee_count_text": {"selector": "p.face-pile__text"},
+    "employees": {"selector": "a[data-tracking-control-name='org-employees']", "all": True, "fields": {
+        "name": {"selector": "h3.base-main-card__title"},
+        "position": {"selector": "h4.base-main-card__subtitle"},
+        "profile_image": {"selector": "img", "attr": "src"}
+    }},
+    "employee_links": {"selector": "a[data-tracking-control-name='org-employees']", "all": True, "attr": "href"}
+}
 
 def setup_driver():
     """
@@ -19,71 +51,94 @@ def setup_driver():
     options.add_argument("--disable-dev-shm-usage")
 
     service = Service()  # Use system-installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=service, options=options))
     return driver
 
-def extract_text(driver, by, value):
+def fetch_static_html(url):
     """
-    Extracts text safely from an element, handling missing elements gracefully.
+    Fetches the raw homepage HTML without a browser. Returns None on failure.
     """
     try:
-        text = driver.find_element(by, value).text.strip()
-        return text if text else None
-    except:
+        response = requests.get(url, headers=HEADERS, timeout=15)
+        response.raise_for_status()
+        return response.text
+    except requests.exceptions.RequestException:
         return None
 
-def extract_link(driver, by, value):
-    """
-    Extracts link safely from an element.
-    """
-    try:
-        link = driver.find_element(by, value).get_attribute("href")
-        return link if link else None
-    except:
-        return None
 
-def get_social_links(domain, driver):
+def get_social_links(domain, get_driver):
     """
-    Scrapes the homepage of the domain for LinkedIn, Facebook, Instagram, Twitter, and YouTube URLs.
+    Finds LinkedIn, Facebook, Instagram, Twitter, and YouTube URLs on the homepage of the domain.
+    The raw HTML is scanned first; the browser from `get_driver()` is only used when no links
+    are found there (e.g. they are injected by JavaScript), and then its page source is scanned once.
+
+    Returns:
+        tuple: (candidates per platform, where the links were found)
     """
-    website_url = f"https://{domain}"
-    social_links = {
-        "linkedin": None,
-        "facebook": None,
-        "instagram": None,
-        "twitter": None,
-        "youtube": None
-    }
+    website_url = merchant_url(domain)
+    candidates = {}
+
+    with phase("navigation"):
+        html = fetch_static_html(website_url)
+    if html:
+        with phase("extraction"):
+            candidates = extract_social_links(html)
+        if any(candidates.values()):
+            save_snapshot("check_social_presence", domain, html, page="homepage", url=website_url,
+                          meta={"links_source": "static_html"})
+            return candidates, "static_html"
 
     try:
-        driver.get(website_url)
-        time.sleep(5)  # Allow JavaScript to load
-
-        links = driver.find_elements(By.TAG_NAME, "a")
-        for link in links:
-            href = link.get_attribute("href")
-            if href:
-                if "linkedin.com/company" in href and not social_links["linkedin"]:
-                    social_links["linkedin"] = href
-                elif "facebook.com" in href and not social_links["facebook"]:
-                    social_links["facebook"] = href
-                elif "instagram.com" in href and not social_links["instagram"]:
-                    social_links["instagram"] = href
-                elif "twitter.com" in href or "x.com" in href and not social_links["twitter"]:
-                    social_links["twitter"] = href
-                elif "youtube.com" in href or "youtu.be" in href and not social_links["youtube"]:
-                    social_links["youtube"] = href
-
+        driver = get_driver()
+        with phase("navigation"):
+            driver.get(website_url)
+        with phase("sleep"):
+            time.sleep(5)  # Allow JavaScript to load
+        with phase("extraction"):
+            rendered = driver.page_source
+            candidates = extract_social_links(rendered)
+        save_snapshot("check_social_presence", domain, rendered, page="homepage", url=website_url,
+                      meta={"links_source": "rendered_html"})
+        return candidates, "rendered_html"
     except Exception as e:
         print(f"Failed to scrape homepage: {str(e)}")
 
-    return social_links
+    save_snapshot("check_social_presence", domain, html, page="homepage", url=website_url,
+                  meta={"links_source": "static_html"})
+    return candidates, "static_html" if html else None
 
-def check_social_presence(domain):
+
+def apply_linkedin_page(details, linkedin_url, extracted):
     """
-    Uses Selenium to check for social media presence, scrape LinkedIn 'About Us', company details, employees list, and employee count.
+    Adds what was extracted from a LinkedIn company page to `details`.
+    Nothing is added when the page is LinkedIn's "Page Not Found".
     """
-    details = {
+    if "Page Not Found" in (extracted["title"] or ""):
+        return
+
+    details["social_presence"]["linkedin"]["presence"] = True
+    details["social_presence"]["linkedin"]["link"] = linkedin_url
+
+    # About Us section, without empty/null fields
+    details["linkedin_company_details"] = {key: extracted[key] for key in LINKEDIN_ABOUT_FIELDS if extracted[key]}
+
+    # Extract and clean employee count
+    employee_count_text = extracted["employee_count_text"]
+    if employee_count_text:
+        count_match = re.search(r"\d+", employee_count_text)  # Extracts only numbers
+        details["employee_count"] = count_match.group(0) if count_match else None
+
+    # Employee cards, without empty/null fields
+    for employee, profile_link in zip(extracted["employees"], extracted["employee_links"]):
+        employee_data = {**employee, "profile_link": profile_link}
+        filtered_employee = {k: v for k, v in employee_data.items() if v}
+        if filtered_employee:  # Only add if there is data
+            details["employees"].append(filtered_employee)
+
+
+def new_details(domain):
+    return {
         "domain_name": domain,
         "social_presence": {
             "linkedin": {"presence": False, "link": None},
@@ -97,74 +152,91 @@ def check_social_presence(domain):
         "employee_count": None
     }
 
-    driver = setup_driver()
 
-    # **Step 1: Get Social Media URLs from Website**
-    social_links = get_social_links(domain, driver)
+def apply_social_links(details, candidates, links_source):
+    """
+    Records the homepage's social links. Returns the LinkedIn URL to visit.
+    """
+    social_links = first_links(candidates) if candidates else {p: None for p in details["social_presence"]}
+    details["social_links_source"] = links_source
 
     # Assign found social links and set presence to True
     for platform, link in social_links.items():
         if link:
-            details["social_presence"][platform] = {"presence": True, "link": link}
+            details["social_presence"][platform] = {"presence": True, "link": link, "candidates": candidates[platform]}
 
-    # **Step 2: Get LinkedIn URL from website or construct it**
-    linkedin_url = social_links["linkedin"]
+    # Get LinkedIn URL from website or construct it
+    linkedin_url = rebase_url("linkedin", social_links["linkedin"]) if social_links["linkedin"] else None
     if not linkedin_url:
-        base_domain = tldextract.extract(domain).domain
-        linkedin_url = f"https://www.linkedin.com/company/{base_domain}"
+        base_domain = tldextract.extract(details["domain_name"]).domain
+        linkedin_url = source_url("linkedin", f"/company/{base_domain}")
+    return linkedin_url
+
+
+def finish_details(details):
+    # Remove empty fields from the final JSON output
+    details = {k: v for k, v in details.items() if v and v != {}}
+    return json.dumps(details, indent=4)
+
+
+def check_social_presence(domain):
+    """
+    Uses Selenium to check for social media presence, scrape LinkedIn 'About Us', company details, employees list, and employee count.
+    """
+    details = new_details(domain)
+    drivers = []
+
+    def get_driver():
+        # Chrome is only started once something actually needs a browser
+        if not drivers:
+            drivers.append(setup_driver())
+        return drivers[0]
+
+    # **Step 1: Get Social Media URLs from Website**
+    candidates, links_source = get_social_links(domain, get_driver)
+
+    # **Step 2: Get LinkedIn URL from website or construct it**
+    linkedin_url = apply_social_links(details, candidates, links_source)
 
     try:
-        driver.get(linkedin_url)
-        time.sleep(5)  # Wait for page to load
-
-        if "Page Not Found" not in driver.title:
-            details["social_presence"]["linkedin"]["presence"] = True
-            details["social_presence"]["linkedin"]["link"] = linkedin_url
-
-            # Scrape About Us section
-            linkedin_data = {
-                "about_us": extract_text(driver, By.CSS_SELECTOR, "p[data-test-id='about-us__description']"),
-                "website": extract_link(driver, By.CSS_SELECTOR, "a[data-tracking-control-name='about_website']"),
-                "industry": extract_text(driver, By.CSS_SELECTOR, "dd[data-test-id='about-us__industry']"),
-                "company_size": extract_text(driver, By.CSS_SELECTOR, "dd[data-test-id='about-us__size']"),
-                "type": extract_text(driver, By.CSS_SELECTOR, "dd[data-test-id='about-us__organizationType']"),
-                "founded": extract_text(driver, By.CSS_SELECTOR, "dd[data-test-id='about-us__foundedOn']"),
-                "specialties": extract_text(driver, By.CSS_SELECTOR, "dd[data-test-id='about-us__specialties']")
-            }
-
-            # Remove empty/null fields
-            details["linkedin_company_details"] = {k: v for k, v in linkedin_data.items() if v}
-
-            # Extract and clean employee count
-            employee_count_text = extract_text(driver, By.CSS_SELECTOR, "p.face-pile__text")
-            if employee_count_text:
-                count_match = re.search(r"\d+", employee_count_text)  # Extracts only numbers
-                details["employee_count"] = count_match.group(0) if count_match else None
-
-            # Scrape employee details
-            employees = driver.find_elements(By.CSS_SELECTOR, "a[data-tracking-control-name='org-employees']")
-            for employee in employees:
-                employee_data = {
-                    "name": extract_text(employee, By.CSS_SELECTOR, "h3.base-main-card__title"),
-                    "position": extract_text(employee, By.CSS_SELECTOR, "h4.base-main-card__subtitle"),
-                    "profile_link": employee.get_attribute("href"),
-                    "profile_image": extract_link(employee, By.TAG_NAME, "img")
-                }
-
-                # Remove empty/null fields
-                filtered_employee = {k: v for k, v in employee_data.items() if v}
-                if filtered_employee:  # Only add if there is data
-                    details["employees"].append(filtered_employee)
+        driver = get_driver()
+        with phase("navigation"):
+            driver.get(linkedin_url)
+        with phase("sleep"):
+            time.sleep(5)  # Wait for page to load
+
+        # Everything on the company page in one script call
+        with phase("extraction"):
+            snapshot_driver("check_social_presence", domain, driver, page="linkedin", meta={"linkedin_url": linkedin_url})
+            apply_linkedin_page(details, linkedin_url, extract_fields(driver, LINKEDIN_FIELDS))
 
     except Exception as e:
         details["error"] = f"Failed to scrape LinkedIn: {str(e)}"
 
-    driver.quit()  # Close the WebDriver
+    for driver in drivers:
+        driver.quit()  # Close the WebDriver
 
-    # Remove empty fields from the final JSON output
-    details = {k: v for k, v in details.items() if v and v != {}}
+    return finish_details(details)
 
-    return json.dumps(details, indent=4)
+
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs extraction on the archived homepage and LinkedIn page (see utils/reparse.py).
+    """
+    meta = meta or {}
+    details = new_details(domain)
+    homepage = pages.get("homepage")
+    candidates = extract_social_links(homepage) if homepage else {}
+    links_source = meta.get("homepage", {}).get("links_source") if homepage else None
+    linkedin_url = apply_social_links(details, candidates, links_source)
+
+    if "linkedin" in pages:
+        linkedin_url = meta.get("linkedin", {}).get("linkedin_url", linkedin_url)
+        apply_linkedin_page(details, linkedin_url, extract_fields_from_html(pages["linkedin"], LINKEDIN_FIELDS))
+    else:
+        details["error"] = "Failed to scrape LinkedIn: no archived LinkedIn page"
+
+    return finish_details(details)
 
 if __name__ == "__main__":
     domain = "adworld.ie"
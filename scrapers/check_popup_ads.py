@@ -1,20 +1,41 @@
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.alert import Alert
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+from utils.admission import track_driver
+from utils.ad_filter import detect_ads, load_filter_list
+from utils.metrics import phase
+from utils.snapshots import save_snapshot
+from utils.source_urls import merchant_url
 
-def check_popups_ads(domain):
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+# Subresource URLs the browser actually loaded
+RESOURCE_URLS_SCRIPT = "return performance.getEntriesByType('resource').map(function (e) { return e.name; });"
+
+
+def fetch_page_html(url):
     """
-    Check if a website has pop-ups or advertisements.
-    Returns strictly boolean values.
+    Fetches the page HTML without a browser. Returns None on failure.
     """
-    url = f"https://{domain}"
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=15)
+        response.raise_for_status()
+        return response.text
+    except requests.exceptions.RequestException:
+        return None
+
 
-    # Configure Selenium Options
+def check_popups_live(url, alert_wait=3):
+    """
+    Opens the page in Chrome to detect JavaScript alerts and new windows.
+    Also returns the rendered HTML and loaded subresource URLs for the ad rules.
+    """
     options = Options()
     options.add_argument("--headless")  # Run in headless mode (no UI)
     options.add_argument("--ignore-certificate-errors")
@@ -22,54 +43,90 @@ def check_popups_ads(domain):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-popup-blocking")  # Allow pop-ups to be detected
 
-    # **Fixed WebDriver Initialization**
     service = Service()  # Use installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=service, options=options))
 
     try:
-        driver.get(url)
-        time.sleep(5)  # Allow time for pop-ups and ads to load
-
+        with phase("navigation"):
+            driver.get(url)
         has_popups = False
-        has_ads = False
+
+        # Detect JavaScript Alerts (Pop-ups); the wait also gives on-load pop-ups time to open
+        with phase("wait"):
+            try:
+                WebDriverWait(driver, alert_wait).until(EC.alert_is_present())
+                driver.switch_to.alert.dismiss()
+                has_popups = True
+            except Exception:
+                pass  # No JS alerts detected
 
         # Detect Pop-ups (New Windows)
-        main_window = driver.current_window_handle
-        all_windows = driver.window_handles
-
-        if len(all_windows) > 1:
-            has_popups = True  # New window detected = Pop-up detected
-
-        # Detect JavaScript Alerts (Pop-ups)
-        try:
-            WebDriverWait(driver, 2).until(EC.alert_is_present())  # Wait for alert
-            alert = driver.switch_to.alert
-            alert.dismiss()
-            has_popups = True  # JavaScript alert detected
-        except:
-            pass  # No JS alerts detected
-
-        # Detect Advertisements
-        ad_selectors = [
-            "iframe[src*='ads']", "div[class*='ad']", "div[id*='ad']",
-            "ins.adsbygoogle", "iframe[title*='advertisement']", "iframe[src*='doubleclick']"
-        ]
-
-        for selector in ad_selectors:
-            if driver.find_elements(By.CSS_SELECTOR, selector):
-                has_ads = True
-                break  # No need to check further if ads are detected
+        with phase("extraction"):
+            if len(driver.window_handles) > 1:
+                has_popups = True
+            return has_popups, driver.page_source, driver.execute_script(RESOURCE_URLS_SCRIPT) or []
+    finally:
+        driver.quit()
+
+
+def check_popups_ads(domain, use_browser=False, filter_list_path=None):
+    """
+    Check if a website has pop-ups or advertisements.
+
+    Ads are detected by running EasyList-style rules (see `utils.ad_filter`) over the page HTML and
+    its subresource URLs. A live browser is only started when `use_browser` is True, to detect
+    JavaScript alerts and new windows; otherwise `has_popups` only reflects known pop-up networks.
+    """
+    url = merchant_url(domain)
+    compiled = load_filter_list(filter_list_path) if filter_list_path else None
+
+    has_popups = False
+    resource_urls = []
+    html = None
+    result = {}
+
+    try:
+        if use_browser:
+            has_popups, html, resource_urls = check_popups_live(url)
+        else:
+            html = fetch_page_html(url)
+
+        if html is None:
+            result["error"] = f"Could not fetch {url}"
+        else:
+            save_snapshot("check_popups_ads", domain, html, url=url,
+                          meta={"resource_urls": resource_urls, "use_browser": use_browser, "live_popups": has_popups})
+            result = detect_ads(html, url, resource_urls, compiled=compiled)
 
     except Exception as e:
         print(f"❌ Error processing {domain}: {e}")
-    finally:
-        driver.quit()
+        result["error"] = str(e)
 
+    return build_popup_result(result, has_popups, use_browser)
+
+
+def build_popup_result(result, has_popups, use_browser):
+    """
+    Combines the ad rule matches with the pop-ups seen live (if the browser ran).
+    """
     return {
-        "has_popups": has_popups,
-        "has_ads": has_ads
+        "has_popups": has_popups or result.get("popup_network_detected", False),
+        "has_ads": result.get("has_ads", False),
+        "popup_check": "browser" if use_browser else "rules_only",
+        **{k: v for k, v in result.items() if k not in ("has_ads", "popup_network_detected")}
     }
 
+
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs the ad rules over an archived homepage and its loaded subresources (see utils/reparse.py).
+    """
+    page_meta = (meta or {}).get("main", {})
+    url = page_meta.get("url") or merchant_url(domain)
+    result = detect_ads(pages["main"], url, page_meta.get("resource_urls", []))
+    return build_popup_result(result, page_meta.get("live_popups", False), page_meta.get("use_browser", False))
+
 if __name__ == "__main__":
     domain = "aiworldjournal.com"
     result = check_popups_ads(domain)
@@ -1,13 +1,29 @@
 import requests
-from bs4 import BeautifulSoup
-import re
 import urllib3
 import ssl
 import socket
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from utils.admission import track_driver
+from utils.metrics import phase
+from utils.legal_name_extractor import extract_legal_names, pick_legal_name
+from utils.term_matcher import build_matcher, find_matches, html_to_text, summarize_matches
+from utils.legal_page_crawler import STOP_FIELDS, crawl_legal_pages, merge_findings
+from utils.snapshots import save_snapshot
+from utils.source_urls import merchant_url
+
+
+# Common permutations for Terms and Privacy Policy
+TERMS_VARIANTS = [
+    "terms of service", "terms of use", "terms & conditions", "terms and conditions",
+    "terms", "user agreement", "website terms", "site terms"
+]
+
+PRIVACY_VARIANTS = [
+    "privacy policy", "data protection", "gdpr", "privacy statement",
+    "privacy notice", "data privacy", "confidentiality", "privacy"
+]
+
+# Compiled once; matches every variant in a single pass over the page text
+POLICY_MATCHER = build_matcher({"terms": TERMS_VARIANTS, "privacy": PRIVACY_VARIANTS})
 
 
 def check_ssl(domain):
@@ -25,17 +41,35 @@ def check_ssl(domain):
         return False  # Other connection errors
 
 
+def analyze_page_text(text):
+    """
+    Looks for Terms, Privacy Policy and a legal entity name in a page's visible text.
+    """
+    policy_matches = summarize_matches(find_matches(POLICY_MATCHER, text))
+    name_candidates = extract_legal_names(text)
+    return {
+        "terms_of_service_present": "terms" in policy_matches,
+        "privacy_policy_present": "privacy" in policy_matches,
+        "policy_term_matches": policy_matches,
+        "legal_name": pick_legal_name(name_candidates),
+        "legal_name_candidates": [
+            {"name": c["name"], "position": c["start"], "rule": c["rule"]} for c in name_candidates
+        ]
+    }
+
+
 def fetch_page_content(domain):
     """
     Try fetching the page content using multiple fallbacks.
-    Returns page content (HTML) or None if the website is not accessible.
+    Returns (page content (HTML) or None if the website is not accessible, whether the
+    certificate was verified), so the legal page crawl can load the site the same way.
     """
-    url = f"https://{domain}"
+    url = merchant_url(domain)
     try:
         # Try with requests (default)
         response = requests.get(url, timeout=15)
         response.raise_for_status()
-        return response.text
+        return response.text, True
 
     except requests.exceptions.SSLError:
         # Fallback: Try requests without SSL verification
@@ -43,7 +77,7 @@ def fetch_page_content(domain):
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
             response = requests.get(url, timeout=15, verify=False)
             response.raise_for_status()
-            return response.text
+            return response.text, False
         except Exception:
             pass
 
@@ -51,44 +85,44 @@ def fetch_page_content(domain):
         pass  # If any request fails, move to the next fallback
 
     # Fallback: Use Selenium WebDriver to bypass SSL and JavaScript issues
+    # (imported here so the fast tier can reuse `analyze_page_text` without loading selenium)
     try:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
         options = Options()
         options.add_argument('--ignore-certificate-errors')  # Ignore SSL issues
         options.add_argument('--headless')  # Run without GUI
 
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get(url)
-        page_content = driver.page_source
-        driver.quit()
-        return page_content
+        with phase("browser_start"):
+            driver = track_driver(webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options))
+        try:
+            with phase("navigation"):
+                driver.get(url)
+            with phase("extraction"):
+                return driver.page_source, False  # Loaded ignoring certificate errors
+        finally:
+            driver.quit()
     except Exception:
-        return None  # All attempts failed
+        return None, False  # All attempts failed
 
 
 def extract_legal_name(text):
     """
     Extracts potential legal company names based on common patterns in Terms, Privacy Policy, and About Us pages.
+    Uses the linear-time tokenizer in `utils.legal_name_extractor` instead of backtracking regexes.
     """
-    patterns = [
-        r"company name[:\s]+([A-Za-z0-9\s,.-]+)",  
-        r"registered as[:\s]+([A-Za-z0-9\s,.-]+)",  
-        r"is operated by[:\s]+([A-Za-z0-9\s,.-]+)",  
-        r"\b([A-Za-z0-9\s]+ (Ltd|LLC|Inc|Pvt|Corporation|Limited|Pvt Ltd|SpA|BV|AG|KG|AB|Oy|NV|Sdn Bhd))\b"  
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
+    return pick_legal_name(extract_legal_names(text))
 
-    return None  # No legal name found
 
-
-def check_privacy_term(domain):
+def check_privacy_term(domain, max_legal_pages=4):
     """
     Check if a website is accessible and whether it contains Terms of Service or Privacy Policy.
+    Besides the homepage, up to `max_legal_pages` linked legal pages (Terms, Privacy, About, Legal) are crawled.
     """
-    page_content = fetch_page_content(domain)
+    page_content, verified = fetch_page_content(domain)
     is_accessible = page_content is not None  # Boolean indicating site accessibility
 
     if not is_accessible:
@@ -97,39 +131,71 @@ def check_privacy_term(domain):
             "ssl_valid": check_ssl(domain),
             "terms_of_service_present": False,
             "privacy_policy_present": False,
-            "legal_name": None
+            "policy_term_matches": {},
+            "legal_name": None,
+            "legal_name_source": None,
+            "legal_name_candidates": [],
+            "legal_pages_checked": []
         }
 
-    soup = BeautifulSoup(page_content, "html.parser")
-    page_text = soup.get_text().lower()  # Convert to lowercase for case-insensitive search
-
-    # Common permutations for Terms and Privacy Policy
-    terms_variants = [
-        "terms of service", "terms of use", "terms & conditions", "terms and conditions",
-        "terms", "user agreement", "website terms", "site terms"
-    ]
-
-    privacy_variants = [
-        "privacy policy", "data protection", "gdpr", "privacy statement",
-        "privacy notice", "data privacy", "confidentiality", "privacy"
-    ]
-
-    # Check for presence of Terms & Privacy Policy
-    terms_present = any(term in page_text for term in terms_variants)
-    privacy_present = any(policy in page_text for policy in privacy_variants)
-
-    # Extract potential legal entity name
-    company_name = extract_legal_name(page_text)
+    # Stream the HTML to visible text (script/style skipped) without building a DOM tree
+    homepage = analyze_page_text(html_to_text(page_content))
 
+    # Follow footer links such as /terms, /privacy, /about and /legal until everything is found
+    try:
+        crawl = crawl_legal_pages(merchant_url(domain), page_content, analyze_page_text, initial_findings=homepage,
+                                  max_pages=max_legal_pages, verify=verified, keep_text=True)
+    except Exception as e:
+        crawl = {**homepage, "pages": [], "error": f"legal_page_crawl_failed: {e}"}
+
+    # Archive the legal pages (as text, which is all the crawler keeps) and then the homepage, whose
+    # meta lists this capture's legal pages in the order their findings were merged
+    ssl_valid = check_ssl(domain)
+    legal_pages = []
+    for page in crawl["pages"]:
+        entry = {k: v for k, v in page.items() if k in ("url", "skipped", "error")}
+        if page.get("text") is not None:
+            entry["page"] = f"legal:{page['url']}"
+            save_snapshot("check_privacy_term", domain, page.pop("text"), page=entry["page"], url=page["url"])
+        legal_pages.append(entry)
+    save_snapshot("check_privacy_term", domain, page_content, url=merchant_url(domain),
+                  meta={"ssl_valid": ssl_valid, "legal_pages": legal_pages})
+    return build_privacy_term_result(domain, homepage, crawl, ssl_valid)
+
+
+def build_privacy_term_result(domain, homepage, crawl, ssl_valid):
+    """
+    The saved result for an accessible site, from the homepage findings and the legal page crawl.
+    """
     return {
         "is_accessible": True,
-        "ssl_valid": check_ssl(domain),
-        "terms_of_service_present": terms_present,
-        "privacy_policy_present": privacy_present,
-        "legal_name": company_name
+        "ssl_valid": ssl_valid,
+        "terms_of_service_present": crawl["terms_of_service_present"],
+        "privacy_policy_present": crawl["privacy_policy_present"],
+        "policy_term_matches": homepage["policy_term_matches"],
+        "legal_name": crawl["legal_name"],
+        "legal_name_source": crawl.get("legal_name_source", merchant_url(domain) if homepage["legal_name"] else None),
+        "legal_name_candidates": homepage["legal_name_candidates"],
+        "legal_pages_checked": [page["url"] for page in crawl["pages"] if not page.get("skipped")]
     }
 
 
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs the analysis over an archived homepage and the legal pages crawled with it (see utils/reparse.py).
+    """
+    main = (meta or {}).get("main", {})
+    homepage = analyze_page_text(html_to_text(pages["main"]))
+    crawl = {**homepage, "pages": []}
+    for entry in main.get("legal_pages", []):
+        crawl["pages"].append(entry)
+        text = pages.get(entry.get("page"))
+        if text is None or all(crawl.get(field) for field in STOP_FIELDS):
+            continue
+        merge_findings(crawl, {"url": entry["url"], **analyze_page_text(text)})
+    return build_privacy_term_result(domain, homepage, crawl, main.get("ssl_valid"))
+
+
 # Example Usage
 if __name__ == "__main__":
     domain = "launchprotection.com"  # Example domain
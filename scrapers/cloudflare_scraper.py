@@ -0,0 +1,119 @@
+import os
+from datetime import datetime
+
+import requests
+
+from utils.source_urls import SOURCE_BASE_URLS, base_url
+
+# Cloudflare URL Scanner (API v2). A scan is submitted in one call and its result fetched later by
+# UUID; `initiate_scan` only submits, utils/scan_poller.py collects the verdicts.
+# Credentials: RISK_CLOUDFLARE_ACCOUNT_ID and RISK_CLOUDFLARE_API_TOKEN (a token with URL Scanner edit
+# rights). Against a stand-in API (RISK_URL_CLOUDFLARE or RISK_FIXTURE_URL) they are optional.
+REQUEST_TIMEOUT = 15
+
+
+def _api_settings():
+    """
+    (base URL of the account's URL Scanner API, request headers), or (None, error message).
+    """
+    account_id = os.environ.get("RISK_CLOUDFLARE_ACCOUNT_ID")
+    token = os.environ.get("RISK_CLOUDFLARE_API_TOKEN")
+    live = base_url("cloudflare") == SOURCE_BASE_URLS["cloudflare"]
+    if live and not (account_id and token):
+        return None, "cloudflare_not_configured: set RISK_CLOUDFLARE_ACCOUNT_ID and RISK_CLOUDFLARE_API_TOKEN"
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return (f"{base_url('cloudflare')}/accounts/{account_id or 'local'}/urlscanner/v2", headers), None
+
+
+def initiate_scan(domain, visibility="Public"):
+    """
+    Submits https://<domain> for scanning and returns straight away.
+
+    Returns:
+        dict: The submission (uuid, api, visibility, url, message) with `status` "pending" and
+        `submitted_at`; the verdict is merged in later by the scan poller.
+    """
+    settings, error = _api_settings()
+    if error:
+        return {"error": error}
+    api, headers = settings
+    try:
+        response = requests.post(f"{api}/scan", json={"url": f"https://{domain}", "visibility": visibility},
+                                 headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            return {"error": f"cloudflare_submit_failed_for_{domain}", "status_code": response.status_code,
+                    "details": f"HTTP {response.status_code}: {response.text[:200]}"}
+        submission = response.json()
+    except Exception as e:
+        return {"error": f"cloudflare_submit_error_for_{domain}", "details": str(e)}
+
+    return {
+        "uuid": submission.get("uuid"),
+        "api": submission.get("api") or f"{api}/result/{submission.get('uuid')}",
+        "visibility": submission.get("visibility", visibility.lower()),
+        "url": submission.get("url", f"https://{domain}"),
+        "message": submission.get("message"),
+        "status": "pending",
+        "submitted_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def fetch_scan_result(uuid, session=None):
+    """
+    Looks up one scan. Returns {"status": "pending"} while it runs (the API answers 404),
+    {"status": "done", ...summary} once finished, {"status": "throttled", "retry_after": s} on 429,
+    or {"status": "error", "error": ...}.
+    """
+    settings, error = _api_settings()
+    if error:
+        return {"status": "error", "error": error}
+    api, headers = settings
+    try:
+        response = (session or requests).get(f"{api}/result/{uuid}", headers=headers, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        return {"status": "error", "error": f"cloudflare_result_error: {e}"}
+    if response.status_code == 404:
+        return {"status": "pending"}
+    if response.status_code == 429:
+        try:
+            retry_after = float(response.headers.get("Retry-After", 60))
+        except ValueError:
+            retry_after = 60.0
+        return {"status": "throttled", "retry_after": retry_after}
+    if response.status_code != 200:
+        return {"status": "error", "error": f"HTTP {response.status_code}: {response.text[:200]}"}
+    try:
+        return {"status": "done", **summarize_scan(response.json())}
+    except ValueError as e:
+        return {"status": "error", "error": f"cloudflare_result_unreadable: {e}"}
+
+
+def summarize_scan(result):
+    """
+    The parts of a URL Scanner result the record keeps: the overall verdict and where the page landed.
+    """
+    overall = (result.get("verdicts") or {}).get("overall") or {}
+    page = result.get("page") or {}
+    task = result.get("task") or {}
+    categories = [category.get("name") if isinstance(category, dict) else category
+                  for category in overall.get("categories") or []]
+    return {
+        "malicious": bool(overall.get("malicious")),
+        "categories": categories,
+        "has_verdicts": bool(overall.get("hasVerdicts")),
+        "final_url": page.get("url"),
+        "page_ip": page.get("ip"),
+        "page_asn": page.get("asn"),
+        "page_country": page.get("country"),
+        "scanned_at": task.get("time")
+    }
+
+
+# Example usage
+if __name__ == "__main__":
+    scan = initiate_scan("example.com")
+    print(scan)
+    if scan.get("uuid"):
+        print(fetch_scan_result(scan["uuid"]))
@@ -5,6 +5,8 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
+from utils.admission import track_driver
+from utils.metrics import phase
 
 def get_ssl_fingerprint(domain):
     """
@@ -16,7 +18,7 @@ def get_ssl_fingerprint(domain):
         context = ssl.create_default_context()
         
         # Create a secure SSL socket connection
-        with socket.create_connection((domain, 443), timeout=5) as sock:
+        with phase("navigation"), socket.create_connection((domain, 443), timeout=5) as sock:
             with context.wrap_socket(sock, server_hostname=domain) as ssock:
                 cert = ssock.getpeercert(binary_form=True)
         
@@ -44,11 +46,14 @@ def get_ssl_fingerprint_selenium(domain, error=""):
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options))
 
     try:
-        driver.get(url)
-        page_title = driver.title
+        with phase("navigation"):
+            driver.get(url)
+        with phase("extraction"):
+            page_title = driver.title
         driver.quit()
         return {
             "domain": domain,
@@ -1,10 +1,48 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 import time
 import random
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.browser_profile import create_driver
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+# Fields read from the ".contact-info-container" element of the results page
+WHOIS_FIELDS = {
+    "name": {"selector": "span#title-domainName + span.contact-label"},
+    "registry_domain_id": {"selector": "span#title-registryDomainId + span.contact-label"},
+    "registered_on": {"selector": "span#title-creationDate + span.contact-label"},
+    "expires_on": {"selector": "span#title-expiresOn + span.contact-label"},
+    "updated_on": {"selector": "span#title-updatedOn + span.contact-label"},
+    "domain_status": {"selector": "div#contact-labels p.contact-label"},
+    "name_servers": {"selector": "span#title-nameservers + div#contact-labels p.contact-label", "all": True}
+}
+
+WHOIS_ROOT = ".contact-info-container"
+
+def build_whois_results(extracted):
+    """
+    Fills the result fields from extracted values; anything not found stays "unknown".
+    """
+    results = {
+        "name": "unknown",
+        "registry_domain_id": "unknown",
+        "registered_on": "unknown",
+        "expires_on": "unknown",
+        "updated_on": "unknown",
+        "domain_status": "unknown",
+        "name_servers": []
+    }
+    for key, value in (extracted or {}).items():
+        if value:
+            results[key] = value
+    return results
+
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs extraction on an archived results page (see utils/reparse.py).
+    """
+    return build_whois_results(extract_fields_from_html(pages["main"], WHOIS_FIELDS, root_selector=WHOIS_ROOT))
 
 def scrape_godaddy_whois(domain):
     """
@@ -16,109 +54,39 @@ def scrape_godaddy_whois(domain):
     Returns:
         dict: A dictionary containing the scraped data in snake_case format.
     """
-    # Configure Selenium options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")  # Avoid detection
-    chrome_options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    )
-
-    # Initialize the WebDriver
-    driver = webdriver.Chrome(service=Service(), options=chrome_options)
+    # Shared profile: headless, desktop user agent, automation flag hidden,
+    # blocks images/fonts/media and trackers but keeps GoDaddy's own scripts
+    driver = create_driver("godaddy")
 
     try:
         # Construct the GoDaddy WHOIS URL
-        url = f"https://in.godaddy.com/whois/results.aspx?itc=dlp_domain_whois&domainName={domain}"
+        url = source_url("godaddy", f"/whois/results.aspx?itc=dlp_domain_whois&domainName={domain}")
 
         # Open the URL
-        driver.get(url)
-        time.sleep(random.uniform(3, 5))  # Random delay to mimic human behavior
-
-        # Mimic mouse movements
-        actions = ActionChains(driver)
-        actions.move_by_offset(random.randint(10, 50), random.randint(10, 50)).perform()
-        time.sleep(random.uniform(1, 2))
+        with phase("navigation"):
+            driver.get(url)
+        with phase("sleep"):
+            time.sleep(random.uniform(3, 5))  # Random delay to mimic human behavior
 
-        # Extract the required information
-        results = {
-            "name": "unknown",
-            "registry_domain_id": "unknown",
-            "registered_on": "unknown",
-            "expires_on": "unknown",
-            "updated_on": "unknown",
-            "domain_status": "unknown",
-            "name_servers": []
-        }
-
-        # Locate the container
+        # Mimic mouse movements (WebDriver only; the CDP backend has no action chains)
         try:
-            container = driver.find_element(By.CLASS_NAME, "contact-info-container")
-
-            # Extract Name
-            try:
-                results["name"] = container.find_element(
-                    By.CSS_SELECTOR, "span#title-domainName + span.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Registry Domain ID
-            try:
-                results["registry_domain_id"] = container.find_element(
-                    By.CSS_SELECTOR, "span#title-registryDomainId + span.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Registered On
-            try:
-                results["registered_on"] = container.find_element(
-                    By.CSS_SELECTOR, "span#title-creationDate + span.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Expires On
-            try:
-                results["expires_on"] = container.find_element(
-                    By.CSS_SELECTOR, "span#title-expiresOn + span.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Updated On
-            try:
-                results["updated_on"] = container.find_element(
-                    By.CSS_SELECTOR, "span#title-updatedOn + span.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Domain Status
-            try:
-                results["domain_status"] = container.find_element(
-                    By.CSS_SELECTOR, "div#contact-labels p.contact-label"
-                ).text.strip()
-            except:
-                pass
-
-            # Extract Name Servers
-            try:
-                name_servers = container.find_elements(
-                    By.CSS_SELECTOR, "span#title-nameservers + div#contact-labels p.contact-label"
-                )
-                results["name_servers"] = [ns.text.strip() for ns in name_servers]
-            except:
-                pass
+            actions = ActionChains(driver)
+            actions.move_by_offset(random.randint(10, 50), random.randint(10, 50)).perform()
+        except Exception:
+            pass
+        with phase("sleep"):
+            time.sleep(random.uniform(1, 2))
 
+        # Extract the required information (one script call for all fields)
+        extracted = None
+        try:
+            with phase("extraction"):
+                snapshot_driver("scrape_godaddy_whois", domain, driver)
+                extracted = extract_fields(driver, WHOIS_FIELDS, root_selector=WHOIS_ROOT)
         except:
             pass
 
-        return results
+        return build_whois_results(extracted)
     except Exception as e:
         print(f"Error scraping {domain}: {e}")
         return None
@@ -6,6 +6,37 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from utils.admission import track_driver
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+STATUS_XPATH = "//data-tile[@trtitle='Current status']//span"
+SITE_INFO_XPATH = "//column-layout//p"
+
+# The same two elements as CSS selectors, for batched extraction
+SAFE_BROWSING_FIELDS = {
+    "status": {"selector": "data-tile[trtitle='Current status'] span"},
+    "site_info": {"selector": "column-layout p"}
+}
+
+def build_safe_browsing_result(domain_name, extracted):
+    """
+    Status and site info from the extracted fields; "Unknown" when a section did not load.
+    """
+    extracted = extracted or {}
+    return {
+        "domain": domain_name,
+        "Current Status": extracted.get("status") or "Unknown",
+        "Site Info": extracted.get("site_info") or "Unknown"
+    }
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived report page (see utils/reparse.py).
+    """
+    return build_safe_browsing_result(domain_name, extract_fields_from_html(pages["main"], SAFE_BROWSING_FIELDS))
 
 def scrape_google_safe_browsing(domain_name):
     """
@@ -32,46 +63,33 @@ def scrape_google_safe_browsing(domain_name):
     # Initialize WebDriver using system-wide ChromeDriver
     service = Service()  # Uses the system default installed ChromeDriver
     try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        with phase("browser_start"):
+            driver = track_driver(webdriver.Chrome(service=service, options=chrome_options))
     except Exception as e:
         return {"error": f"Failed to start WebDriver: {e}"}
     
     try:
         # Construct the URL
-        url = f"https://transparencyreport.google.com/safe-browsing/search?url={domain_name}&hl=en"
-        driver.get(url)
-        time.sleep(3)  # Small delay to allow page loading
+        url = source_url("google_safe_browsing", f"/safe-browsing/search?url={domain_name}&hl=en")
+        with phase("navigation"):
+            driver.get(url)
+        with phase("sleep"):
+            time.sleep(3)  # Small delay to allow page loading
 
         # Wait for the status and site info sections to load
-        status = "Unknown"
-        site_info = "Unknown"
-        
-        try:
-            # Extract "Current Status"
-            status_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//data-tile[@trtitle='Current status']//span"))
-            )
-            status = status_element.text.strip()
-        except Exception:
-            pass  # Ignore extraction failure
-        
-        try:
-            # Extract "Site Info"
-            site_info_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//column-layout//p"))
-            )
-            site_info = site_info_element.text.strip()
-        except Exception:
-            pass  # Ignore extraction failure
+        for xpath in (STATUS_XPATH, SITE_INFO_XPATH):
+            try:
+                with phase("wait"):
+                    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, xpath)))
+            except Exception:
+                pass  # Reported as "Unknown" below
+
+        # Extract "Current Status" and "Site Info" in one script call
+        with phase("extraction"):
+            snapshot_driver("scrape_google_safe_browsing", domain_name, driver)
+            extracted = extract_fields(driver, SAFE_BROWSING_FIELDS)
 
-        # Construct final result
-        result_data = {
-            "domain": domain_name,
-            "Current Status": status,
-            "Site Info": site_info
-        }
-        
-        return result_data
+        return build_safe_browsing_result(domain_name, extracted)
     
     except Exception as e:
         return {"error": f"Error scraping {domain_name}: {e}"}
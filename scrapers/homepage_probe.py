@@ -0,0 +1,87 @@
+import json
+import re
+
+import requests
+
+from scrapers.check_privacy_term import analyze_page_text
+from utils.ad_filter import detect_ads
+from utils.legal_page_crawler import HEADERS, discover_legal_links
+from utils.snapshots import save_snapshot
+from utils.source_urls import merchant_url
+from utils.term_matcher import html_to_text
+
+MAX_HTML_BYTES = 2 * 1024 * 1024  # Enough for any homepage's text; the fast tier never reads more
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def fetch_homepage(url, timeout, max_bytes=MAX_HTML_BYTES):
+    """
+    One GET of the homepage, following redirects, reading at most `max_bytes`.
+
+    Returns:
+        tuple: (html, {"status_code", "final_url", "html_bytes", "html_truncated"})
+    """
+    with requests.get(url, headers=HEADERS, timeout=timeout, stream=True) as response:
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+        raw = b"".join(chunks)
+        html = raw.decode(response.encoding or "utf-8", errors="replace")
+        return html, {"status_code": response.status_code, "final_url": response.url,
+                      "html_bytes": len(raw), "html_truncated": size >= max_bytes}
+
+
+def build_homepage_result(html, response):
+    """
+    Text analysis of a fetched homepage: policy mentions, legal name, legal links and ad markers.
+    """
+    final_url = response["final_url"]
+    title = TITLE_RE.search(html)
+    policies = analyze_page_text(html_to_text(html))
+    ads = detect_ads(html, final_url)
+    return {
+        "is_accessible": response["status_code"] < 400,
+        **response,
+        "https": final_url.startswith("https://"),
+        "title": " ".join(title.group(1).split()) if title else None,
+        "terms_of_service_present": policies["terms_of_service_present"],
+        "privacy_policy_present": policies["privacy_policy_present"],
+        "legal_name": policies["legal_name"],
+        "legal_links": discover_legal_links(html, final_url),
+        "has_ads": ads["has_ads"],
+        "has_popups": ads["popup_network_detected"]
+    }
+
+
+def probe_homepage(domain, timeout=2.5):
+    """
+    Fetches the homepage once with plain HTTP and analyses it, for the fast assessment tier.
+    Unlike `check_privacy_term` and `check_popups_ads`, no legal pages are crawled and no
+    browser is started, so the result only reflects what the homepage itself shows.
+    """
+    url = merchant_url(domain)
+    try:
+        html, response = fetch_homepage(url, timeout)
+    except requests.exceptions.RequestException as e:
+        return {"is_accessible": False, "error": f"Could not fetch {url}: {e}"}
+
+    save_snapshot("probe_homepage", domain, html, url=response["final_url"], meta={"response": response})
+    return build_homepage_result(html, response)
+
+
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs the homepage analysis over an archived page (see utils/reparse.py).
+    """
+    page_meta = (meta or {}).get("main", {})
+    response = page_meta.get("response") or {"status_code": 200, "final_url": page_meta.get("url") or merchant_url(domain),
+                                             "html_bytes": len(pages["main"].encode("utf-8")), "html_truncated": False}
+    return build_homepage_result(pages["main"], response)
+
+
+# Example usage
+if __name__ == "__main__":
+    print(json.dumps(probe_homepage("example.com"), indent=4))
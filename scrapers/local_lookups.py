@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import socket
+import threading
+
+try:
+    import geoip2.database
+    import geoip2.errors
+except ImportError:  # GeoIP is optional; without it `country_code` is simply not filled in
+    geoip2 = None
+
+# Local copies of lists the deep tier scrapes from websites, so the fast tier can answer from disk:
+#   RISK_TRANCO_LIST   Tranco CSV ("rank,domain" per line, e.g. top-1m.csv from tranco-list.eu)
+#   RISK_BLOCKLIST     one or more blocklist files (os.pathsep-separated); plain domains/IPs,
+#                      hosts-file lines ("0.0.0.0 bad.example") and "||bad.example^" rules
+#   RISK_GEOIP_DB      MaxMind GeoLite2/GeoIP2 Country database (.mmdb), needs the geoip2 package
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(kind, path, loader):
+    """
+    Loads a list once per process, and again only when the file changes.
+    """
+    key = (kind, path, os.path.getmtime(path))
+    with _cache_lock:
+        if key not in _cache:
+            for old in [k for k in _cache if k[:2] == key[:2]]:
+                del _cache[old]
+            _cache[key] = loader(path)
+        return _cache[key]
+
+
+def load_tranco(path):
+    ranks = {}
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if len(row) >= 2 and row[0].isdigit():
+                ranks.setdefault(row[1].strip().lower(), int(row[0]))
+    return ranks
+
+
+def load_blocklist(path):
+    entries = set()
+    with open(path) as file:
+        for line in file:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith("!"):
+                continue
+            if line.startswith("||"):
+                line = line[2:].split("^", 1)[0]
+            parts = line.split()
+            entries.add(parts[-1].lower().rstrip("."))  # Hosts-file lines put the name last
+    return entries
+
+
+def _candidates(domain):
+    """
+    The domain and each parent domain: shop.example.co.uk, example.co.uk, co.uk.
+    """
+    labels = domain.lower().rstrip(".").split(".")
+    return [".".join(labels[i:]) for i in range(len(labels) - 1)]
+
+
+def tranco_rank(domain, path):
+    ranks = _cached("tranco", path, load_tranco)
+    for name in (domain.lower(), domain.lower()[4:] if domain.lower().startswith("www.") else None):
+        if name and name in ranks:
+            return ranks[name]
+    return None
+
+
+def blocklist_matches(domain, ip_address, paths):
+    matches = []
+    for path in paths:
+        entries = _cached("blocklist", path, load_blocklist)
+        for name in _candidates(domain) + ([ip_address] if ip_address else []):
+            if name in entries:
+                matches.append({"entry": name, "list": os.path.basename(path)})
+    return matches
+
+
+def geoip_country(ip_address, path):
+    reader = _cached("geoip", path, geoip2.database.Reader)
+    try:
+        return reader.country(ip_address).country.iso_code
+    except (geoip2.errors.AddressNotFoundError, ValueError):
+        return None
+
+
+def lookup_local_lists(domain, tranco_path=None, blocklist_paths=None, geoip_path=None):
+    """
+    Answers the fast tier's reputation questions from local files: Tranco rank, blocklist hits
+    and the hosting country. A list that is not configured is reported in `lists` as False and
+    contributes nothing (scoring treats it as unknown, not clean).
+
+    Returns:
+        dict: `ip_address`, `tranco_rank`, `blocklisted`, `blocklist_matches`, `country_code`, `lists`.
+    """
+    tranco_path = tranco_path or os.environ.get("RISK_TRANCO_LIST")
+    blocklist_paths = blocklist_paths or [p for p in os.environ.get("RISK_BLOCKLIST", "").split(os.pathsep) if p]
+    geoip_path = geoip_path or os.environ.get("RISK_GEOIP_DB")
+
+    try:
+        ip_address = socket.gethostbyname(domain)
+    except OSError:
+        ip_address = None
+
+    lists = {
+        "tranco": bool(tranco_path and os.path.exists(tranco_path)),
+        "blocklist": bool(blocklist_paths) and all(os.path.exists(p) for p in blocklist_paths),
+        "geoip": bool(geoip2 and geoip_path and os.path.exists(geoip_path))
+    }
+    result = {"domain": domain, "ip_address": ip_address, "lists": lists}
+    try:
+        if lists["tranco"]:
+            result["tranco_rank"] = tranco_rank(domain, tranco_path)
+        if lists["blocklist"]:
+            result["blocklist_matches"] = blocklist_matches(domain, ip_address, blocklist_paths)
+            result["blocklisted"] = bool(result["blocklist_matches"])
+        if lists["geoip"] and ip_address:
+            result["country_code"] = geoip_country(ip_address, geoip_path)
+    except (OSError, ValueError) as e:
+        result["error"] = f"Local list lookup failed: {e}"
+    return result
+
+
+# Example usage
+if __name__ == "__main__":
+    print(json.dumps(lookup_local_lists("example.com"), indent=4))
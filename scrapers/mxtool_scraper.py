@@ -1,11 +1,67 @@
 import json
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.browser_profile import create_driver
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+# Everything read from the finished email health report
+MXTOOLBOX_FIELDS = {
+    "blacklist_errors": {"selector": "#blacklistNumFailed"},
+    "blacklist_warnings": {"selector": "#blacklistNumWarning"},
+    "blacklist_passed": {"selector": "#blacklistNumPassed"},
+    "problem_errors": {"selector": "#spanNumErrors"},
+    "problem_warnings": {"selector": "#spanNumWarnings"},
+    "problem_passed": {"selector": "#spanNumPassed"},
+    "problem_rows": {"selector": "table[class='table'] > tbody > tr", "all": True, "fields": {
+        "status": {"selector": ":scope > td:nth-child(1) > img", "attr": "alt"},
+        "category": {"selector": ":scope > td:nth-child(2)"},
+        "host": {"selector": ":scope > td:nth-child(3)"},
+        "result": {"selector": ":scope > td:nth-child(4)"}
+    }}
+}
+
+def build_mxtoolbox_result(extracted):
+    """
+    Shapes the extracted counters and problem table into the stored result.
+    """
+    result_data = {
+        "Blacklist": {
+            "Errors": extracted["blacklist_errors"],
+            "Warnings": extracted["blacklist_warnings"],
+            "Passed": extracted["blacklist_passed"]
+        },
+        "Problems": {
+            "Errors": extracted["problem_errors"],
+            "Warnings": extracted["problem_warnings"],
+            "Passed": extracted["problem_passed"]
+        }
+    }
+
+    table_data = []
+    for row in extracted["problem_rows"]:
+        if row["status"] is None or None in (row["category"], row["host"], row["result"]):
+            print(f"❌ Error extracting row data: incomplete row {row}")
+            continue
+        table_data.append({
+            "Status": row["status"],
+            "Category": row["category"],
+            "Host": row["host"],
+            "Result": row["result"]
+        })
+
+    result_data["Problem Table"] = table_data
+    return result_data
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived, completed report page (see utils/reparse.py).
+    """
+    return build_mxtoolbox_result(extract_fields_from_html(pages["main"], MXTOOLBOX_FIELDS))
 
 def scrape_mxtoolbox(domain_name):
     """
@@ -17,68 +73,30 @@ def scrape_mxtoolbox(domain_name):
     Returns:
         dict: A dictionary containing blacklist, problems, and issue details.
     """
-    # Configure Selenium WebDriver options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    # Initialize the WebDriver
-    driver = webdriver.Chrome(service=Service(), options=chrome_options)
+    # Shared profile: headless, blocks images/fonts/media and trackers
+    driver = create_driver("mxtoolbox")
     result_data = {}
 
     try:
         # Navigate to the MXToolbox email health page
-        url = f"https://mxtoolbox.com/emailhealth/{domain_name}/"
-        driver.get(url)
+        url = source_url("mxtoolbox", f"/emailhealth/{domain_name}/")
+        with phase("navigation"):
+            driver.get(url)
         print("🔍 Fetching email health information...")
 
         # Wait for the page to show "Complete"
-        WebDriverWait(driver, 900).until(
-            EC.text_to_be_present_in_element((By.ID, "spanTestsRemaining"), "Complete")
-        )
+        with phase("wait"):
+            WebDriverWait(driver, 900).until(
+                EC.text_to_be_present_in_element((By.ID, "spanTestsRemaining"), "Complete")
+            )
         print("✅ Test results are complete.")
 
-        # Extract Blacklist Results
-        blacklist_data = {
-            "Errors": driver.find_element(By.ID, "blacklistNumFailed").text,
-            "Warnings": driver.find_element(By.ID, "blacklistNumWarning").text,
-            "Passed": driver.find_element(By.ID, "blacklistNumPassed").text
-        }
-        result_data["Blacklist"] = blacklist_data
-
-        # Extract Problems Results
-        problems_data = {
-            "Errors": driver.find_element(By.ID, "spanNumErrors").text,
-            "Warnings": driver.find_element(By.ID, "spanNumWarnings").text,
-            "Passed": driver.find_element(By.ID, "spanNumPassed").text
-        }
-        result_data["Problems"] = problems_data
-        print("✅ Extracted blacklist and problems data.")
-
-        # Extract Problem Table Details
-        table_rows = driver.find_elements(By.XPATH, "//table[@class='table']/tbody/tr")
-        table_data = []
-
-        for row in table_rows:
-            try:
-                # Extract the issue category, host, result, and status image alt text
-                status_img = row.find_element(By.XPATH, "./td[1]/img").get_attribute("alt").strip()
-                category = row.find_element(By.XPATH, "./td[2]").text.strip()
-                host = row.find_element(By.XPATH, "./td[3]").text.strip()
-                result = row.find_element(By.XPATH, "./td[4]").text.strip()
-
-                table_data.append({
-                    "Status": status_img,
-                    "Category": category,
-                    "Host": host,
-                    "Result": result
-                })
-            except Exception as e:
-                print(f"❌ Error extracting row data: {e}")
-
-        result_data["Problem Table"] = table_data
-        print("✅ Extracted problem table details.")
+        # Extract counters and the problem table in one script call
+        with phase("extraction"):
+            snapshot_driver("scrape_mxtoolbox", domain_name, driver)
+            extracted = extract_fields(driver, MXTOOLBOX_FIELDS)
+        result_data = build_mxtoolbox_result(extracted)
+        print("✅ Extracted blacklist, problems and problem table details.")
 
         # Validate JSON format and return result
         json.dumps(result_data, indent=4)
@@ -1,88 +1,169 @@
+import codecs
 import json
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-def scrape_page_size(url_to_check):
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.source_urls import merchant_url
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+CHUNK_SIZE = 64 * 1024
+MAX_HTML_BYTES = 20 * 1024 * 1024      # Stop counting the homepage after 20 MB
+MAX_RESOURCE_BYTES = 5 * 1024 * 1024   # Per-subresource cap
+MAX_RESOURCES = 60
+
+
+class ResourceCollector(HTMLParser):
+    """
+    Collects subresource URLs (scripts, stylesheets, images, frames, media) while the HTML streams in.
     """
-    Scrapes the page size from EntireTools' Page Size Checker.
 
-    Args:
-        url_to_check (str): The website URL to check.
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.resources = {}  # url -> type
+
+    def _add(self, url, kind):
+        if url and not url.startswith(("data:", "javascript:", "#")):
+            self.resources.setdefault(urljoin(self.base_url, url), kind)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script":
+            self._add(attrs.get("src"), "script")
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower():
+            self._add(attrs.get("href"), "stylesheet")
+        elif tag == "link" and (attrs.get("rel") or "").lower() in ("icon", "preload"):
+            self._add(attrs.get("href"), "other")
+        elif tag == "img":
+            self._add(attrs.get("src"), "image")
+        elif tag in ("iframe", "frame"):
+            self._add(attrs.get("src"), "frame")
+        elif tag in ("video", "audio", "source", "embed"):
+            self._add(attrs.get("src"), "media")
+
+    handle_startendtag = handle_starttag
+
+
+def create_session(pool_size):
+    """
+    Creates a requests Session with a connection pool large enough for the resource workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def stream_body(response, max_bytes, on_chunk=None):
+    """
+    Reads a response body chunk by chunk without keeping it in memory.
 
     Returns:
-        dict: A dictionary containing Page URL, Page Size (Bytes), and Page Size (KB).
+        tuple: (decoded body bytes, bytes transferred on the wire, truncated flag)
+    """
+    body_bytes = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        body_bytes += len(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+        if body_bytes >= max_bytes:
+            truncated = True
+            break
+    # urllib3 counts the (possibly compressed) bytes read from the socket
+    wire_bytes = response.raw.tell() if hasattr(response.raw, "tell") else body_bytes
+    return body_bytes, wire_bytes or body_bytes, truncated
+
+
+def fetch_resource_size(session, url, timeout):
     """
-    # Configure Selenium WebDriver
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
+    Streams one subresource and returns its size, capped at MAX_RESOURCE_BYTES.
+    """
+    try:
+        with session.get(url, timeout=timeout, stream=True) as response:
+            body_bytes, wire_bytes, truncated = stream_body(response, MAX_RESOURCE_BYTES)
+            return {"ok": response.status_code < 400, "body_bytes": body_bytes,
+                    "wire_bytes": wire_bytes, "truncated": truncated}
+    except requests.exceptions.RequestException:
+        return {"ok": False, "body_bytes": 0, "wire_bytes": 0, "truncated": False}
 
-    driver = webdriver.Chrome(service=Service(), options=chrome_options)
-    result_data = {}
+
+def scrape_page_size(url_to_check, include_resources=False, max_resources=MAX_RESOURCES, max_workers=8, timeout=15):
+    """
+    Measures the page weight of a website by streaming its homepage and counting bytes.
+
+    Args:
+        url_to_check (str): The website URL or bare domain to check.
+        include_resources (bool): Also fetch referenced subresources (scripts, CSS, images...) concurrently.
+        max_resources (int): Maximum number of subresources to fetch.
+
+    Returns:
+        dict: Integer byte counts: `html_bytes`, `html_transfer_bytes`, `total_transfer_bytes`,
+        plus `resource_count` and per-type resource counts.
+    """
+    url = url_to_check if urlparse(url_to_check).scheme else merchant_url(url_to_check)
+    session = create_session(max_workers)
 
     try:
-        # Open the page
-        url = "https://entiretools.com/page-size-checker"
-        driver.get(url)
-        print("🔍 Opening Page Size Checker...")
-
-        # Fill in the URL input
-        url_input = driver.find_element(By.NAME, "url")
-        url_input.send_keys(url_to_check)
-
-        # Click the submit button
-        submit_button = driver.find_element(By.XPATH, "//input[@type='submit' and @value='Submit']")
-        submit_button.click()
-        print("🚀 Submitted URL, waiting for results...")
-
-        # Wait until the results table appears (up to 30 seconds)
-        try:
-            results_table = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, "/html/body/div[1]/div/div/div[3]/div/div[1]/table"))
-            )
-        except:
-            print("❌ Table not found. Check if the website structure has changed.")
-            return {"error": "Results table not found."}
-
-        print("✅ Results table found, extracting data...")
-
-        # Extract required values
-        table_rows = results_table.find_elements(By.TAG_NAME, "tr")
-
-        if len(table_rows) < 3:
-            print("❌ Unexpected table structure.")
-            return {"error": "Unexpected table structure."}
-
-        page_url = table_rows[0].find_elements(By.TAG_NAME, "td")[1].text.strip()
-        page_size_bytes = table_rows[1].find_elements(By.TAG_NAME, "td")[1].text.strip()
-        page_size_kb = table_rows[2].find_elements(By.TAG_NAME, "td")[1].text.strip()
+        with session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            final_url = response.url
+            collector = ResourceCollector(final_url)
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+
+            def feed(chunk):
+                collector.feed(decoder.decode(chunk))
+
+            html_bytes, html_wire_bytes, truncated = stream_body(response, MAX_HTML_BYTES, on_chunk=feed)
+            collector.close()
+
+        resources = collector.resources
+        resources_by_type = {}
+        for kind in resources.values():
+            resources_by_type[kind] = resources_by_type.get(kind, 0) + 1
 
         result_data = {
-            "Page URL": page_url,
-            "Page Size (Bytes)": page_size_bytes,
-            "Page Size (KB)": page_size_kb
+            "page_url": final_url,
+            "html_bytes": html_bytes,
+            "html_transfer_bytes": html_wire_bytes,
+            "html_truncated": truncated,
+            "resource_count": len(resources),
+            "resources_by_type": resources_by_type,
+            "total_transfer_bytes": html_wire_bytes
         }
 
-        # Validate JSON format
-        json.dumps(result_data, indent=4)
+        if include_resources and resources:
+            to_fetch = list(resources)[:max_resources]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                sizes = list(executor.map(lambda u: fetch_resource_size(session, u, timeout), to_fetch))
+            result_data["resources_fetched"] = sum(1 for s in sizes if s["ok"])
+            result_data["resources_failed"] = sum(1 for s in sizes if not s["ok"])
+            result_data["resource_bytes"] = sum(s["body_bytes"] for s in sizes)
+            result_data["total_transfer_bytes"] = html_wire_bytes + sum(s["wire_bytes"] for s in sizes)
+
         return result_data
 
     except Exception as e:
         print(f"❌ Error: {e}")
-        return {"error": f"Error scraping Page Size Checker: {e}"}
+        return {"error": f"Error measuring page size for {url}: {e}"}
 
     finally:
-        driver.quit()
+        session.close()
 
 
 # Example usage
 if __name__ == "__main__":
     test_url = "http://productindata.com"
-    scraped_data = scrape_page_size(test_url)
+    scraped_data = scrape_page_size(test_url, include_resources=True)
     print(json.dumps(scraped_data, indent=4))
@@ -1,12 +1,81 @@
 import json
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.browser_profile import create_driver
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+# (section, selector to wait for, timeout in seconds)
+SECTION_WAITS = [
+    ("firmographics", ".app-firmographics__list", 20),
+    ("rankings", ".app-summary-card.wa-summary__rankings", 15),
+    ("countries", ".wa-geography__legend", 15)
+]
+
+SIMILARWEB_FIELDS = {
+    "firmographics": {"selector": ".app-firmographics__list .app-firmographics__item", "all": True, "fields": {
+        "title": {"selector": ".app-firmographics__item-title"},
+        "value": {"selector": ".app-firmographics__item-value"}
+    }},
+    "rankings": {"selector": ".app-summary-card.wa-summary__rankings .wa-summary__rankings-item", "all": True, "fields": {
+        "title": {"selector": ".wa-summary__rankings-title"},
+        "value": {"selector": ".wa-summary__rankings-value"}
+    }},
+    "countries": {"selector": ".wa-geography__legend .wa-geography__legend-item", "all": True, "fields": {
+        "country": {"selector": ".wa-geography__country-name"},
+        "traffic": {"selector": ".wa-geography__country-traffic-value"}
+    }}
+}
+
+def build_similarweb_data(domain_name, extracted, sections):
+    """
+    Builds the result from the extracted sections; a section that never appeared is "NA".
+    """
+    # Initialize results dictionary
+    data = {'domain_name': domain_name}
+
+    # Extract Firmographics
+    if sections["firmographics"]:
+        for item in extracted["firmographics"]:
+            if item["title"] is not None and item["value"] is not None:
+                data[item["title"]] = item["value"]
+    else:
+        data['Firmographics'] = "NA"
+
+    # Extract Rankings
+    if sections["rankings"]:
+        for item in extracted["rankings"]:
+            if item["title"] is not None and item["value"] is not None:
+                data[item["title"]] = item["value"].replace("#", "").replace(",", "").strip()
+    else:
+        data['Rankings'] = "NA"
+
+    # Extract Top Countries by traffic share
+    if sections["countries"]:
+        data['Top Countries traffic percentage'] = {
+            item["country"]: item["traffic"].replace("%", "").strip()
+            for item in extracted["countries"]
+            if item["country"] is not None and item["traffic"] is not None
+        }
+    else:
+        data['Top Countries traffic percentage'] = "NA"
+
+    return data
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived page (see utils/reparse.py). A section counts as
+    loaded when its wait selector is present in the snapshot.
+    """
+    html = pages["main"]
+    presence = extract_fields_from_html(html, {name: {"selector": selector} for name, selector, _ in SECTION_WAITS})
+    sections = {name: presence[name] is not None for name, _, _ in SECTION_WAITS}
+    return build_similarweb_data(domain_name, extract_fields_from_html(html, SIMILARWEB_FIELDS), sections)
 
 def scrape_similarweb_data(domain_name):
     """
@@ -18,67 +87,35 @@ def scrape_similarweb_data(domain_name):
     Returns:
         dict: A dictionary containing extracted data from SimilarWeb.
     """
-    # Configure Selenium WebDriver options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    
-    # Initialize WebDriver
-    driver = webdriver.Chrome(service=Service(), options=chrome_options)
+    # Shared profile: 1920x1080 headless window, blocks images/fonts/media and trackers
+    # but keeps SimilarWeb's own scripts, which render the data
+    driver = create_driver("similarweb")
     
     try:
-        url = f"https://www.similarweb.com/website/{domain_name}/"
-        driver.get(url)
-        time.sleep(5)  # Allow extra time for the page to load
-
-        # Initialize results dictionary
-        data = {'domain_name': domain_name}
+        url = source_url("similarweb", f"/website/{domain_name}/")
+        with phase("navigation"):
+            driver.get(url)
+        with phase("sleep"):
+            time.sleep(5)  # Allow extra time for the page to load
 
-        # Extract Firmographics
-        try:
-            firmographics_section = WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".app-firmographics__list"))
-            )
-            firmographics_items = firmographics_section.find_elements(By.CSS_SELECTOR, ".app-firmographics__item")
-            for item in firmographics_items:
-                title = item.find_element(By.CSS_SELECTOR, ".app-firmographics__item-title").text.strip()
-                value = item.find_element(By.CSS_SELECTOR, ".app-firmographics__item-value").text.strip()
-                data[title] = value
-        except (TimeoutException, NoSuchElementException):
-            data['Firmographics'] = "NA"
-        
-        # Extract Rankings
-        try:
-            rankings_section = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".app-summary-card.wa-summary__rankings"))
-            )
-            rankings_items = rankings_section.find_elements(By.CSS_SELECTOR, ".wa-summary__rankings-item")
-            for item in rankings_items:
-                title = item.find_element(By.CSS_SELECTOR, ".wa-summary__rankings-title").text.strip()
-                value = item.find_element(By.CSS_SELECTOR, ".wa-summary__rankings-value").text.strip()
-                data[title] = value.replace("#", "").replace(",", "").strip()
-        except (NoSuchElementException, TimeoutException):
-            data['Rankings'] = "NA"
+        # Wait for each section; one that never appears is reported as "NA"
+        sections = {}
+        with phase("wait"):
+            for name, selector, timeout in SECTION_WAITS:
+                try:
+                    WebDriverWait(driver, timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                    )
+                    sections[name] = True
+                except (TimeoutException, NoSuchElementException):
+                    sections[name] = False
 
-        # Extract Top Countries by traffic share
-        try:
-            countries_section = WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".wa-geography__legend"))
-            )
-            country_items = countries_section.find_elements(By.CSS_SELECTOR, ".wa-geography__legend-item")
-            countries_data = {}
-            for item in country_items:
-                country_name = item.find_element(By.CSS_SELECTOR, ".wa-geography__country-name").text.strip()
-                traffic_value = item.find_element(By.CSS_SELECTOR, ".wa-geography__country-traffic-value").text.strip()
-                countries_data[country_name] = traffic_value.replace("%", "").strip()
-            data['Top Countries traffic percentage'] = countries_data
-        except (NoSuchElementException, TimeoutException):
-            data['Top Countries traffic percentage'] = "NA"
+        # Extract all sections in one script call
+        with phase("extraction"):
+            snapshot_driver("scrape_similarweb_data", domain_name, driver)
+            extracted = extract_fields(driver, SIMILARWEB_FIELDS)
 
-        return data
+        return build_similarweb_data(domain_name, extracted, sections)
     
     except Exception as e:
         return {"error": f"Error scraping SimilarWeb for {domain_name}: {e}"}
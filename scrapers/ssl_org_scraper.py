@@ -1,78 +1,82 @@
 import json
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import re
+from utils.dom_extract import extract_fields, extract_fields_from_html, table_rows_to_dict
+from utils.browser_profile import create_driver
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+# Every bordered table on the report page, as rows of cell texts
+SSL_ORG_FIELDS = {
+    "tables": {"selector": "table.table-bordered", "all": True, "fields": {
+        "rows": {"selector": "tr", "all": True, "fields": {
+            "cells": {"selector": ":scope > td", "all": True}
+        }}
+    }}
+}
 
 def scrape_ssl_org(domain_name):
     """
     Scrapes SSL.org's security report for a given domain using Selenium.
     Extracts both summary and detailed SSL certificate information.
     """
-    # Configure Selenium options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    # **Fixed WebDriver Initialization**
-    service = Service()  # Use installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    # Shared profile: headless, blocks images/fonts/media and trackers
+    driver = create_driver("ssl_org")
 
     try:
-        url = f"https://www.ssl.org/report/{domain_name}"
-        driver.get(url)
-
-        report_summary = {}
-        ssl_details = {}
+        url = source_url("ssl_org", f"/report/{domain_name}")
+        with phase("navigation"):
+            driver.get(url)
 
         try:
-            # Extract Report Summary (First Table)
-            report_table = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//table[contains(@class, 'table-bordered')][1]"))
-            )
-            rows = report_table.find_elements(By.TAG_NAME, "tr")
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if len(cols) == 2:
-                    key = to_snake_case(cols[0].text.strip().replace(":", ""))
-                    value = cols[1].text.strip() or "n/a"
-                    report_summary[key] = value
+            # Wait for the Report Summary (first) and SSL Certificate Details (second) tables
+            with phase("wait"):
+                WebDriverWait(driver, 10).until(
+                    lambda d: len(d.find_elements(By.CSS_SELECTOR, "table.table-bordered")) >= 2
+                )
 
-            # Extract SSL Certificate Details (Second Table)
-            ssl_table = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//table[contains(@class, 'table-bordered')][2]"))
-            )
-            rows = ssl_table.find_elements(By.TAG_NAME, "tr")
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if len(cols) == 2:
-                    key = to_snake_case(cols[0].text.strip().replace(":", ""))
-                    value = cols[1].text.strip() or "n/a"
-                    ssl_details[key] = value
+            # Extract both tables in one script call
+            with phase("extraction"):
+                snapshot_driver("scrape_ssl_org", domain_name, driver)
+                tables = extract_fields(driver, SSL_ORG_FIELDS)["tables"]
+            return build_ssl_org_result(domain_name, tables)
 
         except Exception as e:
             return {"error": f"error_extracting_data: {str(e)}"}
 
-        # Construct final result
-        result_data = {
-            "domain": domain_name,
-            "report_summary": report_summary,
-            "ssl_certificate_details": ssl_details
-        }
-
-        return result_data
-
     except Exception as e:
         return {"error": f"error_scraping_{domain_name}", "details": str(e)}
     
     finally:
         driver.quit()
 
+def build_ssl_org_result(domain_name, tables):
+    """
+    Report Summary (first table) and SSL Certificate Details (second table) as snake_case dicts.
+    """
+    snake_key = lambda text: to_snake_case(text.replace(":", ""))
+    report_summary = {k: v or "n/a" for k, v in table_rows_to_dict(tables[0]["rows"], snake_key).items()}
+    ssl_details = {k: v or "n/a" for k, v in table_rows_to_dict(tables[1]["rows"], snake_key).items()}
+
+    # Construct final result
+    return {
+        "domain": domain_name,
+        "report_summary": report_summary,
+        "ssl_certificate_details": ssl_details
+    }
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived report page (see utils/reparse.py).
+    """
+    tables = extract_fields_from_html(pages["main"], SSL_ORG_FIELDS)["tables"]
+    if len(tables) < 2:
+        return {"error": f"error_extracting_data: expected 2 report tables, found {len(tables)}"}
+    return build_ssl_org_result(domain_name, tables)
+
 def to_snake_case(text):
     """
     Converts a given string to snake_case.
@@ -4,8 +4,35 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from utils.admission import track_driver
+from utils.dom_extract import extract_fields, extract_fields_from_html
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
 import time
 
+# Result paragraphs look like "<p><strong>Status:</strong> Clean</p>"
+SSLTRUST_FIELDS = {
+    "paragraphs": {"selector": "p", "all": True}
+}
+
+def build_ssltrust_results(extracted):
+    """
+    Picks the "Status:" and "Results:" paragraphs out of the extracted ones.
+    """
+    results = {"Status": "Unknown", "Results": "Unknown"}
+    for text in (extracted or {}).get("paragraphs", []):
+        for key in ("Status", "Results"):
+            if (text or "").startswith(f"{key}:") and results[key] == "Unknown":
+                results[key] = text.replace(f"{key}:", "", 1).strip()
+    return results
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived results page (see utils/reparse.py).
+    """
+    return build_ssltrust_results(extract_fields_from_html(pages["main"], SSLTRUST_FIELDS))
+
 def scrape_ssltrust_blacklist(domain_name):
     chrome_options = Options()
     chrome_options.add_argument("--headless")
@@ -17,10 +44,12 @@ def scrape_ssltrust_blacklist(domain_name):
     
     # Initialize WebDriver without ChromeDriverManager
     service = Service()  # Use the system-installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=service, options=chrome_options))
 
     try:
-        driver.get("https://www.ssltrust.com/ssl-tools/website-security-check")
+        with phase("navigation"):
+            driver.get(source_url("ssltrust", "/ssl-tools/website-security-check"))
         
         # Wait for the input field and enter the domain
         input_field = WebDriverWait(driver, 15).until(
@@ -36,25 +65,20 @@ def scrape_ssltrust_blacklist(domain_name):
         submit_button.click()
 
         # Wait for results to load completely
-        time.sleep(15)  # Additional wait time to ensure processing completes
-        WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.XPATH, "//p/strong[contains(text(),'Status:')]/.."))
-        )
+        with phase("sleep"):
+            time.sleep(15)  # Additional wait time to ensure processing completes
+        with phase("wait"):
+            WebDriverWait(driver, 60).until(
+                EC.presence_of_element_located((By.XPATH, "//p/strong[contains(text(),'Status:')]/.."))
+            )
 
         # Extract results
-        results = {"Status": "Unknown", "Results": "Unknown"}
-        
         try:
-            status_element = driver.find_element(By.XPATH, "//p/strong[contains(text(),'Status:')]/..")
-            results["Status"] = status_element.text.replace("Status:", "").strip()
-
-            results_element = driver.find_element(By.XPATH, "//p/strong[contains(text(),'Results:')]/..")
-            results["Results"] = results_element.text.replace("Results:", "").strip()
-
+            with phase("extraction"):
+                snapshot_driver("scrape_ssltrust_blacklist", domain_name, driver)
+                return build_ssltrust_results(extract_fields(driver, SSLTRUST_FIELDS))
         except Exception as e:
-            results["error"] = f"Failed to extract results: {e}"
-
-        return results
+            return {"Status": "Unknown", "Results": "Unknown", "error": f"Failed to extract results: {e}"}
 
     except Exception as e:
         return {"error": f"Error scraping {domain_name}: {e}"}
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import socket
+import ssl
+from datetime import datetime
+
+
+def _name(parts):
+    """
+    Flattens a certificate subject/issuer (tuples of (key, value) pairs) into a dict.
+    """
+    return {key: value for rdn in parts or () for key, value in rdn}
+
+
+def _handshake(domain, port, timeout, verify):
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    with socket.create_connection((domain, port), timeout=timeout) as sock:
+        with context.wrap_socket(sock, server_hostname=domain) as ssock:
+            return ssock.getpeercert(binary_form=True), ssock.getpeercert(), ssock.version()
+
+
+def _port_open(domain, port, timeout):
+    try:
+        with socket.create_connection((domain, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def probe_tls(domain, port=443, timeout=2.0, http_port=80):
+    """
+    Inspects a site's TLS certificate with a single handshake (no browser).
+
+    A certificate that fails verification is fetched again without verification, so the
+    fingerprint is still recorded alongside the reason it is not trusted.
+
+    A site without HTTPS is a finding, not a failure: when the TLS port refuses, times out or
+    doesn't speak TLS but the host answers on `http_port`, the result is `has_https: False`
+    (with the reason in `tls_error`). Only DNS failures and hosts that answer on neither port
+    are reported as errors.
+
+    Returns:
+        dict: `has_https`, `certificate_valid`, `sha256_fingerprint`, `has_sha256`, and for
+        trusted certificates the issuer, expiry and days left.
+    """
+    result = {"domain": domain, "has_https": False, "certificate_valid": False, "has_sha256": False}
+    try:
+        der, cert, version = _handshake(domain, port, timeout, verify=True)
+        result["certificate_valid"] = True
+    except ssl.SSLCertVerificationError as e:
+        result["verification_error"] = e.verify_message or str(e)
+        try:
+            der, cert, version = _handshake(domain, port, timeout, verify=False)
+        except (OSError, ssl.SSLError) as e:
+            return {**result, "error": f"TLS handshake failed: {e}"}
+    except socket.gaierror as e:
+        return {**result, "error": f"DNS lookup failed: {e}"}
+    except ssl.SSLError as e:
+        return {**result, "tls_error": f"No TLS on port {port}: {e}"}  # e.g. plain HTTP served on 443
+    except OSError as e:
+        if _port_open(domain, http_port, timeout):
+            return {**result, "tls_error": f"TLS port {port} unavailable: {e}"}
+        return {**result, "error": f"TLS handshake failed: {e}"}
+
+    result.update({
+        "has_https": True,
+        "sha256_fingerprint": hashlib.sha256(der).hexdigest(),
+        "has_sha256": True,
+        "tls_version": version
+    })
+    if cert:  # Only populated for verified certificates
+        not_after = datetime.utcfromtimestamp(ssl.cert_time_to_seconds(cert["notAfter"]))
+        result.update({
+            "issuer": _name(cert.get("issuer")).get("organizationName"),
+            "subject": _name(cert.get("subject")).get("commonName"),
+            "not_after": not_after.strftime("%Y-%m-%d %H:%M:%S"),
+            "days_to_expiry": (not_after - datetime.utcnow()).days
+        })
+    return result
+
+
+# Example usage
+if __name__ == "__main__":
+    print(json.dumps(probe_tls("example.com"), indent=4))
@@ -6,6 +6,28 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from utils.admission import track_driver
+from utils.dom_extract import extract_fields_from_html
+from utils.metrics import phase
+from utils.snapshots import snapshot_driver
+from utils.source_urls import source_url
+
+
+def build_tranco_result(domain_name, rank):
+    return {
+        "domain": domain_name,
+        "Tranco Rank": rank
+    }
+
+
+def parse_snapshot(pages, domain_name, meta=None):
+    """
+    Re-runs extraction on an archived query page (see utils/reparse.py).
+    """
+    extracted = extract_fields_from_html(pages["main"], {"domain": {"selector": "#domain"}, "rank": {"selector": "#rank"}})
+    if extracted["domain"] != domain_name:
+        return {"error": f"Snapshot of the Tranco query page does not show a result for {domain_name}"}
+    return build_tranco_result(domain_name, extracted["rank"] or "")
 
 
 def scrape_tranco_list(domain_name):
@@ -25,18 +47,21 @@ def scrape_tranco_list(domain_name):
     chrome_options.add_argument("--disable-dev-shm-usage")
 
     # Initialize the WebDriver
-    driver = webdriver.Chrome(service=Service(), options=chrome_options)
+    with phase("browser_start"):
+        driver = track_driver(webdriver.Chrome(service=Service(), options=chrome_options))
 
     try:
         # Debug: Step 1 - Navigate to the Tranco List website
-        url = "https://tranco-list.eu/query"
-        driver.get(url)
+        url = source_url("tranco", "/query")
+        with phase("navigation"):
+            driver.get(url)
        # print("🔍 Step 1: Opened Tranco List website.")
 
         # Debug: Step 2 - Wait for the input box to appear
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "domainInput"))
-        )
+        with phase("wait"):
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.ID, "domainInput"))
+            )
        # print("✅ Step 2: Domain input field found.")
 
         # Debug: Step 3 - Enter the domain in the input field
@@ -51,19 +76,19 @@ def scrape_tranco_list(domain_name):
        # print("✅ Step 4: Clicked the 'Get Rank' button.")
 
         # Debug: Step 5 - Wait until the domain value updates, indicating a response
-        WebDriverWait(driver, 15).until(
-            lambda driver: driver.find_element(By.ID, "domain").text.strip() == domain_name
-        )
+        with phase("wait"):
+            WebDriverWait(driver, 15).until(
+                lambda driver: driver.find_element(By.ID, "domain").text.strip() == domain_name
+            )
        # print("✅ Step 5: Domain name response confirmed.")
 
         # Debug: Step 6 - Extract the rank result if available
-        rank = driver.find_element(By.ID, "rank").text
+        with phase("extraction"):
+            snapshot_driver("scrape_tranco_list", domain_name, driver)
+            rank = driver.find_element(By.ID, "rank").text
        # print(f"✅ Step 6: Extracted rank '{rank}'.")
 
-        result_data = {
-            "domain": domain_name,
-            "Tranco Rank": rank
-        }
+        result_data = build_tranco_result(domain_name, rank)
 
         # Debug: Step 7 - Validate and return JSON format
         json.dumps(result_data, indent=4)  # Ensure it converts to valid JSON
@@ -1,39 +1,34 @@
 import re
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from utils.browser_profile import create_driver
+from utils.metrics import phase
+from utils.snapshots import save_snapshot
+from utils.source_urls import source_url
 
 def scrape_urlvoid(domain):
     """
     Uses Selenium to interact with URLVoid, enter the domain, submit the form,
     wait for results, and extract relevant details in snake_case format.
     """
-    url = "https://www.urlvoid.com/"  # Base URLVoid homepage
+    url = source_url("urlvoid", "/")  # Base URLVoid homepage
 
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode
-    options.add_argument("--ignore-certificate-errors")  # Ignore SSL warnings
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")  # Improve performance in containers
+    # Shared profile: headless, ignores SSL warnings, blocks images/fonts/media and trackers
+    driver = create_driver("urlvoid")
 
-    # Initialize WebDriver without ChromeDriverManager
-    service = Service()  # Use an already installed ChromeDriver
-    driver = webdriver.Chrome(service=service, options=options)
-
-    driver.get(url)
+    with phase("navigation"):
+        driver.get(url)
 
     try:
         # Wait for the input field to load
-        input_field = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "hf-domain"))
-        )
+        with phase("wait"):
+            input_field = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.ID, "hf-domain"))
+            )
         input_field.clear()
         input_field.send_keys(domain)
 
@@ -42,39 +37,14 @@ def scrape_urlvoid(domain):
         submit_button.click()
 
         # Wait for results to load (approx. 15 seconds)
-        time.sleep(15)  # Adjust based on network speed
+        with phase("sleep"):
+            time.sleep(15)  # Adjust based on network speed
 
         # Extract updated page source after the scan completes
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-
-        # Extract relevant information
-        raw_data = {
-            "website_address": "unknown",
-            "last_analysis": "unknown",
-            "detections_counts": "unknown",
-            "domain_registration": "unknown",
-            "ip_address": "unknown",
-            "reverse_dns": "unknown",
-            "asn": "unknown",
-            "server_location": "unknown",
-            "latitude_longitude": "unknown",
-            "city": "unknown",
-            "region": "unknown"
-        }
-
-        # Locate result table
-        table = soup.find("table", class_="table-custom")
-        if table:
-            rows = table.find_all("tr")
-            for row in rows:
-                cells = row.find_all("td")
-                if len(cells) == 2:
-                    key = cells[0].text.strip().lower().replace(" ", "_")  # Convert to snake_case
-                    value = cells[1].text.strip()
-                    if key in raw_data:
-                        raw_data[key] = value
-
-        return format_urlvoid_data(raw_data)
+        with phase("extraction"):
+            html = driver.page_source
+            save_snapshot("scrape_urlvoid", domain, html, url=driver.current_url)
+            return parse_urlvoid(html)
 
     except Exception as e:
         return {"error": f"failed_to_scrape_urlvoid: {str(e)}"}
@@ -82,6 +52,47 @@ def scrape_urlvoid(domain):
     finally:
         driver.quit()  # Ensure WebDriver is properly closed
 
+def parse_urlvoid(html):
+    """
+    Extracts the report fields from a URLVoid results page.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Extract relevant information
+    raw_data = {
+        "website_address": "unknown",
+        "last_analysis": "unknown",
+        "detections_counts": "unknown",
+        "domain_registration": "unknown",
+        "ip_address": "unknown",
+        "reverse_dns": "unknown",
+        "asn": "unknown",
+        "server_location": "unknown",
+        "latitude_longitude": "unknown",
+        "city": "unknown",
+        "region": "unknown"
+    }
+
+    # Locate result table
+    table = soup.find("table", class_="table-custom")
+    if table:
+        rows = table.find_all("tr")
+        for row in rows:
+            cells = row.find_all("td")
+            if len(cells) == 2:
+                key = cells[0].text.strip().lower().replace(" ", "_")  # Convert to snake_case
+                value = cells[1].text.strip()
+                if key in raw_data:
+                    raw_data[key] = value
+
+    return format_urlvoid_data(raw_data)
+
+def parse_snapshot(pages, domain, meta=None):
+    """
+    Re-runs extraction on an archived results page (see utils/reparse.py).
+    """
+    return parse_urlvoid(pages["main"])
+
 def format_urlvoid_data(data):
     """
     Post-processes raw URLVoid data for better readability while ensuring snake_case formatting.
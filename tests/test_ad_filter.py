@@ -0,0 +1,48 @@
+from utils.ad_filter import compile_filter_list, detect_ads
+
+RULES = """
+||ads.example^$domain=news.test|~sport.news.test
+||tracker.example^
+/promo-banner.$domain=shop.test
+/promo-banner.$domain=~shop.test
+@@||cdn.tracker.example^$domain=shop.test
+##[data-ad-slot]
+##div[id^="div-gpt-ad"]
+##iframe[src*="doubleclick.net"]
+"""
+
+PAGE = """
+<div data-ad-slot="1"></div>
+<div id="div-gpt-ad-top"></div><span id="div-gpt-ad-side"></span>
+<iframe src="https://ad.doubleclick.net/x"></iframe><iframe src="https://example.org/x"></iframe>
+<script src="https://ads.example/a.js"></script>
+<script src="https://cdn.tracker.example/t.js"></script>
+<img src="/img/promo-banner.png">
+"""
+
+
+def test_attribute_selectors():
+    matches = detect_ads(PAGE, "https://other.test/", compiled=compile_filter_list(RULES))["element_rule_matches"]
+    assert matches == {"##[data-ad-slot]": 1, '##div[id^="div-gpt-ad"]': 1, '##iframe[src*="doubleclick.net"]': 1}
+
+
+def test_domain_option_limits_network_rules():
+    compiled = compile_filter_list(RULES)
+    news = detect_ads(PAGE, "https://www.news.test/", compiled=compiled)["network_rule_matches"]
+    assert "||ads.example^$domain=news.test|~sport.news.test" in news
+    assert news["/promo-banner.$domain=~shop.test"] == 1
+    sport = detect_ads(PAGE, "https://sport.news.test/", compiled=compiled)["network_rule_matches"]
+    assert not any(rule.startswith("||ads.example") for rule in sport)
+    shop = detect_ads(PAGE, "https://shop.test/", compiled=compiled)["network_rule_matches"]
+    assert shop == {"/promo-banner.$domain=shop.test": 1}
+    other = detect_ads(PAGE, "https://other.test/", compiled=compiled)["network_rule_matches"]
+    assert other == {"||tracker.example^": 1, "/promo-banner.$domain=~shop.test": 1}
+
+
+def test_selector_exceptions_are_scoped_to_their_host():
+    compiled = compile_filter_list("##.ad-box\nebay.com#@#.ad-box\nshop.test##.promo\n#@#.promo-off\n##.promo-off")
+    page = '<div class="ad-box"></div><div class="promo"></div><div class="promo-off"></div>'
+    assert detect_ads(page, "https://shop.test/", compiled=compiled)["element_rule_matches"] == {
+        "##.ad-box": 1, "shop.test##.promo": 1}
+    assert detect_ads(page, "https://www.ebay.com/", compiled=compiled)["element_rule_matches"] == {}
+    assert detect_ads(page, "https://other.test/", compiled=compiled)["element_rule_matches"] == {"##.ad-box": 1}
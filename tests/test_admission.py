@@ -0,0 +1,64 @@
+import threading
+
+from utils import admission
+from utils.admission import MB, AdmissionController
+
+
+class FakePage:
+    def __init__(self, pid, heap):
+        self.browser_pid = pid
+        self.heap = heap
+        self.closed = threading.Event()
+
+    def heap_usage(self):
+        return self.heap
+
+    def quit(self):
+        self.closed.set()
+
+
+def _controller(monkeypatch, rss_by_pid):
+    killed = []
+    monkeypatch.setattr(admission, "process_tree_rss", lambda pid=None, children=None: rss_by_pid.get(pid, 0))
+    monkeypatch.setattr(admission, "process_tree_pids", lambda pid, children=None: [])
+    monkeypatch.setattr(admission, "_children_map", lambda: {})
+    monkeypatch.setattr(admission, "kill_process_tree", killed.append)
+    return AdmissionController(memory_budget_mb=100000, session_cap_mb=100), killed
+
+
+def _session(controller, name, *drivers):
+    session = {"id": len(controller.sessions) + 1, "name": name, "cost": 50 * MB, "pids": {d.browser_pid for d in drivers},
+               "drivers": list(drivers), "peak": 0, "killed": False, "cancelled": False, "started": 0}
+    controller.sessions[session["id"]] = session
+    return session
+
+
+def test_breach_in_shared_browser_closes_only_the_heaviest_context(monkeypatch):
+    controller, killed = _controller(monkeypatch, {4242: 350 * MB})
+    light, heavy = FakePage(4242, 10 * MB), FakePage(4242, 200 * MB)
+    first, second = _session(controller, "scrape_urlvoid", light), _session(controller, "scrape_similarweb_data", heavy)
+    controller._check()
+    assert killed == []
+    assert heavy.closed.wait(1) and not light.closed.is_set()
+    assert second["killed"] and not first["killed"]
+    controller._check()  # The closed context's memory is still being freed
+    assert not first["killed"]
+
+
+def test_breach_of_a_dedicated_browser_kills_its_process(monkeypatch):
+    controller, killed = _controller(monkeypatch, {4242: 150 * MB})
+    session = _session(controller, "scrape_urlvoid", FakePage(4242, 10 * MB))
+    controller._check()
+    assert killed == [4242] and session["killed"]
+
+
+def test_draining_entry_is_dropped_with_its_browser(monkeypatch):
+    controller, _ = _controller(monkeypatch, {4242: 350 * MB})
+    _session(controller, "scrape_urlvoid", FakePage(4242, 10 * MB))
+    heavy = _session(controller, "scrape_similarweb_data", FakePage(4242, 200 * MB))
+    controller._check()
+    assert 4242 in controller.draining
+    controller.sessions.clear()
+    controller.sessions[heavy["id"]] = {**heavy, "pids": {5151}, "killed": False}  # Keeps the watchdog busy
+    controller._check()
+    assert controller.draining == {}
@@ -0,0 +1,59 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from utils.api_service import create_server
+from utils.job_queue import SQLiteJobQueue
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setenv("RISK_DATA_DIR", str(tmp_path / "data"))
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    server, _ = create_server(port=0, workers=0, queue=queue)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        payload = json.loads(response.read() or b"null")
+        connection.close()
+        return response.status, payload
+
+    yield request
+    server.shutdown()
+    server.server_close()
+    queue.close()
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"example.com"', b"null", b"not json",
+                                  b'{"domain": "example.com", "profile": ["fast"]}',
+                                  b'{"domain": "example.com", "priority": {"a": 1}}',
+                                  b'{"domain": "example.com", "only": "tls_probe"}',
+                                  b'{"domain": "example.com", "skip": [1]}'])
+def test_bad_job_bodies_are_rejected(api, body):
+    status, payload = api("POST", "/jobs", body)
+    assert status == 400 and payload["error"]
+
+
+@pytest.mark.parametrize("path, headers", [("/jobs?limit=abc", None), ("/jobs?limit=-1", None),
+                                           ("/related/example.com?limit=x", None),
+                                           ("/jobs/{job}/events?after=abc", None),
+                                           ("/jobs/{job}/stream?after=1.5", None),
+                                           ("/jobs/{job}/stream", {"Last-Event-ID": "abc"})])
+def test_bad_numbers_are_rejected(api, path, headers):
+    _, created = api("POST", "/jobs", b'{"domain": "example.com"}')
+    status, payload = api("GET", path.format(job=created["jobs"][0]["id"]), headers=headers)
+    assert status == 400 and payload["error"]
+
+
+def test_valid_requests_still_work(api):
+    status, created = api("POST", "/jobs", b'{"domains": ["example.com"], "profile": "fast", "only": ["tls_probe"]}')
+    assert status == 202
+    job_id = created["jobs"][0]["id"]
+    assert api("GET", "/jobs?limit=5")[0] == 200
+    status, events = api("GET", f"/jobs/{job_id}/events?after=0")
+    assert status == 200 and events["events"][0]["kind"] == "queued"
@@ -0,0 +1,18 @@
+from utils.browser_profile import blocked_url_patterns, get_profile, should_block
+
+
+def test_extension_patterns_do_not_match_hosts_or_paths():
+    profile = get_profile("urlvoid")
+    assert should_block(profile, "https://cdn.example/logo.png")
+    assert should_block(profile, "https://cdn.example/logo.gif?v=3")
+    assert not should_block(profile, "https://gifts.example.gift/")
+    assert not should_block(profile, "https://www.example/movies/index.html")
+    assert not should_block(profile, "https://example.icon.test/app.js")
+
+
+def test_allow_patterns_win_over_block_rules():
+    profile = get_profile("similarweb")
+    assert not should_block(profile, "https://www.similarweb.com/images/chart.png")
+    assert should_block(profile, "https://other.example/chart.png")
+    assert blocked_url_patterns(profile) == []
+    assert "*.png" in blocked_url_patterns(get_profile("urlvoid"))
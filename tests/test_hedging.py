@@ -0,0 +1,74 @@
+import threading
+import time
+
+from utils.concurrency import get_concurrency_controller
+from utils.hedging import HEDGED_SOURCES, Hedger, hedged_sources
+
+
+def test_hedging_is_opt_in(monkeypatch):
+    monkeypatch.delenv("RISK_HEDGE_SOURCES", raising=False)
+    assert hedged_sources() == set()
+    monkeypatch.setenv("RISK_HEDGE_SOURCES", "scrape_ssl_org, scrape_google_safe_browsing")
+    assert hedged_sources() == {"scrape_ssl_org", "scrape_google_safe_browsing"}
+
+
+def test_losing_primary_counts_with_a_lower_bound_latency(monkeypatch):
+    monkeypatch.setitem(HEDGED_SOURCES, "test_slow", {"percentile": 90, "initial_delay": 0.05, "min_delay": 0.01})
+    monkeypatch.setenv("RISK_HEDGE_SOURCES", "test_slow")
+    hedger = Hedger(budget_ratio=1.0)
+    calls = []
+
+    def lookup():
+        calls.append(None)
+        time.sleep(1.0 if len(calls) == 1 else 0.01)  # The primary hangs, the hedge is quick
+        return {"ok": True}
+
+    assert hedger.run("test_slow", lookup) == {"ok": True}
+    assert hedger.snapshot()["sources"]["test_slow"]["hedge_won"] == 1
+    # Recorded from the primary's start, not the winning hedge's short run
+    assert hedger.tracker("test_slow").samples[0] >= 0.05
+
+
+def test_hedge_waits_for_a_source_slot(monkeypatch):
+    monkeypatch.setitem(HEDGED_SOURCES, "test_limited", {"percentile": 90, "initial_delay": 0.05, "min_delay": 0.01})
+    monkeypatch.setenv("RISK_HEDGE_SOURCES", "test_limited")
+    limiter = get_concurrency_controller().limiter("test_limited")
+    limiter.limit = limiter.max_limit = limiter.min_limit = 1
+    hedger = Hedger(budget_ratio=1.0)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def lookup():
+        with lock:
+            running.append(None)
+            peak.append(len(running))
+        time.sleep(0.2)
+        with lock:
+            running.pop()
+        return {"ok": True}
+
+    with get_concurrency_controller().slot("test_limited"):  # The pipeline holds the primary's slot
+        hedger.run("test_limited", lookup)
+    time.sleep(0.3)  # The cancelled hedge gets the slot once the primary is done, then stops
+    assert max(peak) == 1
+
+
+def test_losing_primary_keeps_a_slot_until_it_stops(monkeypatch):
+    monkeypatch.setitem(HEDGED_SOURCES, "test_handover", {"percentile": 90, "initial_delay": 0.05, "min_delay": 0.01})
+    monkeypatch.setenv("RISK_HEDGE_SOURCES", "test_handover")
+    limiter = get_concurrency_controller().limiter("test_handover")
+    limiter.limit = limiter.max_limit = 2
+    hedger = Hedger(budget_ratio=1.0)
+    calls = []
+
+    def lookup():
+        calls.append(None)
+        time.sleep(0.5 if len(calls) == 1 else 0.01)  # A plain HTTP lookup: cancelling can't stop the primary
+        return {"ok": True}
+
+    with get_concurrency_controller().slot("test_handover"):
+        hedger.run("test_handover", lookup)
+    assert limiter.inflight == 1  # The primary is still running, under the hedge's slot
+    time.sleep(0.6)
+    assert limiter.inflight == 0
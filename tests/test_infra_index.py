@@ -0,0 +1,47 @@
+from utils.infra_index import DEFAULT_INFRA_INDEX_DB, InfraIndex, infra_index_path, shared_index_warning
+
+
+def _record(ip=None, fingerprint=None, source="ssl_sha_256_fingerprint"):
+    record = {"local_lists": {"ip_address": ip}}
+    if fingerprint:
+        record[source] = {"sha256_fingerprint": fingerprint, "has_sha256": True}
+    return record
+
+
+def test_count_stops_at_cap(tmp_path):
+    index = InfraIndex(str(tmp_path / "infra.sqlite3"))
+    for n in range(10):
+        index.update(f"shop{n}.example", _record(ip="203.0.113.24"))
+    assert index.count("ip", "203.0.113.24") == 10
+    assert index.count("ip", "203.0.113.24", cap=4) == 4
+    assert index.count("ip", "203.0.113.24", exclude="shop0.example", cap=20) == 9
+
+
+def test_common_values_are_capped_in_related(tmp_path, monkeypatch):
+    monkeypatch.setenv("RISK_INFRA_MAX_SHARED", "3")
+    index = InfraIndex(str(tmp_path / "infra.sqlite3"))
+    for n in range(10):
+        index.update(f"shop{n}.example", _record(ip="203.0.113.24"))
+    related = index.related("shop0.example")
+    assert related["values"] == [{"kind": "ip", "value": "203.0.113.24", "merchants": 4, "common": True}]
+    assert related["merchants"] == []
+
+
+def test_fast_tier_certificate_is_indexed(tmp_path):
+    index = InfraIndex(str(tmp_path / "infra.sqlite3"))
+    index.update("deep.example", _record(fingerprint="AB" * 32))
+    index.update("fast.example", _record(fingerprint="ab" * 32, source="tls_probe"))
+    related = index.related("fast.example")
+    assert [entry["domain"] for entry in related["merchants"]] == ["deep.example"]
+    assert related["merchants"][0]["shared"] == ["certificate"]
+
+
+def test_index_stays_local_when_records_are_shared(tmp_path, monkeypatch):
+    monkeypatch.delenv("RISK_INFRA_INDEX_DB", raising=False)
+    monkeypatch.delenv("RISK_QUEUE_URL", raising=False)
+    monkeypatch.setenv("RISK_DATA_DIR", str(tmp_path / "shared"))
+    assert infra_index_path() == DEFAULT_INFRA_INDEX_DB
+    assert shared_index_warning(infra_index_path()) is None
+    assert "host-local" in shared_index_warning(str(tmp_path / "shared" / "infra.sqlite3"))
+    monkeypatch.setenv("RISK_QUEUE_URL", "redis://queue:6379/0")
+    assert "rebuild" in shared_index_warning(infra_index_path())
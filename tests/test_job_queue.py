@@ -0,0 +1,93 @@
+# Lease behaviour every queue backend must share: expiry, requeue, max attempts, release.
+import time
+
+import pytest
+
+from utils import worker as worker_module
+from utils.job_queue import SQLiteJobQueue
+from utils.worker import AssessmentWorkers
+
+LEASE = 0.1
+
+
+@pytest.fixture(params=["sqlite", "file", "redis"])
+def queue(request, tmp_path, monkeypatch):
+    if request.param == "sqlite":
+        backend = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    elif request.param == "file":
+        from utils.file_queue import FileJobQueue
+        backend = FileJobQueue(str(tmp_path / "queue"))
+    else:
+        pytest.importorskip("redis")
+        fakeredis = pytest.importorskip("fakeredis")
+        import redis
+        from utils.redis_queue import RedisJobQueue
+        monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(**kwargs))
+        backend = RedisJobQueue("redis://fake", prefix=f"test-{tmp_path.name}")
+    yield backend
+    backend.close()
+
+
+def _expire():
+    time.sleep(LEASE * 2)
+
+
+def test_expired_lease_is_requeued(queue):
+    job = queue.enqueue(["example.com"], "fast")[0]
+    assert queue.claim("w1", LEASE)["id"] == job["id"]
+    assert queue.claim("w2", LEASE) is None
+    _expire()
+    reclaimed = queue.claim("w2", 30)
+    assert reclaimed["id"] == job["id"] and reclaimed["attempts"] == 2
+    assert not queue.heartbeat(job["id"], "w1")
+    assert not queue.finish(job["id"], {"risk_score": 1}, worker="w1")
+    assert queue.finish(job["id"], {"risk_score": 2}, worker="w2")
+    assert queue.get(job["id"])["result"] == {"risk_score": 2}
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    job = queue.enqueue(["example.com"], "fast")[0]
+    queue.claim("w1", LEASE)
+    assert queue.heartbeat(job["id"], "w1", 30)
+    _expire()
+    assert queue.claim("w2", LEASE) is None
+
+
+def test_job_fails_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setenv("RISK_JOB_MAX_ATTEMPTS", "2")
+    job = queue.enqueue(["example.com"], "fast")[0]
+    for worker in ("w1", "w2"):
+        assert queue.claim(worker, LEASE)["id"] == job["id"]
+        _expire()
+    assert queue.claim("w3", LEASE) is None
+    failed = queue.get(job["id"])
+    assert failed["status"] == "failed" and "lease expired" in failed["error"]
+
+
+def test_release_gives_the_attempt_back(queue):
+    job = queue.enqueue(["example.com"], "fast")[0]
+    queue.claim("w1", 30)
+    assert not queue.release(job["id"], "w2")
+    assert queue.release(job["id"], "w1")
+    assert not queue.release(job["id"], "w1")
+    released = queue.get(job["id"])
+    assert released["status"] == "queued" and released["attempts"] == 0
+    assert queue.claim("w2", 30)["attempts"] == 1
+
+
+def test_worker_discards_results_after_losing_the_lease(queue, monkeypatch):
+    saves = []
+
+    def assess_domain(domain, keys, reuse_fresh, profile, progress=None, before_save=None):
+        _expire()
+        queue.claim("w2", 30)  # Another worker takes the job over meanwhile
+        saves.append(before_save())
+        return {"risk_score": 1} if saves[-1] else None
+
+    monkeypatch.setattr(worker_module, "assess_domain", assess_domain)
+    workers = AssessmentWorkers(queue, workers=0, lease_seconds=LEASE)
+    job = queue.enqueue(["example.com"], "fast")[0]
+    workers.run_job(queue.claim("w1", LEASE), "w1")
+    assert saves == [False]
+    current = queue.get(job["id"])
+    assert current["status"] == "running" and current["worker"] == "w2"
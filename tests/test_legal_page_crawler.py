@@ -0,0 +1,121 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from utils import legal_page_crawler
+from utils.legal_page_crawler import crawl_legal_pages, create_session, fetch_page_text, merge_findings
+from utils.reparse import plan, run_task
+
+PAGE = ("<html><body><p>" + "é" * 30000 + "</p></body></html>").encode("utf-8")
+
+
+class _Page(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page_url():
+    server = HTTPServer(("127.0.0.1", 0), _Page)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/terms"
+    server.shutdown()
+    server.server_close()
+
+
+def test_page_limit_counts_bytes(page_url, monkeypatch):
+    monkeypatch.setattr(legal_page_crawler, "MAX_PAGE_BYTES", 20000)
+    with create_session() as session:
+        text = fetch_page_text(session, page_url, threading.Event())
+    assert 0 < text.count("é") <= 20000 // 2 + 16384 // 2
+
+
+def test_whole_page_is_decoded_under_the_limit(page_url):
+    with create_session() as session:
+        assert fetch_page_text(session, page_url, threading.Event()).count("é") == 30000
+
+
+def test_crawl_uses_the_homepage_verify_setting(monkeypatch):
+    calls = []
+    monkeypatch.setattr(legal_page_crawler, "fetch_page_text",
+                        lambda session, url, stop_event, timeout, verify: calls.append(verify) or "")
+    homepage = '<a href="/terms">Terms of Service</a>'
+    crawl_legal_pages("https://shop.test/", homepage, lambda text: {}, min_interval=0, verify=False)
+    assert calls == [False]
+
+
+def test_check_privacy_term_crawls_unverified_when_the_homepage_needed_it(monkeypatch, tmp_path):
+    import requests
+
+    from scrapers import check_privacy_term as scraper
+
+    class Response:
+        text = '<a href="/terms">Terms of Service</a>'
+
+        def raise_for_status(self):
+            pass
+
+    def get(url, timeout, verify=True):
+        if verify:
+            raise requests.exceptions.SSLError("certificate verify failed")
+        return Response()
+
+    calls = []
+
+    def crawl(base_url, homepage_html, analyze_text, initial_findings=None, max_pages=4, verify=True, keep_text=False):
+        calls.append(verify)
+        return {**initial_findings, "pages": []}
+
+    monkeypatch.setenv("RISK_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(scraper.requests, "get", get)
+    monkeypatch.setattr(scraper, "check_ssl", lambda domain: False)
+    monkeypatch.setattr(scraper, "crawl_legal_pages", crawl)
+    scraper.check_privacy_term("shop.test")
+    assert calls == [False]
+
+
+def test_privacy_and_terms_reparses_from_its_snapshots(monkeypatch, tmp_path):
+    from scrapers import check_privacy_term as scraper
+
+    legal_text = "Terms of Service. This website is operated by Example Shop Ltd."
+
+    def crawl(base_url, homepage_html, analyze_text, initial_findings=None, max_pages=4, verify=True, keep_text=False):
+        merged = {**initial_findings, "pages": []}
+        for url, text in (("https://shop.test/about", None), ("https://shop.test/terms", legal_text)):
+            page = {"url": url, **analyze_text(text), "text": text} if text else {"url": url, "error": "not_html_or_not_ok"}
+            merged["pages"].append(page)
+            merge_findings(merged, page)
+        return merged
+
+    monkeypatch.setenv("RISK_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(scraper, "fetch_page_content", lambda domain: ('<a href="/terms">Terms</a> Privacy Policy', True))
+    monkeypatch.setattr(scraper, "check_ssl", lambda domain: True)
+    monkeypatch.setattr(scraper, "crawl_legal_pages", crawl)
+    live = scraper.check_privacy_term("shop.test")
+    assert live["legal_name_source"] == "https://shop.test/terms"
+
+    tasks = plan({"shop.test": {"domain": "shop.test"}}, ["privacy_and_terms"], str(tmp_path))
+    domain, key, result, status = run_task(tasks[0])
+    assert status["class"] == "ok"
+    assert result == live
+
+
+def test_inaccessible_site_has_the_same_keys(monkeypatch, tmp_path):
+    from scrapers import check_privacy_term as scraper
+
+    monkeypatch.setenv("RISK_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(scraper, "check_ssl", lambda domain: True)
+    monkeypatch.setattr(scraper, "fetch_page_content", lambda domain: ("<p>Privacy Policy</p>", True))
+    accessible = scraper.check_privacy_term("shop.test")
+    monkeypatch.setattr(scraper, "fetch_page_content", lambda domain: (None, False))
+    inaccessible = scraper.check_privacy_term("shop.test")
+    assert set(inaccessible) == set(accessible)
+    assert inaccessible["legal_pages_checked"] == [] and inaccessible["policy_term_matches"] == {}
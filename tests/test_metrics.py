@@ -0,0 +1,21 @@
+from utils import metrics
+from utils.metrics import register_collector, render_metrics
+
+
+def test_collectors_declare_their_metric_type(monkeypatch):
+    monkeypatch.setattr(metrics, "_collectors", list(metrics._collectors))  # Dropped again after the test
+    register_collector(lambda: [("risk_test_things_total", "Things so far", {"source": "a"}, 3, "counter"),
+                                ("risk_test_things_open", "Things open now", {}, 1)])
+    lines = render_metrics().splitlines()
+    assert "# TYPE risk_test_things_total counter" in lines
+    assert "# TYPE risk_test_things_open gauge" in lines
+    assert 'risk_test_things_total{source="a"} 3' in lines
+
+
+def test_no_collected_total_is_typed_as_a_gauge():
+    from utils import admission, browser_pool, hedging  # noqa: F401 (registers their collectors)
+
+    hedging.get_hedger().tracker("test_source")
+    admission.get_admission_controller()
+    lines = render_metrics().splitlines()
+    assert not [line for line in lines if line.startswith("# TYPE") and line.endswith("_total gauge")]
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from utils.job_queue import SQLiteJobQueue
+from utils.priority import priority_context
+from utils.rate_limits import use_shared_rate_limits, wait_for_rate
+
+
+def test_interactive_waits_at_most_one_interval_under_bulk_and_normal_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("RISK_RATE_LIMITS", "demo=600")  # One call every 0.1 s
+    interval = 0.1
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+    use_shared_rate_limits(queue)
+    stop = threading.Event()
+    calls = []
+
+    def saturate(priority):
+        with priority_context(priority):
+            while not stop.is_set():
+                wait_for_rate("demo")
+                calls.append(time.monotonic())
+
+    threads = [threading.Thread(target=saturate, args=(priority,), daemon=True)
+               for priority in ["normal"] * 8 + ["bulk"] * 8]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(1.0)  # Let the normal and bulk callers book up the source
+        waits = []
+        window_start = time.monotonic()
+        with priority_context("interactive"):
+            for _ in range(8):
+                started = time.monotonic()
+                wait_for_rate("demo")
+                waits.append(time.monotonic() - started)
+                time.sleep(0.25)
+        window = time.monotonic() - window_start
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(5)
+        use_shared_rate_limits(None)
+        queue.close()
+    assert max(waits) <= interval + 0.02, waits
+    # Interactive calls took their slots from the others: the source still saw at most its rate
+    in_window = sum(1 for at in calls if window_start <= at <= window_start + window)
+    assert in_window + len(waits) <= window / interval + 2
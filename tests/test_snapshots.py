@@ -0,0 +1,42 @@
+import os
+
+from utils import snapshots
+from utils.snapshots import latest_snapshots, list_snapshots, load_snapshot, prune_snapshots, save_snapshot
+
+
+def _capture(directory, html, captured_at, page="main"):
+    save_snapshot("scrape_urlvoid", "example.com", html, page=page, directory=directory)
+    entries = list_snapshots("example.com", directory=directory)
+    entries[-1]["captured_at"] = captured_at
+    snapshots._write_index(snapshots._index_path("example.com", directory), entries)
+
+
+def test_prune_keeps_newest_captures(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "ORPHAN_GRACE_SECONDS", 0)
+    directory = str(tmp_path)
+    for n in range(5):
+        _capture(directory, f"<html>{n}</html>", f"2026-10-0{n + 1} 00:00:00")
+    summary = prune_snapshots(keep=2, older_than_days=0, directory=directory)
+    assert summary["captures_removed"] == 3
+    assert summary["blobs_removed"] == 3
+    remaining = list_snapshots("example.com", directory=directory)
+    assert [load_snapshot(entry["digest"], directory) for entry in remaining] == ["<html>3</html>", "<html>4</html>"]
+
+
+def test_prune_by_age_keeps_latest_of_each_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "ORPHAN_GRACE_SECONDS", 0)
+    directory = str(tmp_path)
+    _capture(directory, "<html>old</html>", "2020-01-01 00:00:00")
+    _capture(directory, "<html>old detail</html>", "2020-01-01 00:00:00", page="detail")
+    _capture(directory, "<html>new</html>", "2099-01-01 00:00:00")
+    prune_snapshots(keep=10, older_than_days=30, directory=directory)
+    latest = latest_snapshots("example.com", "scrape_urlvoid", directory)
+    assert sorted(latest) == ["detail", "main"]
+    assert len(list_snapshots("example.com", directory=directory)) == 2
+
+
+def test_prune_spares_recent_orphans(tmp_path):
+    directory = str(tmp_path)
+    snapshots.store_blob("<html>in flight</html>", directory)
+    assert prune_snapshots(directory=directory)["blobs_removed"] == 0
+    assert len(os.listdir(os.path.join(directory, "objects"))) == 1
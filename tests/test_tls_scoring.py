@@ -0,0 +1,84 @@
+# An HTTP-only site must be reported, and scored, the same way by the fast and deep tiers.
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from scrapers.tls_probe import probe_tls
+from utils.retry_policy import DEFAULT_POLICY, classify_failure
+from utils.risk_scoring import calculate_risk_score
+
+
+class _Quiet(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = HTTPServer(("127.0.0.1", 0), _Quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _with_status(result):
+    return {**result, "scrape_status": {"class": classify_failure(result)}}
+
+
+def test_plain_http_on_tls_port_is_no_https(http_server):
+    result = probe_tls("127.0.0.1", port=http_server, http_port=http_server)
+    assert result["has_https"] is False
+    assert "error" not in result
+
+
+def test_refused_tls_port_with_http_is_no_https(http_server):
+    result = probe_tls("127.0.0.1", port=_closed_port(), http_port=http_server)
+    assert result["has_https"] is False
+    assert "error" not in result
+
+
+def test_unreachable_host_is_still_an_error():
+    port = _closed_port()
+    result = probe_tls("127.0.0.1", port=port, http_port=port)
+    assert classify_failure(result) == "target_unreachable"
+
+
+def test_http_only_site_scores_the_same_in_both_tiers(http_server):
+    probe = probe_tls("127.0.0.1", port=_closed_port(), http_port=http_server)
+    secure_probe = {"has_https": True, "certificate_valid": True, "has_sha256": True}
+    fast = lambda tls: {"assessment_profiles": {"fast": {}}, "tls_probe": _with_status(tls)}
+
+    # What the deep scrapers save for the same site (the fingerprint scraper can't connect)
+    https_check = {"has_https": False, "has_http": True, "note": "HTTPS failed, but HTTP is accessible"}
+    fingerprint = {"has_sha256": "Unknown", "error": "Direct SSL failed: [Errno 111] Connection refused"}
+    deep = lambda check, ssl: {"assessment_profiles": {"fast": {}, "deep": {}},
+                               "https_check": _with_status(check), "ssl_sha_256_fingerprint": _with_status(ssl)}
+    secure_deep = deep({"has_https": True}, {"has_sha256": True})
+
+    fast_penalty = calculate_risk_score(fast(probe)) - calculate_risk_score(fast(secure_probe))
+    deep_penalty = calculate_risk_score(deep(https_check, fingerprint)) - calculate_risk_score(secure_deep)
+    assert fast_penalty == deep_penalty == 12
+
+
+def test_bad_certificate_is_scored_not_retried():
+    fingerprint = {"domain": "shop.test", "has_sha256": False,
+                   "error": "Both SSL and Selenium failed: [SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed, "
+                            "Message: unknown error: net::ERR_CERT_DATE_INVALID"}
+    assert classify_failure(fingerprint) not in DEFAULT_POLICY["retry_on"] | {"target_unreachable"}
+    record = lambda ssl: {"assessment_profiles": {"fast": {}, "deep": {}},
+                          "https_check": _with_status({"has_https": True}), "ssl_sha_256_fingerprint": _with_status(ssl)}
+    penalty = calculate_risk_score(record(fingerprint)) - calculate_risk_score(record({"has_sha256": True}))
+    assert penalty == 12
@@ -0,0 +1,376 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+# A small EasyList-style default list. Load a full list with `load_filter_list` for production runs.
+DEFAULT_RULES = """
+! Ad networks
+||doubleclick.net^
+||googlesyndication.com^
+||googleadservices.com^
+||adservice.google.com^
+||amazon-adsystem.com^
+||adnxs.com^
+||criteo.com^
+||criteo.net^
+||taboola.com^
+||outbrain.com^
+||pubmatic.com^
+||rubiconproject.com^
+||openx.net^
+||media.net^
+||adsterra.com^
+||mgid.com^
+||revcontent.com^
+/adsbygoogle.
+/pagead/js/
+/ads.js
+/prebid.
+! Pop-up / pop-under networks
+||popads.net^$popup
+||popcash.net^$popup
+||propellerads.com^$popup
+||onclickads.net^$popup
+||exoclick.com^$popup
+||adcash.com^$popup
+! Element hiding
+##ins.adsbygoogle
+##.adsbygoogle
+##[data-ad-slot]
+##[data-ad-client]
+##[id^="div-gpt-ad"]
+##[id^="google_ads_iframe"]
+##iframe[src*="doubleclick.net"]
+##iframe[title*="advertisement"]
+##.ad-banner
+##.ad-container
+##.ad-slot
+##.advertisement
+##.sponsored-ad
+##.taboola
+##.OUTBRAIN
+"""
+
+# Simple CSS selectors we compile: tag, .class, #id and [attr], [attr=v], [attr^=v], [attr*=v], [attr$=v].
+SELECTOR_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)?"
+    r"(?:(?P<cls>\.[A-Za-z0-9_-]+)|(?P<id>#[A-Za-z0-9_-]+))?"
+    r"(?:\[(?P<attr>[a-zA-Z-]+)(?:(?P<op>[\^*$]?=)[\"']?(?P<value>[^\"'\]]*)[\"']?)?\])?$"
+)
+
+
+def _domain_rule_host(pattern):
+    """
+    Returns the host of a `||host^` rule, or None for other network rules.
+    """
+    if pattern.startswith("||"):
+        host = pattern[2:].rstrip("^")
+        if re.fullmatch(r"[a-z0-9.-]+", host):
+            return host
+    return None
+
+
+def _on_domain(site_host, domain):
+    return site_host == domain or site_host.endswith("." + domain)
+
+
+def _domain_option(options):
+    """
+    The sites a network rule is limited to by `$domain=a.com|~b.a.com`, as (include, exclude).
+    An empty include set means every site.
+    """
+    include, exclude = set(), set()
+    for option in options:
+        if option.startswith("domain="):
+            for domain in option[len("domain="):].lower().split("|"):
+                if domain.startswith("~"):
+                    exclude.add(domain[1:])
+                elif domain:
+                    include.add(domain)
+    return frozenset(include), frozenset(exclude)
+
+
+def _applies(entry, site_host):
+    """
+    Whether a compiled network rule (rule, include, exclude) applies on a page of `site_host`.
+    """
+    _, include, exclude = entry
+    if not include and not exclude:
+        return True
+    if not site_host:
+        return not include
+    if any(_on_domain(site_host, domain) for domain in exclude):
+        return False
+    return not include or any(_on_domain(site_host, domain) for domain in include)
+
+
+def compile_filter_list(text):
+    """
+    Compiles EasyList-style rules into fast matchers.
+
+    Supported: `||host^` domain rules, plain substring rules, `@@` exceptions, the `$popup` and
+    `$domain=` options, and element hiding rules (`##sel`, `host##sel`, `#@#` exceptions) with
+    simple selectors.
+
+    Returns:
+        dict: The compiled filter, to be passed to `match_resources` or `detect_ads`.
+    """
+    compiled = {
+        "domains": {},          # host -> [(rule, include, exclude)], see _domain_option
+        "popup_domains": {},    # host -> [(rule, include, exclude)]
+        "exception_domains": {},  # host -> [(rule, include, exclude)]
+        "substrings": [],       # (substring, (rule, include, exclude))
+        "selectors": {"class": {}, "id": {}, "tag": {}, "attr": {}},
+        "site_selectors": {},   # host -> element index of the selectors scoped to it
+        "selector_exceptions": {},  # host ("" for `#@#sel`, every site) -> selectors switched off there
+        "skipped": 0
+    }
+
+    for line in text.splitlines():
+        rule = line.strip()
+        if not rule or rule.startswith(("!", "[")):
+            continue
+
+        # Element hiding rules
+        if "#@#" in rule:
+            hosts, selector = rule.split("#@#", 1)
+            for host in hosts.split(",") if hosts else [""]:
+                compiled["selector_exceptions"].setdefault(host.strip().lower(), set()).add(selector)
+            continue
+        if "##" in rule:
+            hosts, selector = rule.split("##", 1)
+            if hosts:
+                for host in hosts.split(","):
+                    host = host.strip().lower()
+                    index = compiled["site_selectors"].setdefault(host, {"class": {}, "id": {}, "tag": {}, "attr": {}})
+                    if not _add_selector(index, selector, f"{host}##{selector}"):
+                        compiled["skipped"] += 1
+            elif not _add_selector(compiled["selectors"], selector, rule):
+                compiled["skipped"] += 1
+            continue
+
+        # Network rules
+        is_exception = rule.startswith("@@")
+        pattern, _, options = rule[2 if is_exception else 0:].partition("$")
+        options = options.split(",") if options else []
+        entry = (rule, *_domain_option(options))
+        host = _domain_rule_host(pattern)
+        if is_exception:
+            if host:
+                compiled["exception_domains"].setdefault(host, []).append(entry)
+            continue
+        if host:
+            key = "popup_domains" if "popup" in options else "domains"
+            compiled[key].setdefault(host, []).append(entry)
+        elif pattern and not any(c in pattern for c in "*^|"):
+            compiled["substrings"].append((pattern.lower(), entry))
+        else:
+            compiled["skipped"] += 1
+
+    # One alternation for all substring rules, so each URL is scanned once
+    substrings = compiled["substrings"]
+    compiled["substring_re"] = re.compile("|".join(re.escape(s) for s, _ in substrings)) if substrings else None
+    compiled["substring_rules"] = {}
+    for substring, entry in substrings:
+        compiled["substring_rules"].setdefault(substring, []).append(entry)
+    return compiled
+
+
+def _add_selector(index, selector, rule):
+    """
+    Adds a simple selector to the element index. Returns False if the selector is too complex.
+    """
+    match = SELECTOR_RE.match(selector.strip())
+    if not match or not any(match.groupdict().values()):
+        return False
+    tag = (match.group("tag") or "").lower() or None
+    if match.group("attr"):
+        index["attr"].setdefault(match.group("attr").lower(), []).append((tag, match.group("op"), match.group("value") or "", rule))
+    elif match.group("cls"):
+        index["class"].setdefault(match.group("cls")[1:], []).append((tag, rule))
+    elif match.group("id"):
+        index["id"].setdefault(match.group("id")[1:], []).append((tag, rule))
+    else:
+        index["tag"].setdefault(tag, []).append((None, rule))
+    return True
+
+
+def load_filter_list(path):
+    """
+    Loads and compiles a filter list file (e.g. a downloaded easylist.txt).
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore") as file:
+        return compile_filter_list(file.read())
+
+
+_default_filter = None
+
+
+def get_default_filter():
+    """
+    Returns the compiled built-in rule list (compiled once per process).
+    """
+    global _default_filter
+    if _default_filter is None:
+        _default_filter = compile_filter_list(DEFAULT_RULES)
+    return _default_filter
+
+
+def _first_applying(entries, site_host):
+    for entry in entries:
+        if _applies(entry, site_host):
+            return entry[0]
+    return None
+
+
+def _host_rule(table, host, site_host=None):
+    """
+    Looks the host and each parent domain up in a host -> rules table, skipping rules whose
+    `$domain=` option excludes the page's site.
+    """
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        rule = _first_applying(table.get(".".join(parts[i:]), ()), site_host)
+        if rule:
+            return rule
+    return None
+
+
+def _substring_rule(compiled, url, site_host=None):
+    if not compiled["substring_re"]:
+        return None
+    for found in compiled["substring_re"].finditer(url.lower()):
+        rule = _first_applying(compiled["substring_rules"][found.group()], site_host)
+        if rule:
+            return rule
+    return None
+
+
+def match_resources(compiled, urls, site_host=None):
+    """
+    Matches subresource URLs against the network rules, for a page of `site_host` (rules limited
+    to other sites with `$domain=` don't apply; without a site, only unrestricted rules do).
+
+    Returns:
+        tuple: (ad rule -> count, popup rule -> count)
+    """
+    ad_counts, popup_counts = {}, {}
+    for url in urls:
+        host = (urlparse(url).hostname or "").lower()
+        if host and _host_rule(compiled["exception_domains"], host, site_host):
+            continue
+        rule = _host_rule(compiled["popup_domains"], host, site_host) if host else None
+        if rule:
+            popup_counts[rule] = popup_counts.get(rule, 0) + 1
+            continue
+        rule = _host_rule(compiled["domains"], host, site_host) if host else None
+        if not rule:
+            rule = _substring_rule(compiled, url, site_host)
+        if rule:
+            ad_counts[rule] = ad_counts.get(rule, 0) + 1
+    return ad_counts, popup_counts
+
+
+class PageScanner(HTMLParser):
+    """
+    One pass over the HTML that collects subresource URLs and element hiding matches.
+    """
+
+    RESOURCE_ATTRS = {"script": "src", "iframe": "src", "img": "src", "embed": "src", "link": "href", "source": "src"}
+
+    def __init__(self, indexes, base_url, exceptions=frozenset()):
+        super().__init__(convert_charrefs=True)
+        self.indexes = indexes
+        self.exceptions = exceptions
+        self.base_url = base_url
+        self.resources = []
+        self.element_counts = {}
+
+    def _hit(self, rule):
+        if self.exceptions and rule.split("##", 1)[-1] in self.exceptions:
+            return
+        self.element_counts[rule] = self.element_counts.get(rule, 0) + 1
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value or "") for name, value in attrs}
+
+        resource_attr = self.RESOURCE_ATTRS.get(tag)
+        if resource_attr and attrs.get(resource_attr):
+            self.resources.append(urljoin(self.base_url, attrs[resource_attr]))
+
+        for selectors in self.indexes:
+            self._match(selectors, tag, attrs)
+
+    def _match(self, selectors, tag, attrs):
+        for cls in attrs.get("class", "").split():
+            for rule_tag, rule in selectors["class"].get(cls, ()):
+                if rule_tag in (None, tag):
+                    self._hit(rule)
+        element_id = attrs.get("id")
+        if element_id:
+            for rule_tag, rule in selectors["id"].get(element_id, ()):
+                if rule_tag in (None, tag):
+                    self._hit(rule)
+        for _, rule in selectors["tag"].get(tag, ()):
+            self._hit(rule)
+        for name, actual in attrs.items():
+            for rule_tag, op, value, rule in selectors["attr"].get(name, ()):
+                if rule_tag not in (None, tag):
+                    continue
+                if (op is None or (op == "=" and actual == value) or (op == "^=" and actual.startswith(value))
+                        or (op == "*=" and value in actual) or (op == "$=" and actual.endswith(value))):
+                    self._hit(rule)
+
+    handle_startendtag = handle_starttag
+
+
+def _site_selectors(compiled, site_host):
+    """
+    The element indexes for a page (the generic one plus those scoped to its host or a parent
+    domain) and the selectors switched off on it. Looks the host's labels up directly, so the cost
+    doesn't grow with the number of sites in the list.
+    """
+    parts = site_host.split(".") if site_host else []
+    hosts = [".".join(parts[i:]) for i in range(len(parts))]
+    indexes = [compiled["selectors"]] + [compiled["site_selectors"][h] for h in hosts if h in compiled["site_selectors"]]
+    exceptions = set()
+    for host in [""] + hosts:
+        exceptions |= compiled["selector_exceptions"].get(host, set())
+    return indexes, frozenset(exceptions)
+
+
+def detect_ads(html, page_url, resource_urls=(), compiled=None):
+    """
+    Runs the filter rules against page HTML and its subresource URLs.
+
+    Args:
+        html (str): Page HTML (raw or rendered).
+        page_url (str): URL of the page, used to resolve relative URLs and site-specific rules.
+        resource_urls (iterable): Extra subresource URLs (e.g. captured by a browser).
+        compiled (dict): Compiled filter; defaults to the built-in list.
+
+    Returns:
+        dict: `has_ads`, `popup_network_detected` and matched rule counts.
+    """
+    compiled = compiled or get_default_filter()
+    site_host = (urlparse(page_url).hostname or "").lower()
+
+    indexes, exceptions = _site_selectors(compiled, site_host)
+    scanner = PageScanner(indexes, page_url, exceptions)
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except Exception:
+        pass  # Keep partial results for malformed markup
+
+    urls = list(dict.fromkeys(list(scanner.resources) + list(resource_urls)))
+    ad_counts, popup_counts = match_resources(compiled, urls, site_host)
+
+    return {
+        "has_ads": bool(ad_counts or scanner.element_counts),
+        "popup_network_detected": bool(popup_counts),
+        "network_rule_matches": ad_counts,
+        "popup_rule_matches": popup_counts,
+        "element_rule_matches": scanner.element_counts,
+        "resources_checked": len(urls)
+    }
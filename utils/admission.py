@@ -0,0 +1,454 @@
+import itertools
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import register_collector
+from utils.priority import FairScheduler, current_priority, fair_wait
+from utils.tracing import span
+
+try:
+    import psutil
+except ImportError:  # /proc is enough on Linux
+    psutil = None
+
+MB = 1024 * 1024
+
+# Estimated peak memory per scraper call (MB): browser, renderer and driver included.
+# Observed peaks replace these estimates as sessions finish.
+SCRAPER_COSTS_MB = {
+    "check_social_presence": 450,      # Homepage + LinkedIn, two page loads
+    "scrape_similarweb_data": 500,     # 1920x1080 window, heavy SPA
+    "scrape_godaddy_whois": 350,
+    "scrape_mxtoolbox": 350,           # Long-running page (up to 15 min)
+    "scrape_urlvoid": 300,
+    "scrape_ssl_org": 300,
+    "scrape_google_safe_browsing": 300,
+    "scrape_ssltrust_blacklist": 300,
+    "scrape_tranco_list": 300,
+    "check_https": 250,
+    "get_ssl_fingerprint": 60,         # Browser only as a fallback
+    "check_privacy_term": 80,          # Browser only as a fallback
+    "check_popups_ads": 60,            # Browser only with use_browser=True
+    "scrape_page_size": 40,
+    "scrape_ipvoid": 30,
+    "get_whois_data": 20,
+    "initiate_scan": 20
+}
+DEFAULT_COST_MB = 300
+
+DEFAULT_SESSION_CAP_MB = 1500
+DEFAULT_MIN_FREE_MB = 512
+# A closed context's renderer takes a moment to exit; its shared browser isn't re-checked before then
+CONTEXT_CLOSE_GRACE_SECONDS = 5
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _children_map():
+    """
+    Parent pid -> child pids, from /proc/<pid>/stat.
+    """
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after the closing parenthesis are fixed
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def process_tree_pids(pid, children=None):
+    """
+    The pid and all of its descendants.
+    """
+    if psutil:
+        try:
+            root = psutil.Process(pid)
+            return [pid] + [p.pid for p in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+    children = children if children is not None else _children_map()
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def process_rss(pid):
+    """
+    Resident memory of one process in bytes (0 if it is gone).
+    """
+    if psutil:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss(pid=None, children=None):
+    """
+    Resident memory of a process and its descendants in bytes (this process by default).
+    Shared pages are counted once per process, so this overestimates Chrome slightly, which errs safe.
+    """
+    pid = pid or os.getpid()
+    return sum(process_rss(p) for p in process_tree_pids(pid, children))
+
+
+def available_memory():
+    """
+    Memory the kernel can hand out without swapping, in bytes (None if unknown).
+    """
+    if psutil:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def kill_process_tree(pid):
+    """
+    Kills a process and its descendants (children first, so none are re-parented and missed).
+    """
+    for p in reversed(process_tree_pids(pid)):
+        try:
+            os.kill(p, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def driver_pid(driver):
+    """
+    The root process of a browser session: chromedriver for Selenium, Chrome for the CDP backend.
+    """
+    pid = getattr(driver, "browser_pid", None)
+    if pid:
+        return pid
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _context_heap(session, pid):
+    """
+    JavaScript heap of a session's pages in the shared browser `pid` (0 when it can't be read),
+    to tell which pooled context is using a shared Chrome's memory.
+    """
+    usage = 0
+    for driver in list(session["drivers"]):
+        if driver_pid(driver) != pid or not hasattr(driver, "heap_usage"):
+            continue
+        try:
+            usage += driver.heap_usage()
+        except Exception:
+            pass
+    return usage
+
+
+class AdmissionController:
+    """
+    Admits scraper calls only while the process tree has memory headroom for their estimated cost,
+    and kills browser sessions that grow past a per-session cap so they can be retried. In a
+    pooled Chrome shared by several sessions only the heaviest context is closed.
+
+    Budget: RISK_MEMORY_BUDGET_MB, else 75% of the memory available at start-up.
+    Per-session cap: RISK_SESSION_MEMORY_CAP_MB (default 1500).
+    Calls waiting for headroom are admitted in priority-class order (utils/priority.py).
+    """
+
+    def __init__(self, memory_budget_mb=None, session_cap_mb=None, min_free_mb=None, poll_interval=1.0):
+        own_rss = process_tree_rss()
+        if memory_budget_mb is None:
+            memory_budget_mb = _env_int("RISK_MEMORY_BUDGET_MB", 0)
+        if not memory_budget_mb:
+            available = available_memory()
+            memory_budget_mb = int(((available or 4096 * MB) + own_rss) * 0.75 / MB)
+        self.budget = memory_budget_mb * MB
+        self.session_cap = (session_cap_mb or _env_int("RISK_SESSION_MEMORY_CAP_MB", DEFAULT_SESSION_CAP_MB)) * MB
+        self.min_free = (min_free_mb or DEFAULT_MIN_FREE_MB) * MB
+        self.baseline = own_rss
+        self.poll_interval = poll_interval
+
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.learned_costs = {}  # name -> observed peak (bytes)
+        self.measured_rss = own_rss
+        self.killed_sessions = 0
+        self.draining = {}  # pid -> when a pooled browser whose context was closed is checked again
+        self.condition = threading.Condition()
+        self.scheduler = FairScheduler()
+        self.local = threading.local()
+        self.watchdog = None
+
+    # --- Estimates --------------------------------------------------------
+
+    def estimate(self, name):
+        """
+        Expected peak memory of one call, in bytes.
+        """
+        if name in self.learned_costs:
+            return self.learned_costs[name]
+        return SCRAPER_COSTS_MB.get(name, DEFAULT_COST_MB) * MB
+
+    def _learn(self, name, peak):
+        if peak <= 0:
+            return
+        previous = self.learned_costs.get(name)
+        # Lean towards the larger value so a lucky small run doesn't over-admit
+        self.learned_costs[name] = peak if previous is None else max(int(previous * 0.7 + peak * 0.3), peak)
+
+    def _usage(self):
+        """
+        Memory in use or promised: the measured tree, or the baseline plus reservations if that is larger
+        (sessions that just started haven't grown to their estimate yet). Caller holds the lock.
+        """
+        reserved = sum(max(s["cost"], s["peak"]) for s in self.sessions.values())
+        return max(self.measured_rss, self.baseline + reserved)
+
+    def _fits(self, cost):
+        if not self.sessions:
+            return True  # Always let one session run, however large
+        if self._usage() + cost > self.budget:
+            return False
+        available = available_memory()
+        return available is None or available - cost >= self.min_free
+
+    # --- Sessions ---------------------------------------------------------
+
+    @contextmanager
+    def admit(self, name, timeout=None):
+        """
+        Blocks until there is headroom for `name`, then holds its reservation for the `with` block.
+        Browsers started inside the block should be registered with `track_driver`.
+        """
+        cost = self.estimate(name)
+        deadline = time.monotonic() + timeout if timeout else None
+        with span("admission_wait", "queue", source=name, cost_mb=cost, priority=current_priority()), self.condition:
+            # The watchdog refreshes measured_rss while we wait
+            fair_wait(self.condition, self.scheduler, lambda: self._fits(cost), deadline,
+                      f"No memory headroom for {name} after {timeout}s")
+            session = {"id": next(self.session_ids), "name": name, "cost": cost, "pids": set(), "drivers": [],
+                       "peak": 0, "killed": False, "cancelled": False, "started": time.monotonic()}
+            self.sessions[session["id"]] = session
+        self._ensure_watchdog()
+
+        previous = getattr(self.local, "session", None)
+        self.local.session = session
+        try:
+            yield session
+        finally:
+            self.local.session = previous
+            with self.condition:
+                self.sessions.pop(session["id"], None)
+                if not session["killed"] and not session["cancelled"]:
+                    self._learn(name, session["peak"])
+                self.condition.notify_all()
+
+    def track_driver(self, driver):
+        """
+        Attributes a browser session to the scraper call running in this thread.
+        """
+        session = getattr(self.local, "session", None)
+        pid = driver_pid(driver)
+        if session is not None and pid:
+            with self.condition:
+                session["pids"].add(pid)
+                session["drivers"].append(driver)
+
+    def cancel(self, session):
+        """
+        Abandons a session (e.g. the losing attempt of a hedged call): pooled pages are closed,
+        dedicated browsers are killed. The session is not retried.
+        """
+        with self.condition:
+            session["cancelled"] = True
+            drivers = list(session["drivers"])
+        for driver in drivers:
+            if getattr(driver, "context", None) is not None:
+                threading.Thread(target=driver.quit, daemon=True).start()  # Shares its Chrome; close only the context
+            elif driver_pid(driver):
+                kill_process_tree(driver_pid(driver))
+
+    def run(self, name, func, *args, retries=1, on_session=None, **kwargs):
+        """
+        Runs `func` under admission control. A call whose browser was killed for exceeding the
+        per-session cap is retried (with a larger estimate) up to `retries` times.
+        `on_session` is called with each attempt's session as it is admitted.
+        """
+        for attempt in range(retries + 1):
+            with self.admit(name) as session:
+                if on_session:
+                    on_session(session)
+                result = func(*args, **kwargs)
+            if not session["killed"] or session["cancelled"]:
+                return result
+            print(f"🔁 {name} was killed for memory use (attempt {attempt + 1}/{retries + 1})")
+            with self.condition:
+                self.learned_costs[name] = max(self.estimate(name), session["peak"])
+        return {"error": f"{name} exceeded the per-session memory cap of {self.session_cap // MB} MB"}
+
+    # --- Watchdog ---------------------------------------------------------
+
+    def _ensure_watchdog(self):
+        with self.condition:
+            if self.watchdog is None or not self.watchdog.is_alive():
+                self.watchdog = threading.Thread(target=self._watch, name="admission-watchdog", daemon=True)
+                self.watchdog.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self._check()
+
+    def _check(self):
+        """
+        One watchdog pass: refreshes the measured memory and enforces the per-session cap.
+        """
+        with self.condition:
+            sessions = [s for s in self.sessions.values() if s["pids"] and not s["killed"]]
+            idle = not self.sessions
+        if idle:
+            with self.condition:
+                self.measured_rss = process_tree_rss()
+                self.draining.clear()
+                self.condition.notify_all()
+            return
+
+        children = None if psutil else _children_map()
+        total = sum(process_rss(p) for p in process_tree_pids(os.getpid(), children))
+
+        # Sessions sharing a process (pooled CDP contexts) split its memory and its cap
+        sharers = {}
+        for session in sessions:
+            for pid in session["pids"]:
+                sharers.setdefault(pid, []).append(session)
+        tree_rss = {pid: process_tree_rss(pid, children) for pid in sharers}
+
+        breaches = []
+        with self.condition:
+            self.measured_rss = total
+            for pid, owners in sharers.items():
+                share = tree_rss[pid] // len(owners)
+                for session in owners:
+                    session["peak"] = max(session["peak"], share)
+                if tree_rss[pid] > self.session_cap * len(owners) and self.draining.get(pid, 0) <= time.monotonic():
+                    breaches.append((pid, owners, tree_rss[pid]))
+            for pid in [pid for pid in self.draining if pid not in tree_rss]:
+                del self.draining[pid]  # That browser is gone (or no session uses it any more)
+            self.condition.notify_all()
+
+        for pid, owners, rss in breaches:
+            if len(owners) == 1:
+                self._mark_killed(owners[0])
+                print(f"🧨 Killing browser {pid} ({owners[0]['name']}): {rss // MB} MB exceeds the session cap")
+                kill_process_tree(pid)
+                continue
+            # A pooled Chrome: close only the heaviest context, the other sessions keep their pages
+            offender = max(owners, key=lambda session: (_context_heap(session, pid), session["cost"]))
+            self._mark_killed(offender)
+            with self.condition:
+                self.draining[pid] = time.monotonic() + CONTEXT_CLOSE_GRACE_SECONDS
+            print(f"🧨 Closing {offender['name']}'s context in browser {pid}: {rss // MB} MB exceeds the cap "
+                  f"of {len(owners)} sessions")
+            for driver in list(offender["drivers"]):
+                if driver_pid(driver) == pid:
+                    threading.Thread(target=driver.quit, daemon=True).start()
+
+    def _mark_killed(self, session):
+        with self.condition:
+            session["killed"] = True
+            self.killed_sessions += 1
+
+    def snapshot(self):
+        """
+        Current memory picture: budget, measured and reserved usage, and active sessions.
+        """
+        with self.condition:
+            return {
+                "budget_mb": self.budget // MB,
+                "session_cap_mb": self.session_cap // MB,
+                "measured_rss_mb": self.measured_rss // MB,
+                "usage_mb": self._usage() // MB,
+                "available_mb": (available_memory() or 0) // MB,
+                "active_sessions": [{"name": s["name"], "cost_mb": s["cost"] // MB, "peak_mb": s["peak"] // MB}
+                                    for s in self.sessions.values()],
+                "killed_sessions": self.killed_sessions,
+                "priorities": self.scheduler.snapshot(),
+                "learned_costs_mb": {name: cost // MB for name, cost in self.learned_costs.items()}
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """
+    Returns the process-wide admission controller, created on first use.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController()
+        return _controller
+
+
+def track_driver(driver):
+    """
+    Registers a freshly started browser with the admission controller, if one is in use.
+    """
+    if _controller is not None:
+        _controller.track_driver(driver)
+    return driver
+
+
+def _collect_admission_metrics():
+    if _controller is None:
+        return []
+    snapshot = _controller.snapshot()
+    return [
+        ("risk_memory_budget_bytes", "Memory budget for scraper sessions", {}, snapshot["budget_mb"] * MB),
+        ("risk_memory_measured_rss_bytes", "Measured RSS of this process tree", {}, snapshot["measured_rss_mb"] * MB),
+        ("risk_memory_usage_bytes", "Measured or reserved memory, whichever is larger", {}, snapshot["usage_mb"] * MB),
+        ("risk_admitted_sessions", "Scraper sessions holding a memory reservation", {}, len(snapshot["active_sessions"])),
+        ("risk_sessions_killed_total", "Sessions killed for exceeding the memory cap", {}, snapshot["killed_sessions"], "counter")
+    ]
+
+
+register_collector(_collect_admission_metrics)
+
+
+# Example usage
+if __name__ == "__main__":
+    import json
+
+    controller = get_admission_controller()
+    print(json.dumps(controller.snapshot(), indent=4))
+    print(f"Process tree RSS: {process_tree_rss() // MB} MB, available: {(available_memory() or 0) // MB} MB")
@@ -0,0 +1,299 @@
+"""
+Long-running assessment service: a local HTTP API in front of a persistent job queue
+(utils/job_queue.py) and a pool of worker threads that run the pipeline. Browsers (with
+RISK_BROWSER_BACKEND=cdp), concurrency limits, latency history and loaded filter/Tranco lists
+stay warm across requests instead of being rebuilt by a process per domain.
+
+    python -m utils.api_service --port 8080 --workers 2
+
+    POST /jobs                  {"domains": ["a.com", "b.com"], "profile": "fast", "then_deep": true}
+                                (also "domain", "priority", "only", "skip", "reuse_fresh") -> 202 with job ids
+    GET  /jobs?batch=&status=   recent jobs
+    GET  /jobs/<id>             job state, per-scraper progress and, once done, the score
+    GET  /jobs/<id>/events      progress events (?after=<event id> for new ones only)
+    GET  /jobs/<id>/stream      the same events as a text/event-stream until the job finishes
+    GET  /records/<domain>      the saved record
+    GET  /scores/<domain>       just the score fields of the saved record
+    GET  /related/<domain>      merchants sharing its IP, name servers, registrar or certificate (?kind=ip)
+    GET  /health, /metrics      queue counts and workers; Prometheus metrics
+
+Set RISK_API_TOKEN to require "Authorization: Bearer <token>" on every request. With `--workers 0`
+the service only accepts and reports jobs, and separate `python -m utils.worker run` processes
+(on this or other hosts, same RISK_QUEUE_URL) do the assessments.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.infra_index import INFRA_KINDS, get_infra_index
+from utils.job_queue import get_job_queue, open_job_queue
+from utils.metrics import render_metrics
+from utils.pipeline import close_browsers, load_record, select_scrapers
+from utils.priority import check_priority
+from utils.scraper_registry import DEFAULT_PROFILE, PROFILES
+from utils.worker import AssessmentWorkers
+
+DOMAIN_RE = re.compile(r"^(?=.{1,253}$)(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z0-9-]{2,63}$")
+MAX_DOMAINS_PER_REQUEST = 1000
+MAX_BODY_BYTES = 1024 * 1024
+SCORE_FIELDS = ("domain", "risk_score", "risk_category", "risk_tier", "risk_provisional", "datetime_assessment",
+                "assessment_profiles")
+STREAM_POLL_SECONDS = 0.25
+STREAM_HEARTBEAT_SECONDS = 15
+
+
+class BadRequest(ValueError):
+    """
+    Client input the service answers with a 400.
+    """
+
+
+def int_param(value, name, default, maximum=None):
+    """
+    A non-negative integer from a query parameter or header (`default` when absent), capped at `maximum`.
+    """
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be an integer, not {value!r}")
+    if number < 0:
+        raise BadRequest(f"{name} must not be negative")
+    return min(number, maximum) if maximum is not None else number
+
+
+def normalize_domain(value):
+    """
+    Lower-cased bare hostname, or None if the value isn't one (it also names the record file).
+    """
+    domain = str(value or "").strip().lower().rstrip(".")
+    if "://" in domain:
+        domain = urlparse(domain).hostname or ""
+    return domain if DOMAIN_RE.match(domain) else None
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "RiskAssessmentAPI/1.0"
+
+    # Set by `create_server`
+    queue = None
+    workers = None
+
+    def log_message(self, format, *args):
+        pass  # Jobs log their own progress
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, indent=2, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json(status, {"error": message})
+
+    def _authorized(self):
+        token = os.environ.get("RISK_API_TOKEN")
+        if token and self.headers.get("Authorization", "") != f"Bearer {token}":
+            self._error(401, "missing or invalid bearer token")
+            return False
+        return True
+
+    def _read_json(self):
+        length = int_param(self.headers.get("Content-Length"), "Content-Length", 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        try:
+            self._route_get()
+        except BadRequest as e:
+            self._error(400, str(e))
+
+    def _route_get(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts in ([], ["health"]):
+            self._send_json(200, {"status": "ok", "jobs": self.queue.counts(), **self.workers.snapshot()})
+        elif parts == ["metrics"]:
+            body = render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": self.queue.list(query.get("batch"), query.get("status"),
+                                                          int_param(query.get("limit"), "limit", 100, 1000))})
+        elif len(parts) >= 2 and parts[0] == "jobs":
+            self._get_job(parts[1], parts[2:], query)
+        elif len(parts) == 2 and parts[0] in ("records", "scores"):
+            domain = normalize_domain(parts[1])
+            record = load_record(domain) if domain else {}
+            if not record:
+                self._error(404, f"no record for {parts[1]}")
+            elif parts[0] == "scores":
+                self._send_json(200, {key: record.get(key) for key in SCORE_FIELDS})
+            else:
+                self._send_json(200, record)
+        elif len(parts) == 2 and parts[0] == "related":
+            domain = normalize_domain(parts[1])
+            kinds = [kind for kind in query.get("kind", "").split(",") if kind]
+            if not domain:
+                self._error(400, f"invalid domain {parts[1]!r}")
+            elif set(kinds) - set(INFRA_KINDS):
+                self._error(400, f"kind must be among {', '.join(INFRA_KINDS)}")
+            else:
+                limit = int_param(query.get("limit"), "limit", 100, 1000)
+                self._send_json(200, get_infra_index().related(domain, kinds=kinds or None, limit=limit))
+        else:
+            self._error(404, "not found")
+
+    def _get_job(self, job_id, rest, query):
+        job = self.queue.get(job_id)
+        if job is None:
+            self._error(404, f"no job {job_id}")
+        elif not rest:
+            self._send_json(200, {**job, "scrapers": self.queue.scraper_progress(job_id)})
+        elif rest == ["events"]:
+            self._send_json(200, {"job_id": job_id, "status": job["status"],
+                                  "events": self.queue.events(job_id, int_param(query.get("after"), "after", 0))})
+        elif rest == ["stream"]:
+            after = query.get("after") or self.headers.get("Last-Event-ID")
+            self._stream(job_id, int_param(after, "after" if query.get("after") else "Last-Event-ID", 0))
+        else:
+            self._error(404, "not found")
+
+    def _stream(self, job_id, after):
+        """
+        Server-sent events: one `event: <kind>` per progress event, until the job is done or failed.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_write = time.monotonic()
+        try:
+            while True:
+                finished = self.queue.get(job_id)["status"] in ("done", "failed")
+                for event in self.queue.events(job_id, after):
+                    after = event["id"]
+                    self.wfile.write(f"id: {event['id']}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                    last_write = time.monotonic()
+                if finished:
+                    return
+                if time.monotonic() - last_write > STREAM_HEARTBEAT_SECONDS:
+                    self.wfile.write(b": keep-alive\n\n")
+                    last_write = time.monotonic()
+                self.wfile.flush()
+                time.sleep(STREAM_POLL_SECONDS)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._error(404, "not found")
+            return
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._error(400, f"invalid JSON body: {e}")
+            return
+        if not isinstance(body, dict):
+            self._error(400, "the JSON body must be an object")
+            return
+
+        raw_domains = body.get("domains") or ([body["domain"]] if body.get("domain") else [])
+        if not isinstance(raw_domains, list) or not raw_domains:
+            self._error(400, "give `domain` or a non-empty `domains` list")
+            return
+        if len(raw_domains) > MAX_DOMAINS_PER_REQUEST:
+            self._error(400, f"at most {MAX_DOMAINS_PER_REQUEST} domains per request")
+            return
+        domains = [normalize_domain(value) for value in raw_domains]
+        invalid = [value for value, domain in zip(raw_domains, domains) if domain is None]
+        if invalid:
+            self._error(400, f"invalid domain(s): {', '.join(map(str, invalid[:10]))}")
+            return
+
+        profile = body.get("profile", DEFAULT_PROFILE)
+        if not isinstance(profile, str) or profile not in PROFILES:
+            self._error(400, f"unknown profile {profile!r} (one of {', '.join(sorted(PROFILES))})")
+            return
+        if not isinstance(body.get("priority") or "", str):
+            self._error(400, "`priority` must be a string")
+            return
+        try:
+            priority = check_priority(body.get("priority"))
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        for field in ("only", "skip"):
+            value = body.get(field)
+            if value and not (isinstance(value, list) and all(isinstance(key, str) for key in value)):
+                self._error(400, f"`{field}` must be a list of scraper names")
+                return
+        try:
+            keys = select_scrapers(body.get("only"), body.get("skip"), profile) if body.get("only") or body.get("skip") else None
+        except KeyError as e:
+            self._error(400, str(e).strip("'\""))
+            return
+
+        options = {"keys": keys, "reuse_fresh": bool(body.get("reuse_fresh")), "then_deep": bool(body.get("then_deep"))}
+        jobs = self.queue.enqueue(list(dict.fromkeys(domains)), profile, options, priority=priority)
+        self.workers.notify()
+        self._send_json(202, {"batch_id": jobs[0]["batch_id"],
+                              "jobs": [{"id": job["id"], "domain": job["domain"], "status": job["status"],
+                                        "priority": job["priority"]} for job in jobs]})
+
+
+def create_server(host="127.0.0.1", port=8080, workers=2, queue=None):
+    """
+    Builds the API server and its workers (call `workers.start()` and `server.serve_forever()`).
+    """
+    queue = queue or get_job_queue()
+    pool = AssessmentWorkers(queue, workers)
+    handler = type("BoundApiHandler", (ApiHandler,), {"queue": queue, "workers": pool})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the risk assessment API service.")
+    parser.add_argument("--host", default=os.environ.get("RISK_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RISK_API_PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("RISK_API_WORKERS", 2)),
+                        help="Domains assessed at the same time (0: leave jobs to separate workers)")
+    parser.add_argument("--queue", help="Queue URL (default RISK_QUEUE_URL, else SQLite on RISK_JOBS_DB)")
+    args = parser.parse_args()
+
+    server, workers = create_server(args.host, args.port, args.workers, open_job_queue(args.queue) if args.queue else None)
+    workers.start()
+    print(f"🚀 Risk assessment API on http://{args.host}:{server.server_address[1]} "
+          f"({args.workers} worker(s), queue {workers.queue.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down; jobs still running go back to the queue")
+    finally:
+        server.server_close()
+        workers.stop(timeout=5)
+        close_browsers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+
+from utils.cdp_driver import CDPBrowser, CDPError
+from utils.metrics import record_cache, register_collector
+from utils.priority import FairScheduler
+
+# Defaults sized for a 16 GB node: a headless Chrome costs ~150-250 MB, an extra context ~20-60 MB.
+DEFAULT_CONTEXTS_PER_BROWSER = 8
+DEFAULT_MAX_BROWSERS = 4
+DEFAULT_CONTEXTS_PER_LIFETIME = 200  # Restart a Chrome after this many lookups to shed leaked memory
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class BrowserPool:
+    """
+    Runs many isolated lookups in few Chrome processes.
+
+    Each `new_page()` gets a fresh browser context (no shared cookies, storage or cache)
+    in the least loaded Chrome. At most `contexts_per_browser` contexts are open per
+    process; new processes are started up to `max_browsers`, after which callers wait
+    for a slot, served by priority class (utils/priority.py). `page.quit()` disposes the
+    context and frees its slot.
+    """
+
+    def __init__(self, contexts_per_browser=None, max_browsers=None, contexts_per_lifetime=None, headless=True):
+        self.contexts_per_browser = contexts_per_browser or _env_int("RISK_CONTEXTS_PER_BROWSER", DEFAULT_CONTEXTS_PER_BROWSER)
+        self.max_browsers = max_browsers or _env_int("RISK_MAX_BROWSERS", DEFAULT_MAX_BROWSERS)
+        self.contexts_per_lifetime = contexts_per_lifetime or DEFAULT_CONTEXTS_PER_LIFETIME
+        self.headless = headless
+        self.entries = []     # {"browser", "active", "served", "retiring"}
+        self.launching = 0    # Processes being started (count towards max_browsers)
+        self.started = 0
+        self.condition = threading.Condition()
+        self.scheduler = FairScheduler()
+        self.closed = False
+
+    def _pick_entry(self):
+        """
+        The least loaded live process with a free slot, or None. Caller holds the lock.
+        """
+        for entry in list(self.entries):
+            if not entry["browser"].is_alive():
+                self.entries.remove(entry)
+                self._close_later(entry["browser"])
+        candidates = [e for e in self.entries if not e["retiring"] and e["active"] < self.contexts_per_browser]
+        return min(candidates, key=lambda e: e["active"]) if candidates else None
+
+    def _close_later(self, browser):
+        threading.Thread(target=browser.close, daemon=True).start()
+
+    def _reserve(self, timeout):
+        """
+        Reserves a context slot, starting a new Chrome when every process is full.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            ticket = self.scheduler.enter()
+            served = False
+            try:
+                while True:
+                    if self.closed:
+                        raise CDPError("Browser pool is closed")
+                    if self.scheduler.is_next(ticket):
+                        entry = self._pick_entry()
+                        if entry:
+                            entry["active"] += 1
+                            entry["served"] += 1
+                            served = True
+                            record_cache("browser_process", True)
+                            return entry
+                        if len(self.entries) + self.launching < self.max_browsers:
+                            self.launching += 1
+                            served = True
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise CDPError(f"No browser context free after {timeout}s")
+                    self.condition.wait(min(remaining, 1.0))
+            finally:
+                self.scheduler.leave(ticket, served)
+                self.condition.notify_all()
+
+        # Launch outside the lock so other lookups keep using the running processes
+        record_cache("browser_process", False)
+        try:
+            browser = CDPBrowser(headless=self.headless).launch()
+        except Exception:
+            with self.condition:
+                self.launching -= 1
+                self.condition.notify_all()
+            raise
+        entry = {"browser": browser, "active": 1, "served": 1, "retiring": False}
+        with self.condition:
+            self.launching -= 1
+            self.entries.append(entry)
+            self.started += 1
+            started = self.started
+            self.condition.notify_all()
+        print(f"🧭 Started pooled Chrome #{started}")
+        return entry
+
+    def _release(self, entry):
+        with self.condition:
+            entry["active"] -= 1
+            if entry["served"] >= self.contexts_per_lifetime:
+                entry["retiring"] = True
+            if entry["retiring"] and entry["active"] == 0 and entry in self.entries:
+                self.entries.remove(entry)
+                self._close_later(entry["browser"])
+            self.condition.notify_all()
+
+    def new_page(self, source=None, timeout=120):
+        """
+        Opens a tab for a source in its own fresh context. Call `quit()` on it when done.
+        """
+        entry = self._reserve(timeout)
+        context = None
+        try:
+            context = entry["browser"].new_context(on_close=lambda _: self._release(entry))
+            return context.new_page(source, owns_context=True)
+        except Exception:
+            if context is not None:
+                context.close()  # Releases the slot through on_close
+            else:
+                self._release(entry)
+            raise
+
+    def stats(self):
+        """
+        Snapshot of the pool: processes, open contexts and lookups served per process.
+        """
+        with self.condition:
+            return {
+                "browsers": len(self.entries),
+                "launching": self.launching,
+                "started": self.started,
+                "active_contexts": sum(e["active"] for e in self.entries),
+                "capacity": self.contexts_per_browser * self.max_browsers,
+                "per_browser": [{"active": e["active"], "served": e["served"], "retiring": e["retiring"]}
+                                for e in self.entries],
+                "priorities": self.scheduler.snapshot()
+            }
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            entries, self.entries = self.entries, []
+            self.condition.notify_all()
+        for entry in entries:
+            entry["browser"].close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Returns the process-wide browser pool, created on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = BrowserPool()
+        return _pool
+
+
+def close_browser_pool():
+    """
+    Shuts down every pooled Chrome. Safe to call when the pool was never used.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def _collect_pool_metrics():
+    pool = _pool
+    if pool is None:
+        return []
+    stats = pool.stats()
+    return [
+        ("risk_browser_pool_processes", "Chrome processes in the pool", {}, stats["browsers"]),
+        ("risk_browser_pool_active_contexts", "Open browser contexts", {}, stats["active_contexts"]),
+        ("risk_browser_pool_capacity", "Maximum concurrent browser contexts", {}, stats["capacity"]),
+        ("risk_browser_pool_started_total", "Chrome processes started so far", {}, stats["started"], "counter")
+    ]
+
+
+register_collector(_collect_pool_metrics)
+
+
+# Example usage: 16 concurrent lookups in a few Chrome processes
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    def lookup(n):
+        page = get_browser_pool().new_page("ssl_org")
+        try:
+            page.get("https://example.com")
+            return page.title
+        finally:
+            page.quit()
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            titles = list(executor.map(lookup, range(16)))
+        print(f"✅ {len(titles)} lookups in {time.perf_counter() - start:.1f}s", get_browser_pool().stats())
+    finally:
+        close_browser_pool()
@@ -0,0 +1,265 @@
+import os
+import re
+import time
+
+# Selenium is imported where a Selenium browser is built, so the CDP backend (utils/cdp_driver.py)
+# can use the profiles without it installed
+from utils.admission import track_driver
+from utils.metrics import phase
+from utils.source_urls import source_url
+
+# Arguments every scraper browser gets
+BASE_ARGUMENTS = ["--headless", "--disable-gpu", "--no-sandbox", "--disable-dev-shm-usage"]
+
+
+
+def _extension_patterns(*extensions):
+    # A file extension at the end of the path, with or without a query string: "*.gif" and "*.gif?*"
+    # (a bare "*.gif*" also matches hosts and paths such as gifts.example or /movies)
+    return [pattern for ext in extensions for pattern in (f"*.{ext}", f"*.{ext}?*")]
+
+
+# Resource types (Chrome DevTools names) and the URL patterns that identify them
+RESOURCE_TYPE_PATTERNS = {
+    "Image": _extension_patterns("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"),
+    "Font": _extension_patterns("woff", "woff2", "ttf", "otf", "eot"),
+    "Media": _extension_patterns("mp4", "webm", "mp3", "m3u8", "ogg", "mov")
+}
+
+# Analytics, tag managers, ads and session replay: no scraper reads anything they load
+TRACKER_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*googleadservices.com*", "*adservice.google.*", "*connect.facebook.net*", "*hotjar.com*",
+    "*segment.io*", "*segment.com/analytics*", "*optimizely.com*", "*nr-data.net*", "*newrelic.com*",
+    "*clarity.ms*", "*adnxs.com*", "*criteo.*", "*taboola.com*", "*outbrain.com*", "*quantserve.com*",
+    "*scorecardresearch.com*", "*bing.com/bat*", "*linkedin.com/px*", "*tiktok.com/i18n/pixel*"
+]
+
+DEFAULT_BLOCK_TYPES = ["Image", "Font", "Media"]
+
+# Per-source browser settings. `allow_patterns` wins over any block rule, for scripts
+# (or other resources) the page needs to render its results. Only backends that see each request
+# (the CDP backend) can honour it, so with Selenium a profile with allow patterns blocks nothing.
+# Blocking only skips requests whose content the scrapers don't use; what it saves in load time
+# and bytes hasn't been measured. Run this module to compare a source's page with and without it.
+SOURCE_PROFILES = {
+    "default": {
+        "arguments": [],
+        "block_types": [],
+        "block_patterns": [],
+        "allow_patterns": []
+    },
+    "urlvoid": {
+        "arguments": ["--ignore-certificate-errors"],
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "block_patterns": TRACKER_PATTERNS,
+        "allow_patterns": []
+    },
+    "ssl_org": {
+        "arguments": [],
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "block_patterns": TRACKER_PATTERNS,
+        "allow_patterns": []
+    },
+    "similarweb": {
+        "arguments": ["--window-size=1920,1080"],
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "block_patterns": TRACKER_PATTERNS,
+        "allow_patterns": ["*similarweb.com*", "*similarweb.io*"]
+    },
+    "mxtoolbox": {
+        "arguments": [],
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "block_patterns": TRACKER_PATTERNS,
+        "allow_patterns": []
+    },
+    "godaddy": {
+        "arguments": ["--disable-blink-features=AutomationControlled"],  # Avoid detection
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "block_types": DEFAULT_BLOCK_TYPES,
+        "block_patterns": TRACKER_PATTERNS,
+        "allow_patterns": ["*godaddy.com/*.js*", "*wsimg.com/*.js*"]
+    }
+}
+
+
+def blocking_enabled():
+    """
+    Resource blocking can be switched off with RISK_BLOCK_RESOURCES=0 (e.g. to debug a broken page).
+    """
+    return os.environ.get("RISK_BLOCK_RESOURCES", "1") != "0"
+
+
+def get_profile(source):
+    """
+    Returns the browser profile for a source, falling back to the default profile.
+    """
+    return SOURCE_PROFILES.get(source, SOURCE_PROFILES["default"])
+
+
+def url_matches(url, pattern):
+    """
+    Matches a URL against a pattern the way `Network.setBlockedURLs` does: `*` is the only wildcard.
+    """
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), url) is not None
+
+
+def _block_patterns(profile):
+    patterns = list(profile.get("block_patterns", []))
+    for kind in profile.get("block_types", []):
+        patterns.extend(RESOURCE_TYPE_PATTERNS.get(kind, []))
+    return patterns
+
+
+def should_block(profile, url, resource_type=None):
+    """
+    Decides whether a request should be blocked. Used by backends that intercept each request.
+    """
+    if any(url_matches(url, pattern) for pattern in profile.get("allow_patterns", [])):
+        return False
+    if resource_type in profile.get("block_types", []):
+        return True
+    return any(url_matches(url, pattern) for pattern in _block_patterns(profile))
+
+
+def blocked_url_patterns(profile):
+    """
+    Flattens a profile into URL patterns for `Network.setBlockedURLs`.
+    That command has no allowlist, so a profile with allow patterns gets none: blocking it there
+    could break the resources the page needs. Backends that see each request call `should_block`.
+    """
+    if profile.get("allow_patterns"):
+        return []
+    return _block_patterns(profile)
+
+
+def build_chrome_options(source, headless=True, extra_arguments=()):
+    """
+    Builds Chrome options for a source: shared arguments, the source's own arguments and user agent,
+    and content settings that stop whole resource types from loading.
+    """
+    from selenium.webdriver.chrome.options import Options
+
+    profile = get_profile(source)
+    options = Options()
+    for argument in BASE_ARGUMENTS if headless else [a for a in BASE_ARGUMENTS if a != "--headless"]:
+        options.add_argument(argument)
+    for argument in list(profile.get("arguments", [])) + list(extra_arguments):
+        options.add_argument(argument)
+    if profile.get("user_agent"):
+        options.add_argument(f"user-agent={profile['user_agent']}")
+
+    # The content setting blocks every image, so it is only used where nothing is allowlisted
+    if blocking_enabled() and "Image" in profile.get("block_types", []) and not profile.get("allow_patterns"):
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
+
+def apply_request_blocking(driver, source):
+    """
+    Installs URL blocking through the DevTools protocol. Returns the patterns installed.
+    """
+    if not blocking_enabled():
+        return []
+    patterns = blocked_url_patterns(get_profile(source))
+    if patterns:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    return patterns
+
+
+def browser_backend():
+    """
+    The browser backend: "selenium" (default) or "cdp" (experimental), set with RISK_BROWSER_BACKEND.
+    """
+    return os.environ.get("RISK_BROWSER_BACKEND", "selenium").lower()
+
+
+def create_driver(source, headless=True, extra_arguments=(), backend=None):
+    """
+    Starts a browser with the shared profile for a source (e.g. "urlvoid", "similarweb").
+
+    With the "cdp" backend this returns a tab in a fresh isolated context of a pooled Chrome,
+    driven over the DevTools protocol (see utils/cdp_driver.py and utils/browser_pool.py); it
+    supports the same calls our scrapers make on a WebDriver.
+    """
+    with phase("browser_start"):
+        if (backend or browser_backend()) == "cdp":
+            from utils.browser_pool import get_browser_pool
+            return track_driver(get_browser_pool().new_page(source))
+
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        options = build_chrome_options(source, headless=headless, extra_arguments=extra_arguments)
+        driver = track_driver(webdriver.Chrome(service=Service(), options=options))  # Use the system-installed ChromeDriver
+        try:
+            apply_request_blocking(driver, source)
+        except Exception as e:
+            print(f"⚠️ Could not install request blocking for {source}: {e}")
+        return driver
+
+
+# Page load time and bytes transferred, from the Navigation and Resource Timing APIs
+PAGE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0] || {};
+var resources = performance.getEntriesByType('resource');
+var bytes = nav.transferSize || 0;
+resources.forEach(function (r) { bytes += r.transferSize || 0; });
+return {
+    load_ms: Math.round((nav.loadEventEnd || performance.now()) - (nav.startTime || 0)),
+    dom_content_loaded_ms: Math.round((nav.domContentLoadedEventEnd || 0) - (nav.startTime || 0)),
+    transfer_bytes: bytes,
+    resource_count: resources.length
+};
+"""
+
+
+def measure_page_load(driver, url, settle=2):
+    """
+    Loads a URL and returns its load time, bytes transferred and resource count.
+    """
+    start = time.perf_counter()
+    driver.get(url)
+    time.sleep(settle)  # Let late resources finish so they are counted
+    stats = driver.execute_script(PAGE_STATS_SCRIPT) or {}
+    stats["wall_ms"] = round((time.perf_counter() - start - settle) * 1000)
+    return stats
+
+
+def compare_blocking(source, url):
+    """
+    Loads the same URL with and without the source's blocking rules and reports both measurements.
+    """
+    results = {}
+    for label, enabled in (("unblocked", "0"), ("blocked", "1")):
+        previous = os.environ.get("RISK_BLOCK_RESOURCES")
+        os.environ["RISK_BLOCK_RESOURCES"] = enabled
+        driver = create_driver(source)
+        try:
+            results[label] = measure_page_load(driver, url)
+        finally:
+            driver.quit()
+            if previous is None:
+                os.environ.pop("RISK_BLOCK_RESOURCES", None)
+            else:
+                os.environ["RISK_BLOCK_RESOURCES"] = previous
+    return results
+
+
+# Example usage: compare each lookup page with and without blocking (set RISK_FIXTURE_URL to
+# measure against the benchmark stand-in instead of the live sites)
+if __name__ == "__main__":
+    pages = {
+        "urlvoid": source_url("urlvoid", "/"),
+        "ssl_org": source_url("ssl_org", "/report/example.com"),
+        "similarweb": source_url("similarweb", "/website/example.com/"),
+        "mxtoolbox": source_url("mxtoolbox", "/emailhealth/example.com/"),
+        "godaddy": source_url("godaddy", "/whois/results.aspx?domainName=example.com")
+    }
+    for source, page_url in pages.items():
+        stats = compare_blocking(source, page_url)
+        before, after = stats["unblocked"], stats["blocked"]
+        print(f"🌐 {source:<11} load {before.get('load_ms')} -> {after.get('load_ms')} ms, "
+              f"bytes {before.get('transfer_bytes')} -> {after.get('transfer_bytes')}, "
+              f"resources {before.get('resource_count')} -> {after.get('resource_count')}")
@@ -0,0 +1,544 @@
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    from selenium.common.exceptions import NoSuchElementException
+except ImportError:  # The CDP backend does not need Selenium itself
+    class NoSuchElementException(Exception):
+        pass
+
+from utils.browser_profile import BASE_ARGUMENTS, blocking_enabled, get_profile, should_block
+
+CHROME_CANDIDATES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+# Selenium `By` strategy -> JavaScript that finds one (`many` = False) or all matching nodes under `root`
+LOCATOR_SCRIPTS = {
+    "css selector": ("root.querySelector(value)", "Array.from(root.querySelectorAll(value))"),
+    "id": ("root.querySelector('#' + CSS.escape(value))", "Array.from(root.querySelectorAll('#' + CSS.escape(value)))"),
+    "class name": ("root.querySelector('.' + CSS.escape(value))", "Array.from(root.querySelectorAll('.' + CSS.escape(value)))"),
+    "name": ("root.querySelector('[name=\"' + value + '\"]')", "Array.from(root.querySelectorAll('[name=\"' + value + '\"]'))"),
+    "tag name": ("root.querySelector(value)", "Array.from(root.querySelectorAll(value))"),
+    "xpath": (
+        "document.evaluate(value, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue",
+        "(function () { var r = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);"
+        " var out = []; for (var i = 0; i < r.snapshotLength; i++) { out.push(r.snapshotItem(i)); } return out; })()"
+    )
+}
+
+
+class CDPError(Exception):
+    """
+    Raised when Chrome reports an error for a DevTools command, or a command times out.
+    """
+
+
+class CDPConnection:
+    """
+    One websocket to Chrome's browser endpoint. Pages are reached through flattened
+    sessions, so every context and tab shares this single socket.
+    """
+
+    def __init__(self, ws_url):
+        try:
+            import websocket
+        except ImportError:
+            raise CDPError("The CDP backend needs the 'websocket-client' package (pip install websocket-client)")
+
+        self.ws = websocket.create_connection(ws_url, suppress_origin=True, enable_multithread=True)
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.listeners = {}
+        self.listener_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self.reader.start()
+
+    def send(self, method, params=None, session_id=None, timeout=30, wait=True):
+        """
+        Sends a command and waits for its result. With `wait=False` it returns immediately,
+        which is required when sending from inside an event callback.
+        """
+        message_id = next(self.ids)
+        waiter = {"event": threading.Event(), "response": None}
+        if wait:
+            with self.lock:
+                self.pending[message_id] = waiter
+        payload = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            payload["sessionId"] = session_id
+        self.ws.send(json.dumps(payload))
+        if not wait:
+            return None
+
+        if not waiter["event"].wait(timeout):
+            with self.lock:
+                self.pending.pop(message_id, None)
+            raise CDPError(f"{method} timed out after {timeout}s")
+        response = waiter["response"] or {"error": {"message": "connection closed"}}
+        if "error" in response:
+            raise CDPError(f"{method} failed: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    def on(self, method, callback, session_id=None):
+        """
+        Registers a callback for an event. Returns a handle for `off`.
+        """
+        handle = next(self.listener_ids)
+        with self.lock:
+            self.listeners[handle] = (method, session_id, callback)
+        return handle
+
+    def off(self, handle):
+        with self.lock:
+            self.listeners.pop(handle, None)
+
+    def expect(self, method, session_id=None, predicate=None):
+        """
+        Starts listening for an event before the command that triggers it is sent.
+        Returns a function that blocks until the event arrives (or raises CDPError on timeout).
+        """
+        arrived = threading.Event()
+        result = {}
+
+        def callback(params):
+            if not arrived.is_set() and (predicate is None or predicate(params)):
+                result.update(params)
+                arrived.set()
+
+        handle = self.on(method, callback, session_id)
+
+        def wait(timeout=30):
+            try:
+                if not arrived.wait(timeout):
+                    raise CDPError(f"Timed out after {timeout}s waiting for {method}")
+                return result
+            finally:
+                self.off(handle)
+
+        return wait
+
+    def _read_loop(self):
+        while not self.closed:
+            try:
+                message = json.loads(self.ws.recv())
+            except Exception:
+                break
+            if "id" in message:
+                with self.lock:
+                    waiter = self.pending.pop(message["id"], None)
+                if waiter:
+                    waiter["response"] = message
+                    waiter["event"].set()
+                continue
+            with self.lock:
+                listeners = list(self.listeners.values())
+            for method, session_id, callback in listeners:
+                if method == message.get("method") and session_id in (None, message.get("sessionId")):
+                    try:
+                        callback(message.get("params", {}))
+                    except Exception as e:
+                        print(f"⚠️ CDP event handler failed for {method}: {e}")
+
+        # Wake up everything still waiting; `send` reports the closed connection
+        self.closed = True
+        with self.lock:
+            waiters, self.pending = list(self.pending.values()), {}
+        for waiter in waiters:
+            waiter["event"].set()
+
+    def close(self):
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+
+def find_chrome_binary():
+    """
+    Locates Chrome: the CHROME_BINARY environment variable, else the first browser found on PATH.
+    """
+    if os.environ.get("CHROME_BINARY"):
+        return os.environ["CHROME_BINARY"]
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CDPError("Chrome not found; set CHROME_BINARY")
+
+
+class CDPBrowser:
+    """
+    A Chrome process we launch ourselves and drive over the DevTools protocol, without chromedriver.
+    Each `new_context()` is an isolated browser context (separate cookies, storage and cache).
+    """
+
+    def __init__(self, chrome_binary=None, headless=True, extra_arguments=()):
+        self.chrome_binary = chrome_binary
+        self.headless = headless
+        self.extra_arguments = list(extra_arguments)
+        self.process = None
+        self.connection = None
+        self.user_data_dir = None
+
+    def launch(self, timeout=20):
+        self.user_data_dir = tempfile.mkdtemp(prefix="risk-cdp-")
+        arguments = [a for a in BASE_ARGUMENTS if a != "--headless"]
+        if self.headless:
+            arguments.append("--headless=new")
+        command = [
+            self.chrome_binary or find_chrome_binary(), *arguments, *self.extra_arguments,
+            "--remote-debugging-port=0", f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run", "--no-default-browser-check", "about:blank"
+        ]
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+        # Chrome prints the browser websocket URL on stderr once it is ready
+        deadline = time.monotonic() + timeout
+        ws_url = None
+        while time.monotonic() < deadline:
+            line = self.process.stderr.readline()
+            if not line and self.process.poll() is not None:
+                break
+            if "DevTools listening on" in line:
+                ws_url = line.split("DevTools listening on", 1)[1].strip()
+                break
+        if not ws_url:
+            self.close()
+            raise CDPError("Chrome did not expose a DevTools endpoint")
+
+        # Keep draining stderr so Chrome never blocks on a full pipe
+        threading.Thread(target=lambda: [None for _ in self.process.stderr], daemon=True).start()
+        self.connection = CDPConnection(ws_url)
+        return self
+
+    def is_alive(self):
+        return (self.process is not None and self.process.poll() is None
+                and self.connection is not None and not self.connection.closed)
+
+    def new_context(self, on_close=None):
+        result = self.connection.send("Target.createBrowserContext", {"disposeOnDetach": True})
+        return CDPContext(self, result["browserContextId"], on_close=on_close)
+
+    def close(self):
+        if self.connection and not self.connection.closed:
+            try:
+                self.connection.send("Browser.close", timeout=5)
+            except Exception:
+                pass
+            self.connection.close()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class CDPContext:
+    """
+    An isolated browser context; disposing it drops all of its tabs, cookies and storage.
+    """
+
+    def __init__(self, browser, context_id, on_close=None):
+        self.browser = browser
+        self.context_id = context_id
+        self.on_close = on_close
+        self.closed = False
+
+    def new_page(self, source=None, owns_context=False):
+        connection = self.browser.connection
+        target_id = connection.send("Target.createTarget", {"url": "about:blank", "browserContextId": self.context_id})["targetId"]
+        session_id = connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})["sessionId"]
+        page = CDPPage(connection, session_id, target_id, context=self if owns_context else None)
+        page.browser_pid = self.browser.process.pid
+        page.setup(source)
+        return page
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.browser.connection.send("Target.disposeBrowserContext", {"browserContextId": self.context_id}, timeout=10)
+        except Exception:
+            pass
+        if self.on_close:
+            self.on_close(self)
+
+
+class CDPElement:
+    """
+    A DOM node held by its remote object id. Mirrors the WebElement calls our scrapers make.
+    """
+
+    def __init__(self, page, object_id):
+        self.page = page
+        self.object_id = object_id
+
+    def call(self, function, *args):
+        return self.page.call_function(self.object_id, function, *args)
+
+    @property
+    def text(self):
+        return self.call("function () { return ((this.innerText || this.textContent || '') + '').trim(); }")
+
+    def get_attribute(self, name):
+        # Like Selenium: prefer the (resolved) property, fall back to the attribute
+        return self.call("function (n) { var v = this[n]; if (v === undefined || v === null || typeof v === 'object')"
+                         " { v = this.getAttribute(n); } return v === null ? null : String(v); }", name)
+
+    def is_displayed(self):
+        return self.call("function () { var r = this.getBoundingClientRect(); var s = getComputedStyle(this);"
+                         " return r.width > 0 && r.height > 0 && s.visibility !== 'hidden' && s.display !== 'none'; }")
+
+    def is_enabled(self):
+        return self.call("function () { return !this.disabled; }")
+
+    def clear(self):
+        self.call("function () { this.value = ''; this.dispatchEvent(new Event('input', {bubbles: true})); }")
+
+    def send_keys(self, text):
+        self.call("function () { this.focus(); }")
+        self.page.send("Input.insertText", {"text": text})
+
+    def click(self):
+        self.page.click_object(self.object_id)
+
+    def find_element(self, by, value):
+        return self.page.find_element(by, value, root=self)
+
+    def find_elements(self, by, value):
+        return self.page.find_elements(by, value, root=self)
+
+
+class CDPPage:
+    """
+    One tab, driven directly over CDP. Implements the subset of the WebDriver API our scrapers use
+    (get, page_source, title, execute_script, find_element(s), quit) plus event-based waits.
+    """
+
+    def __init__(self, connection, session_id, target_id, context=None):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+        self.context = context
+        self.browser_pid = None
+        self.profile = None
+        self.blocked_requests = 0
+        self.fetch_handle = None
+        # Remote objects (elements found, evaluated handles) are held in one group per tab, so they
+        # can all be released together instead of living as long as the page's JavaScript context
+        self.object_group = f"risk-{target_id}"
+
+    def send(self, method, params=None, timeout=30):
+        return self.connection.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    def setup(self, source=None):
+        self.send("Page.enable")
+        self.send("Page.setLifecycleEventsEnabled", {"enabled": True})
+        if source is None:
+            return
+        self.profile = get_profile(source)
+
+        if self.profile.get("user_agent"):
+            self.send("Network.setUserAgentOverride", {"userAgent": self.profile["user_agent"]})
+        for argument in self.profile.get("arguments", []):
+            if argument.startswith("--window-size="):
+                width, height = (int(v) for v in argument.split("=", 1)[1].split(","))
+                self.send("Emulation.setDeviceMetricsOverride",
+                          {"width": width, "height": height, "deviceScaleFactor": 1, "mobile": False})
+
+        # Real request interception: every request is checked against the profile, allowlist included
+        if blocking_enabled() and (self.profile.get("block_types") or self.profile.get("block_patterns")):
+            self.fetch_handle = self.connection.on("Fetch.requestPaused", self._on_request_paused, self.session_id)
+            self.send("Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Request"}]})
+
+    def _on_request_paused(self, params):
+        # Runs on the reader thread, so commands must not wait for their replies
+        request_id = params["requestId"]
+        if should_block(self.profile, params["request"]["url"], params.get("resourceType")):
+            self.blocked_requests += 1
+            self.connection.send("Fetch.failRequest", {"requestId": request_id, "errorReason": "BlockedByClient"},
+                                 session_id=self.session_id, wait=False)
+        else:
+            self.connection.send("Fetch.continueRequest", {"requestId": request_id},
+                                 session_id=self.session_id, wait=False)
+
+    # --- Navigation -------------------------------------------------------
+
+    def get(self, url, wait_until="load", timeout=30):
+        """
+        Navigates and waits for an event: "load", "domcontentloaded", "networkidle" or None (no wait).
+        """
+        events = {
+            "load": ("Page.loadEventFired", None),
+            "domcontentloaded": ("Page.domContentEventFired", None),
+            "networkidle": ("Page.lifecycleEvent", lambda p: p.get("name") == "networkIdle")
+        }
+        waiter = None
+        if wait_until:
+            method, predicate = events[wait_until]
+            waiter = self.connection.expect(method, self.session_id, predicate)
+        result = self.send("Page.navigate", {"url": url}, timeout=timeout)
+        if result.get("errorText"):
+            raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+        if waiter:
+            waiter(timeout)
+
+    def wait_for_network_idle(self, timeout=30):
+        """
+        Blocks until Chrome reports the current page's network as idle.
+        """
+        self.connection.expect("Page.lifecycleEvent", self.session_id, lambda p: p.get("name") == "networkIdle")(timeout)
+
+    def wait_for_selector(self, selector, timeout=10):
+        """
+        Waits inside the page with a MutationObserver (no polling round trips). Returns True if found.
+        """
+        script = """
+        var selector = arguments[0], timeoutMs = arguments[1];
+        return new Promise(function (resolve) {
+            if (document.querySelector(selector)) { return resolve(true); }
+            var observer = new MutationObserver(function () {
+                if (document.querySelector(selector)) { observer.disconnect(); resolve(true); }
+            });
+            observer.observe(document, {childList: true, subtree: true, attributes: true});
+            setTimeout(function () { observer.disconnect(); resolve(!!document.querySelector(selector)); }, timeoutMs);
+        });
+        """
+        return bool(self.execute_script(script, selector, int(timeout * 1000)))
+
+    # --- Script evaluation ------------------------------------------------
+
+    def evaluate(self, expression, timeout=30):
+        """
+        Evaluates an expression in the page and returns its JSON value (promises are awaited).
+        """
+        result = self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True, "awaitPromise": True,
+                                                "objectGroup": self.object_group}, timeout=timeout)
+        if result.get("exceptionDetails"):
+            raise CDPError(f"Script error: {result['exceptionDetails'].get('exception', {}).get('description', result['exceptionDetails'].get('text'))}")
+        return result.get("result", {}).get("value")
+
+    def execute_script(self, script, *args):
+        """
+        WebDriver-compatible: runs a function body with `arguments`, returning its JSON value.
+        """
+        return self.evaluate(f"(function () {{\n{script}\n}}).apply(null, {json.dumps(list(args))})")
+
+    def call_function(self, object_id, function, *args, by_value=True):
+        result = self.send("Runtime.callFunctionOn", {
+            "objectId": object_id, "functionDeclaration": function,
+            "arguments": [{"value": a} for a in args], "returnByValue": by_value, "awaitPromise": True,
+            "objectGroup": self.object_group
+        })
+        if result.get("exceptionDetails"):
+            raise CDPError(f"Script error: {result['exceptionDetails'].get('text')}")
+        return result.get("result", {}).get("value") if by_value else result.get("result", {})
+
+    @property
+    def page_source(self):
+        return self.evaluate("document.documentElement ? document.documentElement.outerHTML : ''")
+
+    @property
+    def title(self):
+        return self.evaluate("document.title")
+
+    @property
+    def current_url(self):
+        return self.evaluate("location.href")
+
+    # --- Elements ---------------------------------------------------------
+
+    def _root_object(self, root):
+        if root is not None:
+            return root.object_id
+        return self.send("Runtime.evaluate", {"expression": "document", "objectGroup": self.object_group})["result"]["objectId"]
+
+    def find_elements(self, by, value, root=None):
+        many = LOCATOR_SCRIPTS[by][1]
+        array = self.call_function(self._root_object(root), f"function (value) {{ var root = this; return {many}; }}", value, by_value=False)
+        if not array.get("objectId"):
+            return []
+        properties = self.send("Runtime.getProperties", {"objectId": array["objectId"], "ownProperties": True})["result"]
+        return [CDPElement(self, p["value"]["objectId"]) for p in properties
+                if p["name"].isdigit() and p.get("value", {}).get("objectId")]
+
+    def find_element(self, by, value, root=None):
+        one = LOCATOR_SCRIPTS[by][0]
+        node = self.call_function(self._root_object(root), f"function (value) {{ var root = this; return {one}; }}", value, by_value=False)
+        if not node.get("objectId"):
+            raise NoSuchElementException(f"No element for {by}={value}")
+        return CDPElement(self, node["objectId"])
+
+    def click_object(self, object_id):
+        box = self.call_function(object_id, "function () { this.scrollIntoView({block: 'center'});"
+                                 " var r = this.getBoundingClientRect(); return [r.left + r.width / 2, r.top + r.height / 2, r.width * r.height]; }")
+        if not box or not box[2]:
+            self.call_function(object_id, "function () { this.click(); }")
+            return
+        for event in ("mousePressed", "mouseReleased"):
+            self.send("Input.dispatchMouseEvent", {"type": event, "x": box[0], "y": box[1], "button": "left", "clickCount": 1})
+
+    def click(self, selector):
+        self.find_element("css selector", selector).click()
+
+    def type(self, selector, text, clear=True):
+        element = self.find_element("css selector", selector)
+        if clear:
+            element.clear()
+        element.send_keys(text)
+
+    def heap_usage(self):
+        """
+        Bytes of JavaScript heap this tab has allocated: which context is heaviest in a shared Chrome.
+        """
+        return self.send("Runtime.getHeapUsage", timeout=5)["totalSize"]
+
+    # --- Lifecycle --------------------------------------------------------
+
+    def release_objects(self):
+        """
+        Releases every remote object this tab handed out; CDPElements found before are invalid after.
+        """
+        try:
+            self.send("Runtime.releaseObjectGroup", {"objectGroup": self.object_group}, timeout=5)
+        except Exception:
+            pass  # The tab or its browser is already gone
+
+    def quit(self):
+        self.release_objects()
+        if self.fetch_handle:
+            self.connection.off(self.fetch_handle)
+            self.fetch_handle = None
+        if self.context is not None:
+            self.context.close()  # Also closes this tab
+        else:
+            try:
+                self.connection.send("Target.closeTarget", {"targetId": self.target_id}, timeout=10)
+            except Exception:
+                pass
+
+    close = quit
+
+
+# Example usage (see utils/browser_pool.py for running many contexts concurrently)
+if __name__ == "__main__":
+    browser = CDPBrowser().launch()
+    try:
+        page = browser.new_context().new_page("ssl_org", owns_context=True)
+        page.get("https://example.com", wait_until="networkidle")
+        print(page.title, len(page.page_source), "blocked:", page.blocked_requests)
+        page.quit()
+    finally:
+        browser.close()
@@ -0,0 +1,280 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import register_collector
+from utils.priority import FairScheduler, current_priority, fair_wait
+from utils.tracing import span
+
+# Per-source limits: where each source's concurrency starts and the range it may move in.
+# Slow or heavily rate-limited lookup sites start low and stay low.
+SOURCE_LIMITS = {
+    "scrape_mxtoolbox": {"initial": 1, "max": 2},
+    "scrape_godaddy_whois": {"initial": 1, "max": 2},
+    "scrape_similarweb_data": {"initial": 1, "max": 3},
+    "check_social_presence": {"initial": 1, "max": 3},
+    "scrape_urlvoid": {"initial": 2, "max": 4},
+    "scrape_google_safe_browsing": {"initial": 2, "max": 4},
+    "scrape_ipvoid": {"initial": 4, "max": 16},
+    "get_whois_data": {"initial": 4, "max": 16},
+    "scrape_page_size": {"initial": 4, "max": 16},
+    "check_privacy_term": {"initial": 4, "max": 12},
+    "check_popups_ads": {"initial": 4, "max": 12},
+    # Fast tier: the merchant's own host or local files, never a shared lookup site
+    "probe_tls": {"initial": 8, "max": 32},
+    "probe_homepage": {"initial": 8, "max": 32},
+    "lookup_local_lists": {"initial": 16, "max": 64}
+}
+DEFAULT_LIMITS = {"initial": 2, "max": 8}
+
+# Outcomes that mean "slow down": the source is rate limiting, challenging or not answering
+BACKOFF_OUTCOMES = {"throttled", "timeout"}
+
+THROTTLE_RE = re.compile(r"\b429\b|too many requests|rate.?limit|captcha|are you a robot|access denied|\b403\b|blocked",
+                         re.IGNORECASE)
+TIMEOUT_RE = re.compile(r"timed? ?out|timeout", re.IGNORECASE)
+
+
+def classify_outcome(result=None, error=None):
+    """
+    Classifies a scraper call for the controller: "ok", "throttled", "timeout" or "error".
+    Scrapers report failures as {"error": ...} dicts, so both exceptions and results are checked.
+    """
+    message = ""
+    if error is not None:
+        message = f"{type(error).__name__}: {error}"
+    elif isinstance(result, dict) and result.get("error"):
+        message = str(result["error"])
+    elif result is None:
+        return "error"
+    if not message:
+        return "ok"
+    if THROTTLE_RE.search(message):
+        return "throttled"
+    if TIMEOUT_RE.search(message):
+        return "timeout"
+    return "error"
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit for one source.
+
+    Every successful call adds `increase / limit`, so the limit grows by about `increase` per full
+    window of calls. A throttled or timed-out call multiplies it by `decrease`, at most once per
+    window, so a burst of failures from the same overload counts once. Calls much slower than the
+    source's best observed latency hold the limit instead of growing it.
+
+    When callers queue for a slot, the limiter's FairScheduler picks who goes next by priority class.
+    """
+
+    def __init__(self, name, initial=2, min_limit=1, max_limit=8, increase=1.0, decrease=0.5, latency_tolerance=2.0):
+        self.name = name
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.inflight = 0
+        self.condition = threading.Condition()
+        self.scheduler = FairScheduler()
+        self.best_latency = None
+        self.avg_latency = None
+        self.last_decrease = 0.0
+        self.counts = {"ok": 0, "throttled": 0, "timeout": 0, "error": 0}
+        self.last_change = None
+
+    @property
+    def current_limit(self):
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self, timeout=None):
+        deadline = time.monotonic() + timeout if timeout else None
+        with self.condition:
+            fair_wait(self.condition, self.scheduler, lambda: self.inflight < self.current_limit, deadline,
+                      f"No {self.name} slot free after {timeout}s")
+            self.inflight += 1
+
+    def release(self, outcome, latency):
+        with self.condition:
+            self.inflight -= 1
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            before = self.current_limit
+            now = time.monotonic()
+
+            if outcome in BACKOFF_OUTCOMES:
+                # One cut per window: ignore failures from calls that started before the last cut
+                window = self.avg_latency or latency
+                if now - self.last_decrease >= window:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self.last_decrease = now
+                    self.last_change = f"cut on {outcome}"
+            elif outcome == "ok":
+                self.best_latency = latency if self.best_latency is None else min(self.best_latency, latency)
+                self.avg_latency = latency if self.avg_latency is None else self.avg_latency * 0.8 + latency * 0.2
+                if latency <= self.best_latency * self.latency_tolerance or latency < 1.0:
+                    self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+                    if self.current_limit > before:
+                        self.last_change = "raised while healthy"
+                else:
+                    self.last_change = "held: latency above baseline"
+            self.condition.notify_all()
+
+    def snapshot(self):
+        with self.condition:
+            return {
+                "limit": self.current_limit,
+                "limit_exact": round(self.limit, 2),
+                "inflight": self.inflight,
+                "max": self.max_limit,
+                "best_latency_s": round(self.best_latency, 3) if self.best_latency is not None else None,
+                "avg_latency_s": round(self.avg_latency, 3) if self.avg_latency is not None else None,
+                "outcomes": dict(self.counts),
+                "last_change": self.last_change,
+                "priorities": self.scheduler.snapshot()
+            }
+
+
+def default_global_limit():
+    """
+    Global cap on concurrent scraper calls: RISK_GLOBAL_CONCURRENCY, else 2 per CPU core
+    (lookups mostly wait on the network, but each browser still needs CPU to render).
+    """
+    try:
+        return int(os.environ["RISK_GLOBAL_CONCURRENCY"])
+    except (KeyError, ValueError):
+        return max(2, (os.cpu_count() or 1) * 2)
+
+
+class ConcurrencyController:
+    """
+    A global cap plus one AIMD limiter per source. Use `slot(source)` around each call.
+    Both are handed out by priority class (utils/priority.py) when callers have to queue.
+    """
+
+    def __init__(self, global_limit=None):
+        self.global_limit = global_limit or default_global_limit()
+        self.global_inflight = 0
+        self.global_condition = threading.Condition()
+        self.global_scheduler = FairScheduler()
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, source):
+        with self.lock:
+            if source not in self.limiters:
+                limits = SOURCE_LIMITS.get(source, DEFAULT_LIMITS)
+                self.limiters[source] = AIMDLimiter(source, initial=limits["initial"],
+                                                    max_limit=min(limits["max"], self.global_limit))
+            return self.limiters[source]
+
+    @contextmanager
+    def slot(self, source):
+        """
+        Holds a source slot and a global slot for the `with` block. Set `call["outcome"]` inside
+        the block to override the default classification ("ok", or "error" on an exception), and
+        `call["latency"]` when the slot is held longer than the call it measures.
+        """
+        limiter = self.limiter(source)
+        with span("concurrency_wait", "queue", source=source, priority=current_priority()):
+            limiter.acquire()  # Source first, so a throttled source never holds global slots while it waits
+            with self.global_condition:
+                fair_wait(self.global_condition, self.global_scheduler, lambda: self.global_inflight < self.global_limit)
+                self.global_inflight += 1
+        call = {"outcome": None, "latency": None}
+        start = time.monotonic()
+        try:
+            yield call
+        except BaseException as e:
+            call["outcome"] = call["outcome"] or classify_outcome(error=e)
+            raise
+        finally:
+            with self.global_condition:
+                self.global_inflight -= 1
+                self.global_condition.notify_all()
+            limiter.release(call["outcome"] or "ok", call["latency"] or time.monotonic() - start)
+
+    def run(self, source, func, *args, **kwargs):
+        """
+        Runs `func` in a slot and classifies its result to drive the source's limit.
+        """
+        with self.slot(source) as call:
+            result = func(*args, **kwargs)
+            call["outcome"] = classify_outcome(result)
+            return result
+
+    def snapshot(self):
+        with self.lock:
+            limiters = dict(self.limiters)
+        with self.global_condition:
+            inflight = self.global_inflight
+            priorities = self.global_scheduler.snapshot()
+        return {
+            "global_limit": self.global_limit,
+            "global_inflight": inflight,
+            "global_priorities": priorities,
+            "sources": {name: limiter.snapshot() for name, limiter in sorted(limiters.items())}
+        }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_concurrency_controller():
+    """
+    Returns the process-wide concurrency controller, created on first use.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = ConcurrencyController()
+        return _controller
+
+
+def concurrency_snapshot():
+    """
+    Current global and per-source limits, for metrics and logs.
+    """
+    return get_concurrency_controller().snapshot()
+
+
+def _collect_concurrency_metrics():
+    if _controller is None:
+        return []
+    snapshot = _controller.snapshot()
+    samples = [
+        ("risk_concurrency_global_limit", "Global cap on concurrent scraper calls", {}, snapshot["global_limit"]),
+        ("risk_concurrency_global_inflight", "Scraper calls running", {}, snapshot["global_inflight"])
+    ]
+    for priority, counts in snapshot["global_priorities"].items():
+        samples.append(("risk_concurrency_waiting", "Scraper calls waiting for a global slot per priority class",
+                        {"priority": priority}, counts["waiting"]))
+    for source, limits in snapshot["sources"].items():
+        samples.append(("risk_concurrency_limit", "Current AIMD concurrency limit per source", {"source": source}, limits["limit"]))
+        samples.append(("risk_concurrency_inflight", "Calls running per source", {"source": source}, limits["inflight"]))
+    return samples
+
+
+register_collector(_collect_concurrency_metrics)
+
+
+# Example usage: a source that starts throttling under load
+if __name__ == "__main__":
+    import json
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    controller = ConcurrencyController(global_limit=8)
+
+    def fake_lookup(n):
+        inflight = controller.limiter("demo").inflight
+        time.sleep(random.uniform(0.05, 0.1))
+        return {"error": "HTTP 429 Too Many Requests"} if inflight > 4 else {"ok": n}
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda n: controller.run("demo", fake_lookup, n), range(200)))
+    print(json.dumps(controller.snapshot(), indent=4))
@@ -0,0 +1,111 @@
+# Batched DOM extraction.
+#
+# A scraper declares a field map once and gets every value back from a single
+# `execute_script` round trip (or a single parse of `page_source`), instead of
+# one WebDriver call per `find_element`.
+#
+# Field map format:
+#     {
+#         "name": {"selector": "span#title-domainName + span.contact-label"},
+#         "logo": {"selector": "img.logo", "attr": "src"},
+#         "name_servers": {"selector": "p.contact-label", "all": True},
+#         "rows": {"selector": "table tr", "all": True, "fields": {
+#             "cells": {"selector": ":scope > td", "all": True}
+#         }}
+#     }
+#
+# `attr` is "text" (default), "html", or any attribute name. `all` returns a list.
+# `fields` extracts a nested map from each matched element. Missing values use `default` (None).
+
+from bs4 import BeautifulSoup
+
+# Runs the whole field map inside the page and returns one JSON-serializable object.
+EXTRACT_SCRIPT = """
+function valueOf(el, attr) {
+    if (!attr || attr === 'text') { return ((el.innerText || el.textContent || '') + '').replace(/\\s+/g, ' ').trim(); }
+    if (attr === 'html') { return el.innerHTML; }
+    var value = el.getAttribute(attr);
+    return value === null ? null : value.trim();
+}
+function extract(root, fieldMap) {
+    var out = {};
+    Object.keys(fieldMap).forEach(function (name) {
+        var spec = fieldMap[name];
+        var fallback = spec.hasOwnProperty('default') ? spec['default'] : null;
+        var found;
+        try {
+            found = spec.all ? Array.prototype.slice.call(root.querySelectorAll(spec.selector))
+                             : [root.querySelector(spec.selector)].filter(Boolean);
+        } catch (e) {
+            found = [];
+        }
+        var values = found.map(function (el) { return spec.fields ? extract(el, spec.fields) : valueOf(el, spec.attr); });
+        out[name] = spec.all ? values : (values.length ? values[0] : fallback);
+    });
+    return out;
+}
+var root = arguments[1] ? document.querySelector(arguments[1]) : document;
+return root ? extract(root, arguments[0]) : null;
+"""
+
+
+def extract_fields(driver, field_map, root_selector=None):
+    """
+    Extracts every field in one `execute_script` call.
+
+    Returns:
+        dict | None: Field name -> value, or None if `root_selector` matched nothing.
+    """
+    return driver.execute_script(EXTRACT_SCRIPT, field_map, root_selector)
+
+
+def _value_of(element, attr):
+    if not attr or attr == "text":
+        return " ".join(element.get_text(" ").split())
+    if attr == "html":
+        return element.decode_contents()
+    value = element.get(attr)
+    if isinstance(value, list):  # bs4 returns multi-valued attributes such as class as lists
+        value = " ".join(value)
+    return value.strip() if value is not None else None
+
+
+def _extract_soup(root, field_map):
+    out = {}
+    for name, spec in field_map.items():
+        try:
+            found = root.select(spec["selector"]) if spec.get("all") else [e for e in [root.select_one(spec["selector"])] if e]
+        except Exception:
+            found = []
+        values = [_extract_soup(e, spec["fields"]) if spec.get("fields") else _value_of(e, spec.get("attr")) for e in found]
+        out[name] = values if spec.get("all") else (values[0] if values else spec.get("default"))
+    return out
+
+
+def extract_fields_from_html(html, field_map, root_selector=None):
+    """
+    Extracts every field from HTML (e.g. `driver.page_source`) with a single parse.
+    Uses lxml when it is installed, otherwise Python's html.parser.
+
+    Returns:
+        dict | None: Field name -> value, or None if `root_selector` matched nothing.
+    """
+    try:
+        soup = BeautifulSoup(html, "lxml")
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+    root = soup.select_one(root_selector) if root_selector else soup
+    return _extract_soup(root, field_map) if root is not None else None
+
+
+def table_rows_to_dict(rows, key_transform=None):
+    """
+    Turns two-column rows (as extracted with a "cells" list per row) into a key -> value dict.
+    """
+    data = {}
+    for row in rows or []:
+        cells = row.get("cells") or []
+        if len(cells) == 2:
+            key = key_transform(cells[0]) if key_transform else cells[0]
+            data[key] = cells[1]
+    return data
@@ -0,0 +1,266 @@
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.job_queue import DEFAULT_LEASE_SECONDS, JOB_STATES, BaseJobQueue, _now, max_attempts, new_job
+from utils.priority import DEFAULT_PRIORITY, effective_rank
+
+# Job queue in a plain directory, for worker hosts that share a filesystem (NFS, SMB, a bind mount)
+# but no database server. Layout:
+#   jobs/<id>.json           the job document, replaced atomically on every change
+#   ready/<time>-<class>-<id>  empty marker per waiting job; claimed by aged priority class, then time
+#   leased/<id>              marker per claimed job. Claiming is an atomic rename ready -> leased,
+#                            so exactly one worker wins each job
+#   events/<id>.jsonl        the job's progress events
+#   rates/<source>.json      next free call slot per rate-limited source
+#   locks/                   flock files serialising read-modify-write of a job or rate
+# Unlike the SQLite backend, two jobs for the same domain may run at once.
+
+
+def _marker_name(job):
+    # Named by first enqueue time, so a job whose lease expired keeps its place at the front
+    return f"{job['enqueued_at']:017.6f}-{job.get('priority', DEFAULT_PRIORITY)}-{job['id']}"
+
+
+def _parse_marker(name):
+    """
+    (enqueued_at, priority, job id) of a ready marker.
+    """
+    parts = name.split("-")
+    return float(parts[0]), parts[1] if len(parts) == 3 else DEFAULT_PRIORITY, parts[-1]
+
+
+class FileJobQueue(BaseJobQueue):
+    """
+    Directory-backed job queue (see the module comment for the layout).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.url = f"file://{os.path.abspath(root)}"
+        for name in ("jobs", "ready", "leased", "events", "rates", "locks"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    @contextmanager
+    def _locked(self, name):
+        """
+        Exclusive lock shared with every process and host using the directory.
+        """
+        with open(self._path("locks", f"{name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_json(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def _load(self, job_id):
+        try:
+            with open(self._path("jobs", f"{job_id}.json")) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job):
+        self._write_json(self._path("jobs", f"{job['id']}.json"), job)
+
+    def _requeue_marker(self, job):
+        try:
+            os.rename(self._path("leased", job["id"]), self._path("ready", _marker_name(job)))
+        except FileNotFoundError:
+            pass
+
+    def _drop_lease_marker(self, job_id):
+        try:
+            os.remove(self._path("leased", job_id))
+        except FileNotFoundError:
+            pass
+
+    def _expire_leases(self):
+        now = time.time()
+        for job_id in os.listdir(self._path("leased")):
+            with self._locked(job_id):
+                job = self._load(job_id)
+                if job is None:
+                    continue
+                if job["status"] == "queued":
+                    # A claimer died between taking the marker and recording the claim
+                    marker = self._path("leased", job_id)
+                    if os.path.exists(marker) and now - os.path.getmtime(marker) > DEFAULT_LEASE_SECONDS:
+                        self._requeue_marker(job)
+                    continue
+                if job["status"] != "running" or (job["lease_expires_at"] or 0) >= now:
+                    continue
+                if job["attempts"] >= max_attempts():
+                    error = f"lease expired on {job['attempts']} attempt(s); last worker {job['worker']}"
+                    job.update(status="failed", error=error, finished_at=_now(), lease_expires_at=None)
+                    self._save(job)
+                    self._drop_lease_marker(job_id)
+                    self._append_event(job_id, "failed", None, {"error": error})
+                else:
+                    self._append_event(job_id, "lease_expired", None, {"worker": job["worker"]})
+                    job.update(status="queued", worker=None, lease_expires_at=None)
+                    self._save(job)
+                    self._requeue_marker(job)
+
+    def enqueue(self, domains, profile, options=None, batch_id=None, priority=None):
+        batch_id = batch_id or uuid.uuid4().hex
+        created_at = _now()
+        jobs = [new_job(domain, profile, options, batch_id, created_at, priority) for domain in domains]
+        for job in jobs:
+            job["enqueued_at"] = time.time()
+            self._save(job)
+            self._append_event(job["id"], "queued", None, {})
+            open(self._path("ready", _marker_name(job)), "w").close()  # Visible only once the document exists
+        return jobs
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, priorities=None):
+        self._expire_leases()
+        now = time.time()
+        candidates = []
+        for name in os.listdir(self._path("ready")):
+            enqueued_at, priority, job_id = _parse_marker(name)
+            if not priorities or priority in priorities:
+                candidates.append((effective_rank(priority, now - enqueued_at), enqueued_at, name, job_id))
+        for _, _, name, job_id in sorted(candidates):
+            try:
+                os.rename(self._path("ready", name), self._path("leased", job_id))
+            except FileNotFoundError:
+                continue  # Another worker took it
+            os.utime(self._path("leased", job_id))
+            with self._locked(job_id):
+                job = self._load(job_id)
+                if job is None:
+                    self._drop_lease_marker(job_id)
+                    continue
+                job.update(status="running", worker=worker, attempts=job["attempts"] + 1, started_at=_now(),
+                           lease_expires_at=time.time() + lease_seconds)
+                self._save(job)
+                self._append_event(job_id, "started", None, {"worker": worker})
+            return job
+        return None
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        with self._locked(job_id):
+            job = self._load(job_id)
+            if not job or job["status"] != "running" or job["worker"] != worker:
+                return False
+            job["lease_expires_at"] = time.time() + lease_seconds
+            self._save(job)
+            return True
+
+    def release(self, job_id, worker):
+        with self._locked(job_id):
+            job = self._load(job_id)
+            if not job or job["status"] != "running" or job["worker"] != worker:
+                return False
+            job.update(status="queued", worker=None, lease_expires_at=None, attempts=max(job["attempts"] - 1, 0))
+            self._save(job)
+            self._append_event(job_id, "released", None, {"worker": worker})
+            self._requeue_marker(job)
+            return True
+
+    def finish(self, job_id, result=None, error=None, worker=None):
+        status = "failed" if error else "done"
+        with self._locked(job_id):
+            job = self._load(job_id)
+            if not job or job["status"] != "running" or (worker is not None and job["worker"] != worker):
+                return False
+            job.update(status=status, error=error, result=result, finished_at=_now(), lease_expires_at=None)
+            self._save(job)
+            self._drop_lease_marker(job_id)
+            self._append_event(job_id, status, None, {"error": error} if error else result or {})
+            return True
+
+    def _append_event(self, job_id, kind, source, detail):
+        path = self._path("events", f"{job_id}.jsonl")
+        with open(path, "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.write(json.dumps({"at": _now(), "kind": kind, "source": source, "detail": detail}, default=str) + "\n")
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def add_event(self, job_id, kind, source=None, **detail):
+        self._append_event(job_id, kind, source, detail)
+
+    def get(self, job_id):
+        if not all(c.isalnum() for c in str(job_id)):
+            return None  # Job ids are hex; anything else is not a file we should open
+        return self._load(job_id)
+
+    def _all_jobs(self):
+        jobs = []
+        for name in os.listdir(self._path("jobs")):
+            if name.endswith(".json"):
+                job = self._load(name[:-len(".json")])
+                if job:
+                    jobs.append(job)
+        return jobs
+
+    def list(self, batch_id=None, status=None, limit=100):
+        jobs = [job for job in self._all_jobs()
+                if (not batch_id or job["batch_id"] == batch_id) and (not status or job["status"] == status)]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)[:limit]
+
+    def events(self, job_id, after=0):
+        if not all(c.isalnum() for c in str(job_id)):
+            return []
+        events = []
+        try:
+            with open(self._path("events", f"{job_id}.jsonl")) as file:
+                for number, line in enumerate(file, start=1):
+                    if number > after:
+                        try:
+                            events.append({"id": number, "job_id": job_id, **json.loads(line)})
+                        except ValueError:
+                            continue  # A line cut short by a crash
+        except FileNotFoundError:
+            pass
+        return events
+
+    def counts(self):
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self._all_jobs():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    def acquire_rate(self, source, interval):
+        path = self._path("rates", f"{source}.json")
+        with self._locked(f"rate-{source}"):
+            try:
+                with open(path) as file:
+                    next_allowed = json.load(file)["next_allowed"]
+            except (OSError, ValueError, KeyError):
+                next_allowed = 0
+            now = time.time()
+            slot = max(now, next_allowed)
+            self._write_json(path, {"next_allowed": slot + interval})
+            return slot - now
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = FileJobQueue(tmp)
+        queue.enqueue(["example.com", "example.org"], "fast")
+        job = queue.claim("worker-1", lease_seconds=0)
+        time.sleep(0.01)
+        print(queue.claim("worker-2")["id"] == job["id"])  # worker-1's lease ran out, so the job is visible again
+        print(queue.finish(job["id"], {"risk_score": 12}, worker="worker-1"))  # False: lease lost
+        print(queue.finish(job["id"], {"risk_score": 12}, worker="worker-2"), queue.counts())
+        print([event["kind"] for event in queue.events(job["id"])], queue.acquire_rate("demo", 2), queue.acquire_rate("demo", 2))
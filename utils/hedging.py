@@ -0,0 +1,285 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.admission import get_admission_controller
+from utils.concurrency import classify_outcome, get_concurrency_controller
+from utils.metrics import register_collector
+from utils.tracing import span
+
+# Hedging settings per source: the observed latency percentile to wait for, the delay to use until
+# enough calls have been seen, and the minimum delay. Hedging is opt-in (every hedge starts another
+# browser session); these are the suggested sources, e.g. RISK_HEDGE_SOURCES=scrape_ssl_org,scrape_google_safe_browsing
+HEDGED_SOURCES = {
+    "scrape_ssl_org": {"percentile": 90, "initial_delay": 12.0, "min_delay": 3.0},
+    "scrape_google_safe_browsing": {"percentile": 90, "initial_delay": 12.0, "min_delay": 3.0}
+}
+
+MIN_SAMPLES = 10
+WINDOW = 200               # Latencies remembered per source
+DEFAULT_BUDGET_RATIO = 0.1  # Hedges may add at most 10% extra calls
+MAX_BUDGET_TOKENS = 5       # Burst allowance
+
+
+def hedged_sources():
+    """
+    Sources with hedging enabled: RISK_HEDGE_SOURCES (comma-separated). None unless it is set.
+    """
+    configured = os.environ.get("RISK_HEDGE_SOURCES", "")
+    return {s.strip() for s in configured.split(",") if s.strip() and s.strip() != "none"}
+
+
+class HedgeCancelled(Exception):
+    """
+    Raised in an attempt that lost before it got its slot or browser session.
+    """
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful call latencies for one source. For hedged sources these are the
+    primary attempts' latencies; a primary that lost counts with the time it had run when it was
+    cancelled (a lower bound), so slow calls keep pulling the percentile up.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p):
+        with self.lock:
+            samples = sorted(self.samples)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class HedgeBudget:
+    """
+    Token bucket that keeps hedges to a fraction of primary calls: every primary call earns
+    `ratio` tokens and every hedge spends one.
+    """
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO, max_tokens=MAX_BUDGET_TOKENS):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = 1.0  # Allow one hedge before any history exists
+        self.lock = threading.Lock()
+
+    def earn(self):
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def spend(self):
+        with self.lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class Hedger:
+    """
+    Runs calls for hedged sources with a backup attempt: if the first attempt hasn't returned by
+    the source's observed p90 latency (and the budget allows), a second attempt starts in a fresh
+    browser session. The first good result wins and the other attempt is cancelled.
+
+    The primary attempt runs in the caller's concurrency slot; a hedge takes a slot of its own, so
+    hedges count against the source's AIMD limit and the global cap like any other call. When the
+    hedge wins, the caller gives its slot back while the primary may still be running (cancelling
+    only stops browser sessions), so the hedge keeps its own slot until the primary has stopped.
+    """
+
+    def __init__(self, budget_ratio=None):
+        ratio = budget_ratio if budget_ratio is not None else float(os.environ.get("RISK_HEDGE_BUDGET", DEFAULT_BUDGET_RATIO))
+        self.budget = HedgeBudget(ratio)
+        self.trackers = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def tracker(self, source):
+        with self.lock:
+            if source not in self.trackers:
+                self.trackers[source] = LatencyTracker()
+                self.stats[source] = {"calls": 0, "hedged": 0, "hedge_won": 0, "budget_denied": 0}
+            return self.trackers[source]
+
+    def _count(self, source, key):
+        with self.lock:
+            self.stats[source][key] += 1
+
+    def hedge_delay(self, source):
+        settings = HEDGED_SOURCES.get(source, {"percentile": 90, "initial_delay": 10.0, "min_delay": 2.0})
+        observed = self.tracker(source).percentile(settings["percentile"])
+        return max(settings["min_delay"], observed if observed is not None else settings["initial_delay"])
+
+    def run(self, source, func, *args, **kwargs):
+        """
+        Runs `func(*args)` for a source, hedged when the source is enabled for hedging.
+        Each attempt runs under admission control in its own browser session.
+        """
+        controller = get_admission_controller()
+        tracker = self.tracker(source)
+        self._count(source, "calls")
+        if source not in hedged_sources():
+            start = time.monotonic()
+            result = controller.run(source, func, *args, **kwargs)
+            if classify_outcome(result) == "ok":
+                tracker.record(time.monotonic() - start)
+            return result
+
+        self.budget.earn()
+        finished = queue.Queue()
+        attempts = []
+
+        def attempt(index):
+            record = {"index": index, "session": None, "cancelled": False, "start": time.monotonic(),
+                      "lock": threading.Lock(), "done": threading.Event()}
+            attempts.append(record)
+
+            def on_session(session):
+                with record["lock"]:
+                    record["session"] = session
+                    if record["cancelled"]:
+                        raise HedgeCancelled(f"{source} attempt {index} lost before it started")
+
+            def run_attempt():
+                return controller.run(source, func, *args, on_session=on_session, **kwargs)
+
+            def run_hedge():
+                with get_concurrency_controller().slot(source) as call:
+                    if record["cancelled"]:
+                        call["outcome"] = "cancelled"
+                        raise HedgeCancelled(f"{source} attempt {index} lost before it started")
+                    started = time.monotonic()
+                    with span("hedge", "hedge", source=source, index=index):
+                        result = run_attempt()
+                    call["outcome"] = "cancelled" if record["cancelled"] else classify_outcome(result)
+                    call["latency"] = time.monotonic() - started
+                    finished.put((index, result, None))
+                    if call["outcome"] == "ok":
+                        attempts[0]["done"].wait()  # Hold the slot for the primary still running
+
+            def work():
+                try:
+                    if index:
+                        run_hedge()
+                    else:
+                        with span("primary", "hedge", source=source, index=index):
+                            result = run_attempt()
+                        finished.put((index, result, None))
+                except Exception as e:
+                    finished.put((index, None, e))
+                finally:
+                    record["done"].set()
+
+            # Carry the caller's context (current source, trace) into the attempt thread
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(work,), name=f"{source}-attempt-{index}", daemon=True).start()
+
+        attempt(0)
+        delay = self.hedge_delay(source)
+        try:
+            first = finished.get(timeout=delay)
+        except queue.Empty:
+            first = None
+
+        if first is None:
+            if self.budget.spend():
+                self._count(source, "hedged")
+                print(f"🪃 {source} slower than {delay:.1f}s, starting a hedged attempt")
+                attempt(1)
+            else:
+                self._count(source, "budget_denied")
+
+        # Take the first good result; a failed attempt only wins if nothing else is left running
+        pending = len(attempts) - (1 if first else 0)
+        outcome = first
+        while outcome is None or (classify_outcome(outcome[1], outcome[2]) != "ok" and pending > 0):
+            outcome = finished.get()
+            pending -= 1
+        index, result, error = outcome
+
+        if error is None and classify_outcome(result) == "ok":
+            tracker.record(time.monotonic() - attempts[0]["start"])  # The primary's latency, or a lower bound on it
+        if index == 1:
+            self._count(source, "hedge_won")
+        for record in attempts:
+            if record["index"] == index:
+                continue
+            with record["lock"]:
+                record["cancelled"] = True  # An attempt not admitted yet stops before it runs
+                session = record["session"]
+            if session is not None:
+                controller.cancel(session)
+        if error is not None:
+            raise error
+        return result
+
+    def snapshot(self):
+        with self.lock:
+            sources = list(self.trackers)
+            stats = {source: dict(self.stats[source]) for source in sources}
+        for source in sources:
+            stats[source]["samples"] = len(self.trackers[source])
+            stats[source]["hedge_delay_s"] = round(self.hedge_delay(source), 2) if source in hedged_sources() else None
+        return {"budget_tokens": round(self.budget.tokens, 2), "budget_ratio": self.budget.ratio, "sources": stats}
+
+
+_hedger = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger():
+    """
+    Returns the process-wide hedger, created on first use.
+    """
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
+
+
+def _collect_hedging_metrics():
+    if _hedger is None:
+        return []
+    samples = [("risk_hedge_budget_tokens", "Hedges the budget currently allows", {}, _hedger.budget.tokens)]
+    for source, stats in _hedger.snapshot()["sources"].items():
+        for key in ("calls", "hedged", "hedge_won", "budget_denied"):
+            samples.append((f"risk_hedge_{key}_total", f"Hedging: {key.replace('_', ' ')} per source", {"source": source}, stats[key], "counter"))
+    return samples
+
+
+register_collector(_collect_hedging_metrics)
+
+
+# Example usage: a heavy-tailed fake source
+if __name__ == "__main__":
+    import json
+    import random
+
+    HEDGED_SOURCES["demo"] = {"percentile": 90, "initial_delay": 0.5, "min_delay": 0.05}
+    os.environ["RISK_HEDGE_SOURCES"] = "demo"
+    hedger = Hedger(budget_ratio=0.2)
+
+    def fake_lookup(n):
+        time.sleep(2.0 if random.random() < 0.1 else random.uniform(0.05, 0.15))
+        return {"ok": n}
+
+    start = time.perf_counter()
+    for n in range(60):
+        hedger.run("demo", fake_lookup, n)
+    print(f"⏱️ 60 calls in {time.perf_counter() - start:.1f}s")
+    print(json.dumps(hedger.snapshot(), indent=4))
@@ -0,0 +1,369 @@
+"""
+Cross-merchant infrastructure index: which merchants share an IP, a name server set, a registrar or
+a certificate. Fraud rings reuse hosting, so a merchant sharing infrastructure with known high-risk
+ones deserves a closer look.
+
+The index is an inverted table (kind, value) -> domains in a host-local SQLite file
+(RISK_INFRA_INDEX_DB, default data/infra_index.sqlite3, even when RISK_DATA_DIR points at a shared
+mount: WAL mode doesn't work across hosts). `save_data` updates it on every save, so it never needs a
+scan of the record files except to build it the first time. With workers on several hosts each host
+only indexes its own saves, so run `rebuild` on a host before relying on its index:
+
+    python -m utils.infra_index rebuild
+    python -m utils.infra_index related example.com
+    python -m utils.infra_index lookup ip 203.0.113.24
+
+With RISK_INFRA_BOOST=1 the score of a merchant sharing infrastructure with a known high-risk one
+goes up (see INFRA_KINDS and `infrastructure_risk`).
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from utils.save_data import DEFAULT_DATA_DIR
+
+# Kinds of infrastructure indexed, with the points each adds to the score of a merchant that shares
+# it with a known high-risk merchant (RISK_INFRA_BOOST=1). A registrar alone proves nothing, so it is
+# only there to query.
+INFRA_KINDS = {
+    "certificate": 10,   # sha256_fingerprint from ssl_sha_256_fingerprint or the fast tier's tls_probe
+    "ip": 6,             # IP seen by IPVoid/URLVoid, the local DNS lookup or the Cloudflare scan
+    "name_servers": 4,   # The whole set of name servers (whois, else GoDaddy WHOIS)
+    "registrar": 0
+}
+INFRA_BOOST_CAP = 20
+# A value shared by more merchants than this is common infrastructure (a CDN edge, a big registrar,
+# a parking provider's name servers) and doesn't count towards the boost (RISK_INFRA_MAX_SHARED)
+DEFAULT_MAX_SHARED = 25
+DEFAULT_INFRA_INDEX_DB = os.path.join(DEFAULT_DATA_DIR, "infra_index.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS infra (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    PRIMARY KEY (kind, value, domain)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS infra_domain ON infra (domain);
+CREATE TABLE IF NOT EXISTS merchants (
+    domain TEXT PRIMARY KEY,
+    risk_score INTEGER,
+    high_risk INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+);
+"""
+
+
+def infra_index_path():
+    return os.environ.get("RISK_INFRA_INDEX_DB") or DEFAULT_INFRA_INDEX_DB
+
+
+def shared_index_warning(path):
+    """
+    Why the index at `path` may be unsafe or incomplete in this deployment, or None: a file on the
+    shared data dir (SQLite WAL doesn't work across hosts) or a queue shared between hosts (each
+    host's index only sees the records saved on that host until `rebuild`).
+    """
+    shared_dir = os.environ.get("RISK_DATA_DIR")
+    if shared_dir and os.path.abspath(shared_dir) != os.path.abspath(DEFAULT_DATA_DIR):
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(shared_dir)]) == os.path.abspath(shared_dir):
+            return (f"the infrastructure index {path} is inside RISK_DATA_DIR; SQLite WAL doesn't work on a "
+                    f"filesystem shared between hosts, set RISK_INFRA_INDEX_DB to a host-local path")
+    queue_url = os.environ.get("RISK_QUEUE_URL")
+    if queue_url and not queue_url.startswith("sqlite://"):
+        return (f"workers share the queue {queue_url.split('://')[0]}://, so {path} only indexes records saved "
+                f"on this host; run `python -m utils.infra_index rebuild` here before relying on it")
+    return None
+
+
+def max_shared():
+    try:
+        return int(os.environ.get("RISK_INFRA_MAX_SHARED", DEFAULT_MAX_SHARED))
+    except ValueError:
+        return DEFAULT_MAX_SHARED
+
+
+def infra_boost_enabled():
+    return os.environ.get("RISK_INFRA_BOOST", "0").lower() in ("1", "true", "yes")
+
+
+def _section(record, key):
+    value = record.get(key)
+    return value if isinstance(value, dict) and not value.get("error") else {}
+
+
+def _clean(value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lower().rstrip(".")
+    return value if value and value not in ("unknown", "none", "na") else None
+
+
+def _name_server_set(name_servers):
+    if isinstance(name_servers, str):
+        name_servers = [name_servers]
+    names = sorted({_clean(name) for name in name_servers or [] if _clean(name)})
+    return ",".join(names) or None
+
+
+def infrastructure(record):
+    """
+    The (kind, value) pairs a record's infrastructure is indexed under, normalised (lower case,
+    no trailing dot) so the same server found by two sources is one value.
+    """
+    values = set()
+    for key in ("ipvoid", "urlvoid", "local_lists"):
+        values.add(("ip", _clean(_section(record, key).get("ip_address"))))
+    values.add(("ip", _clean(_section(record, "cloudflare_scan").get("page_ip"))))
+    for key in ("whois", "godaddy_whois"):
+        values.add(("name_servers", _name_server_set(_section(record, key).get("name_servers"))))
+    registrar = _section(record, "whois").get("registrar")
+    values.add(("registrar", _clean(registrar[0] if isinstance(registrar, list) and registrar else registrar)))
+    for key in ("ssl_sha_256_fingerprint", "tls_probe"):
+        values.add(("certificate", _clean(_section(record, key).get("sha256_fingerprint"))))
+    return {(kind, value) for kind, value in values if value}
+
+
+def known_high_risk(record):
+    """
+    Whether a merchant counts as known high risk for its neighbours: on a local blocklist, or
+    scored high risk before its own infrastructure boost (so boosts don't spread from merchant to merchant).
+    """
+    from utils.risk_scoring import RISK_CATEGORIES
+
+    if _section(record, "local_lists").get("blocklisted"):
+        return True
+    score = record.get("risk_score")
+    if not isinstance(score, (int, float)):
+        return False
+    boost = (record.get("infrastructure_risk") or {}).get("boost", 0)
+    return score - boost >= RISK_CATEGORIES["high_risk"][0]
+
+
+class InfraIndex:
+    """
+    The index in one SQLite file. Safe for several processes on one host (WAL mode); lookups are
+    primary-key range scans and take well under a millisecond.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or infra_index_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def _transaction(self, work):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def update(self, domain, record):
+        """
+        Re-indexes a saved record. Returns False when nothing changed (most saves of a run only
+        add scraper results the index doesn't use), without taking the write lock.
+        """
+        values = infrastructure(record)
+        high_risk = int(known_high_risk(record))
+        score = record.get("risk_score") if isinstance(record.get("risk_score"), (int, float)) else None
+        with self.lock:
+            current = set(self.conn.execute("SELECT kind, value FROM infra WHERE domain = ?", (domain,)))
+            merchant = self.conn.execute("SELECT risk_score, high_risk FROM merchants WHERE domain = ?", (domain,)).fetchone()
+        if current == values and merchant == (score, high_risk):
+            return False
+
+        def work():
+            self.conn.execute("DELETE FROM infra WHERE domain = ?", (domain,))
+            self.conn.executemany("INSERT INTO infra (kind, value, domain) VALUES (?, ?, ?)",
+                                  [(kind, value, domain) for kind, value in sorted(values)])
+            self.conn.execute("INSERT OR REPLACE INTO merchants (domain, risk_score, high_risk, updated_at) VALUES (?, ?, ?, ?)",
+                              (domain, score, high_risk, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")))
+        self._transaction(work)
+        return True
+
+    def values(self, domain):
+        with self.lock:
+            return set(self.conn.execute("SELECT kind, value FROM infra WHERE domain = ?", (domain,)))
+
+    def count(self, kind, value, exclude=None, cap=None):
+        """
+        Merchants indexed under one value, counting at most `cap` of them: enough to tell a common
+        value (a CDN IP shared by thousands) from a rare one without walking all its rows.
+        """
+        with self.lock:
+            if cap is None:
+                return self.conn.execute("SELECT COUNT(*) FROM infra WHERE kind = ? AND value = ? AND domain != ?",
+                                         (kind, value, exclude or "")).fetchone()[0]
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM infra WHERE kind = ? AND value = ? AND domain != ? LIMIT ?)",
+                (kind, value, exclude or "", cap)).fetchone()[0]
+
+    def lookup(self, kind, value, exclude=None, limit=100, cap=None):
+        """
+        Merchants indexed under one value: (number of merchants, counted up to `cap`,
+        [{"domain", "risk_score", "high_risk"}]).
+        """
+        value = _name_server_set(value.split(",")) if kind == "name_servers" else _clean(value)
+        count = self.count(kind, value, exclude, cap)
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT i.domain, m.risk_score, m.high_risk FROM infra i LEFT JOIN merchants m ON m.domain = i.domain"
+                " WHERE i.kind = ? AND i.value = ? AND i.domain != ?"
+                " ORDER BY m.high_risk DESC, m.risk_score DESC LIMIT ?", (kind, value, exclude or "", limit)).fetchall()
+        return count, [{"domain": domain, "risk_score": score, "high_risk": bool(high_risk)} for domain, score, high_risk in rows]
+
+    def related(self, domain, record=None, kinds=None, limit=100):
+        """
+        Merchants sharing infrastructure with `domain` (its indexed values, or those of `record`).
+
+        Returns:
+            dict: `values` (each shared value, how many other merchants have it and whether that makes it
+            common) and `merchants` (each related merchant with the kinds it shares, most shared first).
+            Merchants that only share common values aren't listed, and their count stops at
+            max_shared() + 1.
+        """
+        values = infrastructure(record) if record is not None else self.values(domain)
+        shared, merchants = [], {}
+        for kind, value in sorted(values):
+            if kinds and kind not in kinds:
+                continue
+            count = self.count(kind, value, exclude=domain, cap=max_shared() + 1)
+            if not count:
+                continue
+            shared.append({"kind": kind, "value": value, "merchants": count, "common": count > max_shared()})
+            if count > max_shared():
+                continue
+            for other in self.lookup(kind, value, exclude=domain, limit=limit, cap=max_shared() + 1)[1]:
+                entry = merchants.setdefault(other["domain"], {**other, "shared": []})
+                entry["shared"].append(kind)
+        ranked = sorted(merchants.values(), key=lambda entry: (-len(entry["shared"]), not entry["high_risk"], entry["domain"]))
+        return {"domain": domain, "values": shared, "merchants": ranked[:limit]}
+
+    def rebuild(self, records):
+        """
+        Replaces the whole index with `records` ({domain: record}). Returns the number indexed.
+        """
+        def work():
+            self.conn.execute("DELETE FROM infra")
+            self.conn.execute("DELETE FROM merchants")
+        self._transaction(work)
+        for domain, record in records.items():
+            self.update(domain, record)
+        return len(records)
+
+    def counts(self):
+        with self.lock:
+            merchants = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(high_risk), 0) FROM merchants").fetchone()
+            kinds = dict(self.conn.execute("SELECT kind, COUNT(DISTINCT value) FROM infra GROUP BY kind"))
+        return {"merchants": merchants[0], "high_risk": merchants[1], "values": kinds}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_infra_index():
+    """
+    The process-wide index for the current RISK_INFRA_INDEX_DB.
+    """
+    path = infra_index_path()
+    with _indexes_lock:
+        if path not in _indexes:
+            warning = shared_index_warning(path)
+            if warning:
+                print(f"⚠️ {warning}")
+            _indexes[path] = InfraIndex(path)
+        return _indexes[path]
+
+
+def update_infra_index(domain, record):
+    """
+    Called by `save_data` after every save. Indexing problems are reported, never raised: a record
+    is saved whether or not the index could be updated (`rebuild` catches it up).
+    """
+    if os.environ.get("RISK_INFRA_INDEX", "1") == "0":
+        return
+    try:
+        get_infra_index().update(domain, record)
+    except Exception as e:
+        print(f"⚠️ Could not update the infrastructure index for {domain}: {e}")
+
+
+def infrastructure_risk(domain, record):
+    """
+    The score boost for sharing infrastructure with known high-risk merchants: INFRA_KINDS points per
+    kind shared (common values don't count), capped at INFRA_BOOST_CAP. Stored in the record as
+    `infrastructure_risk` by `assess_risk` when RISK_INFRA_BOOST=1.
+    """
+    index = get_infra_index()
+    links = []
+    for kind, value in sorted(infrastructure(record)):
+        if not INFRA_KINDS.get(kind):
+            continue
+        if index.count(kind, value, exclude=domain, cap=max_shared() + 1) > max_shared():
+            continue
+        high_risk = [entry["domain"] for entry in index.lookup(kind, value, exclude=domain, cap=max_shared() + 1)[1]
+                     if entry["high_risk"]]
+        if high_risk:
+            links.append({"kind": kind, "value": value, "high_risk_merchants": high_risk})
+    boost = min(sum(INFRA_KINDS[kind] for kind in {link["kind"] for link in links}), INFRA_BOOST_CAP)
+    return {"boost": boost, "links": links}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or rebuild the cross-merchant infrastructure index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Re-index every saved record")
+    related_parser = subparsers.add_parser("related", help="Merchants sharing infrastructure with a domain")
+    related_parser.add_argument("domain")
+    related_parser.add_argument("--kind", action="append", choices=sorted(INFRA_KINDS))
+    related_parser.add_argument("--limit", type=int, default=50)
+    lookup_parser = subparsers.add_parser("lookup", help="Merchants indexed under one value")
+    lookup_parser.add_argument("kind", choices=sorted(INFRA_KINDS))
+    lookup_parser.add_argument("value")
+    subparsers.add_parser("stats", help="Merchants and distinct values indexed")
+    args = parser.parse_args()
+
+    index = get_infra_index()
+    if args.command == "rebuild":
+        from utils.reparse import load_records
+
+        started = time.perf_counter()
+        count = index.rebuild(load_records())
+        print(f"✅ Indexed {count} record(s) in {time.perf_counter() - started:.1f}s into {index.path}")
+    elif args.command == "related":
+        started = time.perf_counter()
+        related = index.related(args.domain, kinds=args.kind, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for shared in related["values"]:
+            merchants = f">{max_shared()}" if shared["common"] else shared["merchants"]
+            print(f"{shared['kind']:13} {shared['value']:66} {merchants:>5} merchant(s){' (common)' if shared['common'] else ''}")
+        for entry in related["merchants"]:
+            print(f"{'🚨' if entry['high_risk'] else '  '} {entry['domain']:40} {entry['risk_score'] if entry['risk_score'] is not None else '-':>5}  {', '.join(entry['shared'])}")
+        print(f"🔗 {len(related['merchants'])} related merchant(s) in {elapsed_ms:.2f} ms")
+    elif args.command == "lookup":
+        count, domains = index.lookup(args.kind, args.value)
+        for entry in domains:
+            print(f"{'🚨' if entry['high_risk'] else '  '} {entry['domain']:40} {entry['risk_score'] if entry['risk_score'] is not None else '-':>5}")
+        print(f"🔗 {count} merchant(s)")
+    else:
+        print(index.counts())
+
+
+if __name__ == "__main__":
+    main()
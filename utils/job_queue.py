@@ -0,0 +1,387 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.priority import DEFAULT_PRIORITY, PRIORITY_CLASSES, aging_seconds, check_priority
+
+# Queue of domain assessments plus a log of their progress events. Backends (RISK_QUEUE_URL):
+#   sqlite:///data/jobs.sqlite3   default (RISK_JOBS_DB): one host, any number of worker processes
+#   file:///mnt/shared/queue      a directory on a filesystem every worker host mounts (utils/file_queue.py)
+#   redis://host:6379/0           Redis, for many hosts (utils/redis_queue.py, needs the redis package)
+#
+# A claimed job is leased to its worker, which renews the lease while it runs. A job whose lease
+# runs out (the worker crashed or lost its host) becomes visible in the queue again, up to
+# RISK_JOB_MAX_ATTEMPTS claims; after that it is failed instead of crashing workers forever.
+#
+# Jobs carry a priority class (utils/priority.py). Workers claim interactive jobs first, then normal,
+# then bulk, oldest first within a class; a job climbs one class per RISK_PRIORITY_AGING_SECONDS
+# queued, so bulk work is never starved.
+DEFAULT_JOBS_DB = os.path.join("data", "jobs.sqlite3")
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+# queued -> running -> done | failed (running -> queued again when its lease expires)
+JOB_STATES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    batch_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    priority TEXT NOT NULL DEFAULT 'normal',
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_batch ON jobs (batch_id);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    at TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT,
+    detail TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS job_events_by_job ON job_events (job_id, id);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    source TEXT PRIMARY KEY,
+    next_allowed REAL NOT NULL
+);
+"""
+
+# Columns added after the first release of the schema: (name, definition)
+MIGRATIONS = [("lease_expires_at", "REAL"), ("priority", "TEXT NOT NULL DEFAULT 'normal'")]
+
+# Queue rank of a job row: its class's rank, one better per aging period spent queued (see effective_rank)
+RANK_SQL = ("MAX((CASE priority " + " ".join(f"WHEN '{name}' THEN {spec['rank']}" for name, spec in PRIORITY_CLASSES.items())
+            + f" ELSE {PRIORITY_CLASSES[DEFAULT_PRIORITY]['rank']} END)"
+            " - CAST((? - CAST(strftime('%s', created_at) AS REAL)) / ? AS INTEGER), 0)")
+
+
+def _now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def jobs_db_path():
+    return os.environ.get("RISK_JOBS_DB", DEFAULT_JOBS_DB)
+
+
+def max_attempts():
+    return int(os.environ.get("RISK_JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+def new_job(domain, profile, options, batch_id, created_at, priority=None):
+    return {"id": uuid.uuid4().hex, "batch_id": batch_id, "domain": domain, "profile": profile,
+            "priority": check_priority(priority), "options": options or {}, "status": "queued", "worker": None, "attempts": 0, "error": None,
+            "result": None, "created_at": created_at, "started_at": None, "finished_at": None,
+            "lease_expires_at": None}
+
+
+class BaseJobQueue:
+    """
+    What every queue backend provides. Workers call claim -> heartbeat... -> finish (or release
+    on shutdown); the API calls enqueue and the read methods. `acquire_rate` backs the shared
+    per-source rate limits (utils/rate_limits.py).
+    """
+    url = None
+
+    def enqueue(self, domains, profile, options=None, batch_id=None, priority=None):
+        """Queues one job per domain under a shared batch id and priority class. Returns the new jobs."""
+        raise NotImplementedError
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, priorities=None):
+        """Leases the next visible job (by aged priority class, then age) to `worker`, only from
+        `priorities` if given. Returns it, or None when nothing is waiting."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extends the lease. False when the worker no longer holds it (it expired and was re-queued)."""
+        raise NotImplementedError
+
+    def release(self, job_id, worker):
+        """Puts a leased job back in the queue without counting the attempt (graceful shutdown)."""
+        raise NotImplementedError
+
+    def finish(self, job_id, result=None, error=None, worker=None):
+        """Marks a job done or failed. False (and nothing recorded) if `worker` lost the lease."""
+        raise NotImplementedError
+
+    def add_event(self, job_id, kind, source=None, **detail):
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def list(self, batch_id=None, status=None, limit=100):
+        """Jobs, newest first."""
+        raise NotImplementedError
+
+    def events(self, job_id, after=0):
+        """Progress events of a job with an id greater than `after`, oldest first."""
+        raise NotImplementedError
+
+    def counts(self):
+        raise NotImplementedError
+
+    def acquire_rate(self, source, interval):
+        """Reserves the next call slot for `source`, `interval` seconds after the previous one.
+        Returns how many seconds the caller must wait for it."""
+        raise NotImplementedError
+
+    def scraper_progress(self, job_id):
+        """
+        The latest state of each scraper in a job: {source: {"state", "class", ...}}.
+        """
+        progress = {}
+        for event in self.events(job_id):
+            if event["source"]:
+                progress[event["source"]] = {"state": event["kind"], **event["detail"], "at": event["at"]}
+        return progress
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(BaseJobQueue):
+    """
+    SQLite-backed job queue. Safe for several processes on one host (WAL mode, every change in
+    its own IMMEDIATE transaction); not for a database file on a network filesystem.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or jobs_db_path()
+        self.url = f"sqlite:///{self.path}"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for name, definition in MIGRATIONS:
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+
+    def _job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _transaction(self, work):
+        """
+        Runs `work()` in one IMMEDIATE transaction (the write lock is taken up front, so two
+        processes can't both read the same queued job and claim it).
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self.conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _event(self, job_id, kind, source=None, detail=None):
+        self.conn.execute("INSERT INTO job_events (job_id, at, kind, source, detail) VALUES (?, ?, ?, ?, ?)",
+                          (job_id, _now(), kind, source, json.dumps(detail or {}, default=str)))
+
+    def enqueue(self, domains, profile, options=None, batch_id=None, priority=None):
+        batch_id = batch_id or uuid.uuid4().hex
+        created_at = _now()
+        jobs = [new_job(domain, profile, options, batch_id, created_at, priority) for domain in domains]
+
+        def work():
+            self.conn.executemany(
+                "INSERT INTO jobs (id, batch_id, domain, profile, priority, options, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(job["id"], batch_id, job["domain"], profile, job["priority"], json.dumps(job["options"]), created_at)
+                 for job in jobs])
+            for job in jobs:
+                self._event(job["id"], "queued")
+
+        self._transaction(work)
+        return jobs
+
+    def _expire_leases(self, now):
+        expired = self.conn.execute("SELECT id, worker, attempts FROM jobs WHERE status = 'running' "
+                                    "AND lease_expires_at < ?", (now,)).fetchall()
+        for row in expired:
+            if row["attempts"] >= max_attempts():
+                error = f"lease expired on {row['attempts']} attempt(s); last worker {row['worker']}"
+                self.conn.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_expires_at = NULL "
+                                  "WHERE id = ?", (error, _now(), row["id"]))
+                self._event(row["id"], "failed", detail={"error": error})
+            else:
+                self.conn.execute("UPDATE jobs SET status = 'queued', worker = NULL, lease_expires_at = NULL "
+                                  "WHERE id = ?", (row["id"],))
+                self._event(row["id"], "lease_expired", detail={"worker": row["worker"]})
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, priorities=None):
+        def work():
+            now = time.time()
+            self._expire_leases(now)
+            only = f"AND priority IN ({', '.join('?' for _ in priorities)}) " if priorities else ""
+            # One job per domain at a time, so two workers never write the same record concurrently
+            row = self.conn.execute(
+                f"SELECT id FROM jobs WHERE status = 'queued' {only}AND domain NOT IN "
+                f"(SELECT domain FROM jobs WHERE status = 'running') ORDER BY {RANK_SQL}, created_at, rowid LIMIT 1",
+                list(priorities or []) + [now, aging_seconds()]).fetchone()
+            if row:
+                self.conn.execute("UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                                  "started_at = ?, lease_expires_at = ? WHERE id = ?",
+                                  (worker, _now(), now + lease_seconds, row["id"]))
+                self._event(row["id"], "started", detail={"worker": worker})
+            return row
+
+        row = self._transaction(work)
+        return self.get(row["id"]) if row else None
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        with self.lock:
+            cursor = self.conn.execute("UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? "
+                                       "AND status = 'running'", (time.time() + lease_seconds, job_id, worker))
+            return cursor.rowcount == 1
+
+    def release(self, job_id, worker):
+        def work():
+            cursor = self.conn.execute("UPDATE jobs SET status = 'queued', worker = NULL, lease_expires_at = NULL, "
+                                       "attempts = MAX(attempts - 1, 0) WHERE id = ? AND worker = ? AND status = 'running'",
+                                       (job_id, worker))
+            if cursor.rowcount:
+                self._event(job_id, "released", detail={"worker": worker})
+            return cursor.rowcount == 1
+
+        return self._transaction(work)
+
+    def finish(self, job_id, result=None, error=None, worker=None):
+        status = "failed" if error else "done"
+
+        def work():
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, result = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'running' AND (? IS NULL OR worker = ?)",
+                (status, error, json.dumps(result) if result is not None else None, _now(), job_id, worker, worker))
+            if cursor.rowcount:
+                self._event(job_id, status, detail={"error": error} if error else result)
+            return cursor.rowcount == 1
+
+        return self._transaction(work)
+
+    def add_event(self, job_id, kind, source=None, **detail):
+        with self.lock:
+            self._event(job_id, kind, source, detail)
+
+    def get(self, job_id):
+        with self.lock:
+            return self._job(self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, batch_id=None, status=None, limit=100):
+        clauses, params = [], []
+        if batch_id:
+            clauses.append("batch_id = ?")
+            params.append(batch_id)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT * FROM jobs {where} ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                                     params + [limit]).fetchall()
+        return [self._job(row) for row in rows]
+
+    def events(self, job_id, after=0):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+                                     (job_id, after)).fetchall()
+        return [{**dict(row), "detail": json.loads(row["detail"] or "{}")} for row in rows]
+
+    def counts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {state: 0 for state in JOB_STATES} | {row["status"]: row["n"] for row in rows}
+
+    def acquire_rate(self, source, interval):
+        def work():
+            now = time.time()
+            row = self.conn.execute("SELECT next_allowed FROM rate_limits WHERE source = ?", (source,)).fetchone()
+            slot = max(now, row["next_allowed"] if row else 0)
+            self.conn.execute("INSERT INTO rate_limits (source, next_allowed) VALUES (?, ?) "
+                              "ON CONFLICT (source) DO UPDATE SET next_allowed = excluded.next_allowed",
+                              (source, slot + interval))
+            return slot - now
+
+        return self._transaction(work)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _path_from_url(rest):
+    # sqlite:///relative/path and sqlite:////absolute/path, as in SQLAlchemy URLs
+    return rest[1:] if rest.startswith("/") else rest
+
+
+def open_job_queue(url=None):
+    """
+    Opens the queue backend named by `url` (default RISK_QUEUE_URL, else SQLite on RISK_JOBS_DB).
+    """
+    url = url or os.environ.get("RISK_QUEUE_URL") or f"sqlite:///{jobs_db_path()}"
+    scheme, _, rest = url.partition("://")
+    if scheme == "sqlite":
+        return SQLiteJobQueue(_path_from_url(rest))
+    if scheme == "file":
+        from utils.file_queue import FileJobQueue
+        return FileJobQueue(rest)  # A standard file URL: file:///mnt/shared/queue is /mnt/shared/queue
+    if scheme in ("redis", "rediss"):
+        from utils.redis_queue import RedisJobQueue
+        return RedisJobQueue(url)
+    raise ValueError(f"Unsupported queue URL: {url} (use sqlite:///, file:/// or redis://)")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    The process-wide job queue (see `open_job_queue`).
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = open_job_queue()
+        return _queue
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = SQLiteJobQueue(os.path.join(tmp, "jobs.sqlite3"))
+        queue.enqueue(["example.com", "example.org"], "fast")
+        job = queue.claim("worker-1", lease_seconds=0)
+        print(queue.claim("worker-2")["id"] == job["id"])  # worker-1's lease ran out, so the job is visible again
+        urgent = queue.enqueue(["example.net"], "fast", priority="interactive")[0]
+        print(queue.claim("worker-3")["id"] == urgent["id"])  # Ahead of the older normal job
+        queue.add_event(job["id"], "scraper_finished", source="tls_probe", **{"class": "ok"})
+        print(queue.finish(job["id"], {"risk_score": 12}, worker="worker-1"))  # False: lease lost
+        print(queue.scraper_progress(job["id"]), queue.counts(), queue.acquire_rate("demo", 2), queue.acquire_rate("demo", 2))
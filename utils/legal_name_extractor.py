@@ -0,0 +1,213 @@
+import re
+import time
+
+# Word tokens; anything between two tokens is a "gap" that may end a sentence.
+TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9&'-]*")
+
+# A gap containing any of these characters ends the current name.
+BREAK_CHARS = frozenset("\n\r\t;!?|()[]{}<>\"")
+
+# Company suffixes, longest first so "Pvt Ltd" wins over "Pvt".
+COMPANY_SUFFIXES = [
+    "private limited", "pvt ltd", "sdn bhd", "corporation", "limited", "gmbh",
+    "corp", "ltd", "llc", "llp", "inc", "plc", "pvt", "spa", "bv", "ag", "kg",
+    "ab", "oy", "nv"
+]
+
+# Phrases that introduce the legal entity name, e.g. "This site is operated by Acme Ltd".
+LEAD_PHRASES = [
+    "company name", "registered as", "operated by", "owned by", "trading as"
+]
+
+# Lowercase words allowed inside a name ("Bank of America", "Smith & Sons").
+NAME_CONNECTORS = frozenset(["of", "and", "&", "the", "for", "de", "la", "du", "von", "van"])
+
+# Footer boilerplate that often precedes a name ("Copyright 2025 Acme Ltd").
+LEADING_NOISE = frozenset(["copyright", "c", "all", "rights", "reserved"])
+
+MAX_LOOKBACK = 6   # Max name tokens before a suffix
+MAX_LOOKAHEAD = 8  # Max name tokens after a lead phrase
+
+
+def _build_phrase_index(phrases):
+    """
+    Indexes multi-word phrases by their first word, longest phrase first.
+    """
+    index = {}
+    for phrase in sorted(phrases, key=lambda p: -len(p.split())):
+        words = tuple(phrase.split())
+        index.setdefault(words[0], []).append(words)
+    return index
+
+
+SUFFIX_INDEX = _build_phrase_index(COMPANY_SUFFIXES)
+LEAD_INDEX = _build_phrase_index(LEAD_PHRASES)
+
+
+def tokenize(text):
+    """
+    Splits text into word tokens in a single pass.
+    Returns parallel lists of (start, end) spans, original words, lowercased words,
+    and a flag per token telling whether a sentence break precedes it.
+    """
+    spans, words, lowered, breaks = [], [], [], []
+    prev_end = 0
+    for match in TOKEN_RE.finditer(text):
+        start, end = match.span()
+        word = match.group()
+        gap = text[prev_end:start]
+        # A period ends the sentence unless it closes an abbreviation like "Co." or "Inc."
+        is_break = not spans or any(c in BREAK_CHARS for c in gap) or (
+            "." in gap and len(words[-1]) > 3 and words[-1].lower() not in SUFFIX_INDEX
+        )
+        spans.append((start, end))
+        words.append(word)
+        lowered.append(word.lower())
+        breaks.append(is_break)
+        prev_end = end
+    return spans, words, lowered, breaks
+
+
+def _match_phrase(index, lowered, breaks, i):
+    """
+    Returns the length (in tokens) of the longest indexed phrase starting at token i, or 0.
+    """
+    for words in index.get(lowered[i], ()):
+        n = len(words)
+        if tuple(lowered[i:i + n]) == words and not any(breaks[i + 1:i + n]):
+            return n
+    return 0
+
+
+def _is_name_word(word, lowered_word):
+    """
+    A name word is capitalized, numeric, or a connector like "of" / "&".
+    """
+    return word[0].isupper() or word[0].isdigit() or lowered_word in NAME_CONNECTORS
+
+
+def extract_legal_names(text, max_lookback=MAX_LOOKBACK, max_lookahead=MAX_LOOKAHEAD):
+    """
+    Finds every legal entity name candidate in the text.
+    Runs in time linear in the text length: the text is tokenized once and each
+    token is inspected a bounded number of times.
+
+    Returns:
+        list: Candidates ordered by position, each a dict with `name`, `start`, `end` and `rule`.
+    """
+    spans, words, lowered, breaks = tokenize(text)
+    candidates = []
+    covered_until = -1  # Last token index already consumed by a candidate
+
+    for i in range(len(words)):
+        # Lead phrase: take the capitalized words that follow it
+        lead_len = _match_phrase(LEAD_INDEX, lowered, breaks, i)
+        if lead_len:
+            first = i + lead_len
+            j = first
+            while j < len(words) and j - first < max_lookahead and (j == first or not breaks[j]):
+                suffix_len = _match_phrase(SUFFIX_INDEX, lowered, breaks, j)
+                if suffix_len and j > first:
+                    j += suffix_len
+                    break
+                if not _is_name_word(words[j], lowered[j]):
+                    break
+                j += 1
+            # Trailing connectors ("Acme and") are not part of the name
+            while j > first and lowered[j - 1] in NAME_CONNECTORS:
+                j -= 1
+            if j > first:
+                candidates.append({
+                    "name": text[spans[first][0]:spans[j - 1][1]],
+                    "start": spans[first][0],
+                    "end": spans[j - 1][1],
+                    "rule": " ".join(lowered[i:first])
+                })
+                covered_until = j - 1
+            continue
+
+        if i <= covered_until:
+            continue
+
+        # Company suffix: walk back over at most `max_lookback` capitalized words
+        suffix_len = _match_phrase(SUFFIX_INDEX, lowered, breaks, i)
+        if not suffix_len or breaks[i] or not words[i][0].isupper():
+            continue
+        k = i
+        while k - 1 > covered_until and i - k < max_lookback and not breaks[k] and _is_name_word(words[k - 1], lowered[k - 1]):
+            k -= 1
+        while k < i and (lowered[k] in NAME_CONNECTORS or lowered[k] in LEADING_NOISE or lowered[k].isdigit()):
+            k += 1
+        if k == i:
+            continue
+        end_index = i + suffix_len - 1
+        candidates.append({
+            "name": text[spans[k][0]:spans[end_index][1]],
+            "start": spans[k][0],
+            "end": spans[end_index][1],
+            "rule": "suffix"
+        })
+        covered_until = end_index
+
+    return candidates
+
+
+def pick_legal_name(candidates):
+    """
+    Chooses the best candidate: a name introduced by a lead phrase, else the first suffix match.
+    """
+    for candidate in candidates:
+        if candidate["rule"] != "suffix":
+            return candidate["name"]
+    return candidates[0]["name"] if candidates else None
+
+
+def _legacy_extract_legal_name(text):
+    """
+    The original backtracking regex approach, kept only for the benchmark below.
+    """
+    patterns = [
+        r"company name[:\s]+([A-Za-z0-9\s,.-]+)",
+        r"registered as[:\s]+([A-Za-z0-9\s,.-]+)",
+        r"is operated by[:\s]+([A-Za-z0-9\s,.-]+)",
+        r"\b([A-Za-z0-9\s]+ (Ltd|LLC|Inc|Pvt|Corporation|Limited|Pvt Ltd|SpA|BV|AG|KG|AB|Oy|NV|Sdn Bhd))\b"
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def build_benchmark_page(size_kb):
+    """
+    Builds marketing-style page text: long runs of words and whitespace without punctuation,
+    with the legal name only in the footer. This is the worst case for the legacy regexes.
+    """
+    section = (
+        "Discover our award winning products and services     built for teams of every size\n"
+        "                                                                                    \n"
+        "Free shipping on orders over 50 dollars   Shop now   Learn more   Contact sales      \n"
+    ) * 16 + "\u2022\n"
+    body = section * max(1, (size_kb * 1024) // len(section))
+    return body + "\n\u00a9 2025 Example Widgets Pvt Ltd. All rights reserved."
+
+
+# Example usage / benchmark on large pages
+if __name__ == "__main__":
+    sample = "This website is operated by: Acme Payments Ltd. Registered office in London."
+    print(extract_legal_names(sample))
+
+    for size_kb in (16, 64, 256):
+        page = build_benchmark_page(size_kb)
+
+        start = time.perf_counter()
+        candidates = extract_legal_names(page)
+        new_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy = _legacy_extract_legal_name(page)
+        legacy_time = time.perf_counter() - start
+
+        print(f"📄 {size_kb:>4} KB  tokenized: {new_time * 1000:8.1f} ms -> {pick_legal_name(candidates)!r}"
+              f"   legacy regex: {legacy_time * 1000:10.1f} ms -> {(legacy or '')[:40]!r}")
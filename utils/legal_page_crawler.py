@@ -0,0 +1,249 @@
+import codecs
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse, urldefrag
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.term_matcher import StreamingTextExtractor
+
+# Path fragments and anchor words that point at legal pages, with a priority score.
+LEGAL_PATH_KEYWORDS = {
+    "terms": 5, "conditions": 5, "tos": 5, "privacy": 5, "legal": 4, "imprint": 4,
+    "impressum": 4, "policies": 3, "policy": 3, "about": 2, "company": 1, "contact": 1
+}
+LEGAL_TEXT_KEYWORDS = {
+    "terms": 5, "conditions": 5, "privacy": 5, "legal": 4, "imprint": 4, "impressum": 4,
+    "policy": 3, "about": 2, "company": 1
+}
+
+# Fields that must all be found before the crawl stops early.
+STOP_FIELDS = ("terms_of_service_present", "privacy_policy_present", "legal_name")
+
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # Stop reading a legal page after 2 MB
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+
+class LinkCollector(HTMLParser):
+    """
+    Collects (href, anchor text) pairs from <a> tags.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            self.current = [href, []] if href else None
+
+    def handle_data(self, data):
+        if self.current is not None:
+            self.current[1].append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.current is not None:
+            self.links.append((self.current[0], " ".join("".join(self.current[1]).split())))
+            self.current = None
+
+
+def _same_site(host, base_host):
+    """
+    Treats "www.example.com" and "example.com" as the same site.
+    """
+    strip = lambda h: h[4:] if h.startswith("www.") else h
+    return strip(host.lower()) == strip(base_host.lower())
+
+
+def discover_legal_links(html, base_url, max_links=6):
+    """
+    Finds links on the homepage that likely lead to Terms, Privacy, About or Legal pages.
+
+    Returns:
+        list: Absolute same-site URLs, most promising first.
+    """
+    collector = LinkCollector()
+    try:
+        collector.feed(html)
+        collector.close()
+    except Exception:
+        pass  # Keep whatever links were collected before malformed markup
+
+    base_host = urlparse(base_url).netloc
+    scores = {}
+    for href, text in collector.links:
+        if href.startswith(("mailto:", "tel:", "javascript:", "#")):
+            continue
+        url = urldefrag(urljoin(base_url, href))[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not _same_site(parsed.netloc, base_host):
+            continue
+        if parsed.path.rstrip("/") == "" and not parsed.query:
+            continue  # The homepage itself
+
+        path = parsed.path.lower()
+        lowered_text = text.lower()
+        score = max([s for k, s in LEGAL_PATH_KEYWORDS.items() if k in path] or [0])
+        score += max([s for k, s in LEGAL_TEXT_KEYWORDS.items() if k in lowered_text] or [0])
+        if score:
+            scores[url] = max(score, scores.get(url, 0))
+
+    return sorted(scores, key=lambda u: -scores[u])[:max_links]
+
+
+class HostPoliteness:
+    """
+    Limits concurrent requests per host and enforces a minimum delay between their starts.
+    """
+
+    def __init__(self, min_interval=0.5, per_host_concurrency=2):
+        self.min_interval = min_interval
+        self.per_host_concurrency = per_host_concurrency
+        self.lock = threading.Lock()
+        self.semaphores = {}
+        self.next_start = {}
+
+    def acquire(self, host):
+        with self.lock:
+            semaphore = self.semaphores.setdefault(host, threading.Semaphore(self.per_host_concurrency))
+        semaphore.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start_at = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start_at + self.min_interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def release(self, host):
+        self.semaphores[host].release()
+
+
+def create_session(pool_size=4):
+    """
+    Creates a requests Session whose connection pool is shared by all crawler threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def fetch_page_text(session, url, stop_event, timeout=10, verify=True):
+    """
+    Streams a page and converts it to visible text chunk by chunk.
+    Gives up early when `stop_event` is set or the page exceeds MAX_PAGE_BYTES (counted on the
+    bytes received, before decoding).
+
+    Returns:
+        str | None: The page text, or None if the page could not be fetched.
+    """
+    with session.get(url, timeout=timeout, stream=True, verify=verify) as response:
+        if response.status_code != 200 or "html" not in response.headers.get("Content-Type", "html"):
+            return None
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        extractor = StreamingTextExtractor()
+        received = 0
+        for chunk in response.iter_content(chunk_size=16384):
+            if stop_event.is_set():
+                break
+            extractor.feed(decoder.decode(chunk))
+            received += len(chunk)
+            if received > MAX_PAGE_BYTES:
+                break
+        else:
+            extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+        return extractor.get_text()
+
+
+def merge_findings(merged, findings):
+    """
+    Merges one page's findings into the crawl result; the first legal name found wins.
+    """
+    merged["terms_of_service_present"] = merged.get("terms_of_service_present") or findings.get("terms_of_service_present", False)
+    merged["privacy_policy_present"] = merged.get("privacy_policy_present") or findings.get("privacy_policy_present", False)
+    if not merged.get("legal_name") and findings.get("legal_name"):
+        merged["legal_name"] = findings["legal_name"]
+        merged["legal_name_source"] = findings.get("url")
+    return merged
+
+
+def crawl_legal_pages(base_url, homepage_html, analyze_text, initial_findings=None,
+                      max_pages=4, max_workers=4, min_interval=0.5, timeout=10, verify=True, keep_text=False):
+    """
+    Fetches up to `max_pages` likely legal pages concurrently and analyzes each one.
+    Stops early once Terms, Privacy and a legal name have all been found.
+
+    Args:
+        base_url (str): Homepage URL used to resolve relative links.
+        homepage_html (str): Homepage HTML to discover links from.
+        analyze_text (callable): Takes page text, returns a dict with the STOP_FIELDS keys.
+        initial_findings (dict): Findings already made on the homepage.
+        verify (bool): Verify TLS certificates; pass False when the homepage only loaded without.
+        keep_text (bool): Keep each fetched page's text in its `pages` entry (for snapshots).
+
+    Returns:
+        dict: Merged findings plus `pages` (per-page results) and `stopped_early`.
+    """
+    merged = dict(initial_findings or {})
+    merged["pages"] = []
+    merged["stopped_early"] = False
+    if all(merged.get(field) for field in STOP_FIELDS):
+        return merged
+
+    urls = discover_legal_links(homepage_html, base_url, max_links=max_pages)
+    if not urls:
+        return merged
+
+    stop_event = threading.Event()
+    politeness = HostPoliteness(min_interval=min_interval)
+    session = create_session(pool_size=max_workers)
+
+    def visit(url):
+        if stop_event.is_set():
+            return {"url": url, "skipped": True}
+        host = urlparse(url).netloc
+        politeness.acquire(host)
+        try:
+            if stop_event.is_set():
+                return {"url": url, "skipped": True}
+            text = fetch_page_text(session, url, stop_event, timeout=timeout, verify=verify)
+        except requests.exceptions.RequestException as e:
+            return {"url": url, "error": str(e)}
+        finally:
+            politeness.release(host)
+        if text is None:
+            return {"url": url, "error": "not_html_or_not_ok"}
+        return {"url": url, **analyze_text(text), "text": text}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(visit, url) for url in urls]
+            for future in as_completed(futures):
+                page = future.result()
+                kept = ("url", "skipped", "error", *STOP_FIELDS, *(("text",) if keep_text else ()))
+                merged["pages"].append({k: v for k, v in page.items() if k in kept})
+                merge_findings(merged, page)
+                if all(merged.get(field) for field in STOP_FIELDS):
+                    merged["stopped_early"] = True
+                    stop_event.set()
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    finally:
+        session.close()
+
+    return merged
@@ -0,0 +1,263 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.tracing import span
+
+# Scraper currently running in this thread/context (set by `source_context`)
+CURRENT_SOURCE = contextvars.ContextVar("risk_current_source", default=None)
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 900)
+
+_registry = []
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def _render_sample(self, key, state):
+        lines = []
+        for bound, count in zip(self.buckets, state["counts"]):
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, {'le': _format_value(float(bound))})} {count}")
+        lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, {'le': '+Inf'})} {state['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state['count']}")
+        return lines
+
+
+def register_collector(collect):
+    """
+    Registers a function called at every scrape/dump that returns samples: a list of
+    (name, help, {label: value}, value), or (name, help, labels, value, "counter") for running
+    totals the collector reads from elsewhere. Used for live state such as pool sizes.
+    """
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+# Pipeline metrics
+SCRAPER_CALLS = Counter("risk_scraper_calls_total", "Scraper calls by final outcome class", ["source", "outcome"])
+SCRAPER_ATTEMPTS = Counter("risk_scraper_attempts_total", "Scraper attempts (including retries) by outcome class", ["source", "outcome"])
+SCRAPER_SECONDS = Histogram("risk_scraper_duration_seconds", "Scraper call duration including retries", ["source", "outcome"])
+PHASE_SECONDS = Histogram("risk_scraper_phase_seconds", "Time spent in scraper phases (browser_start, navigation, wait, extraction)", ["source", "phase"])
+CACHE_REQUESTS = Counter("risk_cache_requests_total", "Cache lookups by result (hit/miss)", ["cache", "result"])
+SCAN_POLLS = Counter("risk_scan_polls_total", "URL scan result polls by outcome (pending, done, throttled, error)", ["outcome"])
+
+
+@contextmanager
+def source_context(source):
+    """
+    Marks the scraper running inside the block, so phases and spans are attributed to it.
+    """
+    token = CURRENT_SOURCE.set(source)
+    try:
+        yield
+    finally:
+        CURRENT_SOURCE.reset(token)
+
+
+@contextmanager
+def phase(name, source=None):
+    """
+    Times one phase of a scraper (browser_start, navigation, wait, extraction...),
+    and records it as a span when the domain is being traced.
+    """
+    source = source or CURRENT_SOURCE.get() or "unknown"
+    start = time.perf_counter()
+    try:
+        with span(name, "phase", source=source):
+            yield
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - start, source=source, phase=name)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _cache_ratios():
+    with CACHE_REQUESTS.lock:
+        values = dict(CACHE_REQUESTS.values)
+    totals = {}
+    for (cache, result), count in values.items():
+        hits, total = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (count if result == "hit" else 0), total + count)
+    return [("risk_cache_hit_ratio", "Share of cache lookups that were hits", {"cache": cache}, hits / total)
+            for cache, (hits, total) in sorted(totals.items()) if total]
+
+
+register_collector(_cache_ratios)
+
+
+def render_metrics():
+    """
+    All metrics in the Prometheus text exposition format (version 0.0.4).
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+
+    collected = {}
+    for collect in collectors:
+        try:
+            for name, help_text, labels, value, *kind in collect() or []:
+                collected.setdefault(name, (help_text, kind[0] if kind else "gauge", []))[2].append((labels, value))
+        except Exception as e:
+            lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+    for name, (help_text, kind, samples) in sorted(collected.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_metrics(path):
+    """
+    Writes the metrics to a file (written to a temp file and renamed, so readers never see half a dump).
+    Point node_exporter's textfile collector at it for batch runs.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(render_metrics())
+    os.replace(tmp_path, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # Keep scrapes out of the console
+
+
+_server = None
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serves /metrics on a local port (RISK_METRICS_PORT, default 9464) from a background thread.
+    """
+    global _server
+    if _server is None:
+        port = int(port if port is not None else os.environ.get("RISK_METRICS_PORT", 9464))
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{_server.server_address[1]}/metrics")
+    return _server
+
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+
+# Example usage
+if __name__ == "__main__":
+    with source_context("demo"):
+        with phase("navigation"):
+            time.sleep(0.05)
+    SCRAPER_CALLS.inc(source="demo", outcome="ok")
+    SCRAPER_SECONDS.observe(0.05, source="demo", outcome="ok")
+    record_cache("demo", True)
+    record_cache("demo", False)
+    print(render_metrics())
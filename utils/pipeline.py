@@ -0,0 +1,353 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from utils.concurrency import classify_outcome, concurrency_snapshot, get_concurrency_controller
+from utils.hedging import get_hedger
+from utils.metrics import SCRAPER_CALLS, SCRAPER_SECONDS, dump_metrics, source_context, start_metrics_server
+from utils.rate_limits import wait_for_rate
+from utils.retry_policy import SCORED_CLASSES, attach_status, run_with_retries
+from utils.save_data import data_dir, record_lock, record_path, save_data
+from utils.scan_poller import SCAN_KEY, get_scan_poller, is_pending
+from utils.scraper_registry import (DEFAULT_PROFILE, PROFILES, SCRAPERS, get_spec, is_fresh, load_scraper,
+                                    missing_dependencies, profile_keys, scraper_keys)
+from utils.tracing import in_context, span, trace_domain
+
+# Define risky country codes
+RISKY_COUNTRIES = {
+    "CU", "IR", "KP", "SY", "RU", "BY", "MM", "VE", "YE", "ZW",
+    "SD", "SS", "LY", "SO", "CF", "CD", "UA"
+}
+
+
+def run_scraper(scraper_func, domain, delay=0):
+    """
+    Runs a scraper with retries for transient failures (timeouts, blocks, unreachable hosts).
+
+    Returns:
+        tuple: (result, scrape status with the failure class and attempt count)
+    """
+    name = scraper_func.__name__
+
+    def attempt():
+        # Adaptive per-source and global concurrency, then memory headroom (a browser killed
+        # for exceeding its memory cap is retried once); slow calls to hedged sources get a backup attempt.
+        # In worker mode the source's rate across every worker is respected first.
+        wait_for_rate(name)
+        with get_concurrency_controller().slot(name) as call:
+            result = get_hedger().run(name, scraper_func, domain)
+            call["outcome"] = classify_outcome(result)
+        return result
+
+    start = time.perf_counter()
+    with source_context(name), span(name, "scraper", target=domain):
+        result, status = run_with_retries(name, attempt)
+    SCRAPER_CALLS.inc(source=name, outcome=status["class"])
+    SCRAPER_SECONDS.observe(time.perf_counter() - start, source=name, outcome=status["class"])
+    status["checked_at"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    if status["class"] == "tls_invalid":
+        print(f"🔓 {name}: invalid certificate on {domain}")
+    elif status["class"] not in SCORED_CLASSES:
+        print(f"⚠️ {name} failed ({status['class']}) after {status['attempts']} attempt(s)")
+    with span("post_delay", "scraper", source=name, delay_s=delay):
+        time.sleep(delay)  # Maintain execution delays
+    return attach_status(result, status), status
+
+
+def report(progress, kind, key=None, **detail):
+    """
+    Passes a progress event to the caller's callback (the API's job log), if any.
+    A failing callback never fails the assessment.
+    """
+    if progress is None:
+        return
+    try:
+        progress(kind, key, **detail)
+    except Exception as e:
+        print(f"⚠️ Progress callback failed for {kind} {key or ''}: {e}")
+
+
+def run_registered(key, target, delays=True, progress=None):
+    """
+    Runs a registry scraper, importing its module now. A scraper whose module or dependencies
+    are missing is reported as "unavailable" instead of failing the whole run.
+    `delays=False` skips the scraper's post-call pause (the fast profile).
+    """
+    spec = get_spec(key)
+    report(progress, "scraper_started", key, target=target)
+    try:
+        scraper_func = load_scraper(key)
+    except ImportError as e:
+        missing = missing_dependencies(key) or [str(e)]
+        print(f"⚠️ {key} unavailable: missing {', '.join(missing)}")
+        status = {"class": "unavailable", "attempts": 0, "history": [], "retryable": False, "elapsed_s": 0,
+                  "missing": missing, "checked_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}
+        result = attach_status({"error": f"scraper unavailable: missing {', '.join(missing)}"}, status), status
+    else:
+        result = run_scraper(scraper_func, target, delay=spec["delay"] if delays else 0)
+    status = result[1]
+    report(progress, "scraper_finished", key, **{"class": status["class"], "attempts": status["attempts"],
+                                                 "elapsed_s": status["elapsed_s"]})
+    return result
+
+
+def load_record(domain_name):
+    path = record_path(domain_name)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def select_scrapers(only=None, skip=None, profile=None):
+    """
+    Registry keys to run, in declaration order: `only` if given, else the profile's scrapers,
+    minus `skip`.
+    """
+    unknown = (set(only or []) | set(skip or [])) - set(SCRAPERS)
+    if unknown:
+        raise KeyError(f"Unknown scraper(s): {', '.join(sorted(unknown))}")
+    base = [key for key in SCRAPERS if key in only] if only else profile_keys(profile or DEFAULT_PROFILE)
+    return [key for key in base if not skip or key not in skip]
+
+
+def assess_domain(domain_name, keys=None, reuse_fresh=False, profile=None, progress=None, before_save=None):
+    """
+    Runs the selected scrapers for one domain, then saves and scores the results.
+
+    Args:
+        keys (list): Registry keys to run (default: the profile's scrapers).
+        profile (str): Assessment profile ("fast" or "deep", see PROFILES). It is recorded on each
+            scrape status and in `assessment_profiles`, so scoring knows which tier produced the data.
+        reuse_fresh (bool): Keep results from the saved record that are still within their scraper's TTL.
+            Scrapers left out of `keys` keep whatever the saved record already has.
+        before_save (callable): Checked right before the record is written (e.g. that a worker still
+            holds the job's lease); when it returns False nothing is saved or scored.
+
+    Returns:
+        dict: The saved record's scraped results (None when `before_save` stopped the save).
+    """
+    profile = profile or DEFAULT_PROFILE
+    delays = PROFILES[profile]["delays"]
+    keys = list(keys or profile_keys(profile))
+    partial = set(keys) != set(SCRAPERS)
+    previous = load_record(domain_name)
+    scraped_results = {}
+    scrape_status = {}
+
+    def reuse(key):
+        status = (previous.get("scrape_status") or {}).get(key)
+        if reuse_fresh and key in previous and is_fresh(get_spec(key), status):
+            scraped_results[key], scrape_status[key] = previous[key], status
+            print(f"♻️ {key} reused (checked {status['checked_at']})")
+            report(progress, "scraper_reused", key, checked_at=status["checked_at"])
+            watch_scan(key)
+            return True
+        return False
+
+    def watch_scan(key):
+        # A submitted scan's verdict is collected by the scan poller while the other scrapers run
+        if key == SCAN_KEY and get_scan_poller().watch(domain_name, scraped_results.get(key)):
+            print(f"🔎 {key.replace('_', ' ').title()} submitted; polling for its verdict")
+
+    # **Step 1: Submit the Cloudflare Scan** (first, alongside the other scrapers; nothing waits for it)
+    # **Step 2: Run Scrapers Concurrently (admission control limits how many browsers run at once)**
+    # Each task runs in a copy of this context, so its spans land in this domain's trace
+    main_keys = [key for stage in ("submit", "main") for key in scraper_keys(stage=stage) if key in keys and not reuse(key)]
+    if main_keys:
+        with span("scrapers"), ThreadPoolExecutor(max_workers=len(main_keys)) as executor:
+            future_to_scraper = {executor.submit(in_context(run_registered), key, domain_name, delays, progress): key for key in main_keys}
+
+            for future in as_completed(future_to_scraper):
+                name = future_to_scraper[future]
+                try:
+                    scraped_results[name], scrape_status[name] = future.result()
+                    watch_scan(name)
+                    print(f"✅ {name.replace('_', ' ').title()} Data Retrieved.")
+                except Exception as e:
+                    print(f"⚠️ Error retrieving {name}: {e}")
+                    scraped_results[name] = {}
+                    report(progress, "scraper_finished", name, **{"class": "error", "error": str(e)})
+
+    for source, limits in concurrency_snapshot()["sources"].items():
+        print(f"📊 {source}: limit {limits['limit']}/{limits['max']} ({limits['last_change']})")
+
+    # **Step 3: Extract IP and Run IPVoid**
+    for key in scraper_keys(stage="followup"):
+        if key not in keys or reuse(key):
+            continue
+        ip_address = (scraped_results.get("urlvoid") or previous.get("urlvoid") or {}).get("ip_address")
+        if ip_address and ip_address != "unknown":
+            scraped_results[key], scrape_status[key] = run_registered(key, ip_address, delays, progress)
+            print(f"✅ {key.replace('_', ' ').title()} Data Retrieved for IP: {ip_address}")
+        else:
+            scraped_results[key] = {"error": "No IP Address found in URLVoid."}
+            print(f"⚠️ No IP Address found in URLVoid response, skipping {key}.")
+
+    # **Step 4: Geopolitical Risk Assessment** (IPVoid's country, else the local GeoIP lookup)
+    is_risky = False
+    country_code = ((scraped_results.get("ipvoid") or {}).get("country_code")
+                    or (scraped_results.get("local_lists") or {}).get("country_code") or "").split(" ")[0].strip("()")
+
+    if country_code in RISKY_COUNTRIES:
+        is_risky = True
+        print(f"⚠️ Domain {domain_name} is associated with a risky country: {country_code}")
+
+    scraped_results["is_risky_geopolitical"] = {
+        "domain": domain_name,
+        "is_risky": is_risky,
+        "check_datetime": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    # **Step 5: Save & Assess Risk**
+    if partial:
+        for key in SCRAPERS:
+            if key not in keys and key in previous:
+                scraped_results[key] = previous[key]
+                if key in (previous.get("scrape_status") or {}):
+                    scrape_status[key] = previous["scrape_status"][key]
+    for key, status in scrape_status.items():
+        if key in keys:
+            status.setdefault("profile", profile)  # Reused results keep the profile that produced them
+    scraped_results["scrape_status"] = scrape_status
+    scraped_results["assessment_profiles"] = {**(previous.get("assessment_profiles") or {}),
+                                              profile: datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}
+    if before_save is not None and not before_save():
+        print(f"⚠️ Results for {domain_name} not saved: the run no longer owns this assessment")
+        return None
+    # Under the record lock the scan poller either finds this record saved with the pending scan, or
+    # finished first and its verdict is taken here
+    with record_lock(domain_name):
+        scan = scraped_results.get(SCAN_KEY)
+        verdict = get_scan_poller().take(scan["uuid"]) if is_pending(scan) else None
+        if verdict:
+            scraped_results[SCAN_KEY] = {**scan, **verdict}
+        with span("save"):
+            save_data(domain_name, **scraped_results)
+        print(f"\n✅ Data saved successfully for {domain_name}!\n")
+        report(progress, "saved")
+        summary = rescore(domain_name)
+    report(progress, "scored", **(summary or {}))
+    return summary
+
+
+def rescore(domain_name):
+    """
+    Recomputes the risk score of a saved record without scraping. Returns the score summary.
+    """
+    from utils.risk_scoring import assess_risk
+
+    with span("assess"):
+        return assess_risk(domain_name)
+
+
+def close_browsers():
+    """
+    Closes the warm browsers of the CDP pool (only loaded with RISK_BROWSER_BACKEND=cdp).
+    """
+    if "utils.browser_pool" in sys.modules:
+        sys.modules["utils.browser_pool"].close_browser_pool()
+
+
+def start_deep_in_background(domain_name):
+    """
+    Starts the deep profile for a domain in a detached process, reusing the results a fast run
+    just saved; it updates the record (and its score) when it finishes. Output goes to
+    <data dir>/logs/<domain>.deep.log.
+
+    Returns:
+        int: The background process id.
+    """
+    log_dir = os.path.join(data_dir(), "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"{domain_name}.deep.log"), "a") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "utils.pipeline", "assess", domain_name, "--profile", "deep", "--reuse-fresh"],
+            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True
+        )
+    print(f"🌙 Deep assessment of {domain_name} running in the background (pid {process.pid})")
+    return process.pid
+
+
+def run_assessments(domains, keys=None, reuse_fresh=False, profile=None, then_deep=False):
+    """
+    Assesses each domain in turn, with metrics and (sampled) tracing around each one.
+    `then_deep` follows each (fast) assessment with a background deep one.
+    """
+    # Metrics: served on RISK_METRICS_PORT and/or written to RISK_METRICS_FILE at the end of the run
+    if os.environ.get("RISK_METRICS_PORT"):
+        start_metrics_server()
+
+    try:
+        for domain_name in domains:
+            # Trace: RISK_TRACE_SAMPLE of runs write a Chrome trace-event file to RISK_TRACE_DIR
+            with trace_domain(domain_name):
+                assess_domain(domain_name, keys, reuse_fresh, profile)
+            if then_deep:
+                start_deep_in_background(domain_name)
+    finally:
+        close_browsers()  # Warm browsers are shared by every domain of the run
+
+    # Give submitted scans a little longer to finish before the process (and its poller) exits
+    pending = get_scan_poller().wait(float(os.environ.get("RISK_SCAN_WAIT_S", 120)))
+    if pending:
+        print(f"⏳ {pending} Cloudflare scan(s) still pending; collect them later with `python -m utils.scan_poller`")
+
+    if os.environ.get("RISK_METRICS_FILE"):
+        print(f"📈 Metrics written to {dump_metrics(os.environ['RISK_METRICS_FILE'])}")
+
+
+def list_scrapers():
+    for key in SCRAPERS:
+        spec = get_spec(key)
+        missing = missing_dependencies(key)
+        print(f"{key:<24} {spec['name']:<28} {spec['cost']:<8} {','.join(spec['profiles']):<10} ttl {spec['ttl'] // 3600:>4}h  "
+              f"{'missing: ' + ', '.join(missing) if missing else 'available'}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m utils.pipeline", description="Website risk assessment pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    assess = commands.add_parser("assess", help="Scrape, save and score one or more domains")
+    assess.add_argument("domains", nargs="+")
+    assess.add_argument("--only", help="Comma-separated scrapers to run (see `scrapers`)")
+    assess.add_argument("--skip", help="Comma-separated scrapers to leave out")
+    assess.add_argument("--reuse-fresh", action="store_true", help="Reuse saved results still within their TTL")
+    assess.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="fast: ~1 s verdict from cheap checks; deep: every scraper (default)")
+    assess.add_argument("--then-deep", action="store_true", help="After the assessment, run the deep profile in the background")
+
+    rescore_parser = commands.add_parser("rescore", help="Recompute risk scores of saved records")
+    rescore_parser.add_argument("domains", nargs="+")
+
+    commands.add_parser("scrapers", help="List registered scrapers and whether they can run here")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "scrapers":
+        list_scrapers()
+    elif args.command == "rescore":
+        for domain_name in args.domains:
+            rescore(domain_name)
+    elif args.command == "assess":
+        split = lambda value: [item.strip() for item in value.split(",") if item.strip()] if value else None
+        try:
+            keys = select_scrapers(split(args.only), split(args.skip), args.profile)
+        except KeyError as e:
+            build_parser().error(str(e).strip("'\""))
+        run_assessments(args.domains, keys, args.reuse_fresh, args.profile, args.then_deep)
+
+
+if __name__ == "__main__":
+    main()
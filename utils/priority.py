@@ -0,0 +1,176 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Priority classes of assessment jobs, highest first.
+#   rank          queue order (lower first); bulk jobs climb one rank per RISK_PRIORITY_AGING_SECONDS queued
+#   weight        share of contended slots among normal and bulk callers (3:1)
+#   max_wait_s    a caller waiting longer than this for a slot goes first, whatever its class,
+#                 so bulk work keeps moving while interactive lookups keep arriving
+#   rate_share    share of each source's shared rate limit the class may use (utils/rate_limits.py);
+#                 normal and bulk together get the larger of their shares, and the rest is kept
+#                 free for interactive lookups
+# Interactive callers always get the next free slot.
+PRIORITY_CLASSES = {
+    "interactive": {"rank": 0, "weight": 8, "max_wait_s": None, "rate_share": 1.0},
+    "normal": {"rank": 1, "weight": 3, "max_wait_s": 120, "rate_share": 0.9},
+    "bulk": {"rank": 2, "weight": 1, "max_wait_s": 300, "rate_share": 0.7}
+}
+DEFAULT_PRIORITY = "normal"
+DEFAULT_AGING_SECONDS = 900
+
+# Priority of the job running in this context; copied into scraper and hedge threads with the context
+CURRENT_PRIORITY = contextvars.ContextVar("risk_current_priority", default=DEFAULT_PRIORITY)
+
+
+def check_priority(priority):
+    """
+    Returns `priority` (default DEFAULT_PRIORITY); raises ValueError for an unknown class.
+    """
+    priority = priority or DEFAULT_PRIORITY
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"unknown priority {priority!r} (one of {', '.join(PRIORITY_CLASSES)})")
+    return priority
+
+
+def priority_rank(priority):
+    return PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES[DEFAULT_PRIORITY])["rank"]
+
+
+def aging_seconds():
+    """
+    Seconds a queued job waits before it is ranked one class higher (RISK_PRIORITY_AGING_SECONDS).
+    """
+    try:
+        return max(1.0, float(os.environ.get("RISK_PRIORITY_AGING_SECONDS", DEFAULT_AGING_SECONDS)))
+    except ValueError:
+        return float(DEFAULT_AGING_SECONDS)
+
+
+def effective_rank(priority, waited_s):
+    """
+    Queue rank of a job after `waited_s` seconds in the queue: one rank better per aging period.
+    """
+    return max(0, priority_rank(priority) - int(max(waited_s, 0) // aging_seconds()))
+
+
+def current_priority():
+    return CURRENT_PRIORITY.get()
+
+
+@contextmanager
+def priority_context(priority):
+    """
+    Runs the block (and the threads it starts through `in_context`) at `priority`.
+    """
+    token = CURRENT_PRIORITY.set(check_priority(priority))
+    try:
+        yield
+    finally:
+        CURRENT_PRIORITY.reset(token)
+
+
+class FairScheduler:
+    """
+    Decides which waiter gets a contended slot next. Owned by a limiter and always used under
+    its lock: callers `enter()`, wait on the limiter's condition until a slot is free AND
+    `is_next(ticket)`, then `leave(ticket, served=True)`.
+
+    Order: a waiter past its class's max_wait_s (oldest first), then interactive waiters, then
+    normal and bulk by stride scheduling on their weights (each grant advances the class's pass
+    by 1/weight; the class with the lowest pass goes next).
+    """
+
+    def __init__(self):
+        self.waiting = {name: deque() for name in PRIORITY_CLASSES}
+        self.passes = {name: 0.0 for name in PRIORITY_CLASSES}
+        self.served = {name: 0 for name in PRIORITY_CLASSES}
+
+    def enter(self, priority=None):
+        priority = priority if priority in PRIORITY_CLASSES else current_priority()
+        if not self.waiting[priority]:
+            # A class coming back from idle starts level with the busy ones instead of cashing in the gap
+            busy = [self.passes[name] for name, queue in self.waiting.items() if queue]
+            if busy:
+                self.passes[priority] = max(self.passes[priority], min(busy))
+        ticket = {"priority": priority, "since": time.monotonic()}
+        self.waiting[priority].append(ticket)
+        return ticket
+
+    def leave(self, ticket, served=False):
+        self.waiting[ticket["priority"]].remove(ticket)
+        if served:
+            self.passes[ticket["priority"]] += 1.0 / PRIORITY_CLASSES[ticket["priority"]]["weight"]
+            self.served[ticket["priority"]] += 1
+
+    def next(self):
+        heads = [queue[0] for queue in self.waiting.values() if queue]
+        if not heads:
+            return None
+        now = time.monotonic()
+        overdue = [ticket for ticket in heads if PRIORITY_CLASSES[ticket["priority"]]["max_wait_s"] is not None
+                   and now - ticket["since"] > PRIORITY_CLASSES[ticket["priority"]]["max_wait_s"]]
+        if overdue:
+            return min(overdue, key=lambda ticket: ticket["since"])
+        return min(heads, key=lambda ticket: (priority_rank(ticket["priority"]) > 0, self.passes[ticket["priority"]],
+                                              priority_rank(ticket["priority"])))
+
+    def is_next(self, ticket):
+        return self.next() is ticket
+
+    def snapshot(self):
+        return {name: {"waiting": len(self.waiting[name]), "served": self.served[name]} for name in PRIORITY_CLASSES}
+
+
+def fair_wait(condition, scheduler, ready, deadline=None, timeout_message=None):
+    """
+    Waits on `condition` (held by the caller) until `ready()` and it is this caller's turn under
+    `scheduler`. Raises TimeoutError at `deadline` (monotonic). Wakes at least once a second so
+    waiters that become overdue are noticed without a notify.
+    """
+    ticket = scheduler.enter()
+    served = False
+    try:
+        while not (ready() and scheduler.is_next(ticket)):
+            remaining = deadline - time.monotonic() if deadline else 1.0
+            if remaining <= 0:
+                raise TimeoutError(timeout_message or "No slot free in time")
+            condition.wait(min(remaining, 1.0))
+        served = True
+    finally:
+        scheduler.leave(ticket, served)
+        condition.notify_all()  # The next waiter in line may be able to go now
+
+
+# Example usage: bulk callers hold a 2-slot source while interactive and normal callers arrive
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    condition = threading.Condition()
+    scheduler = FairScheduler()
+    state = {"inflight": 0, "order": []}
+
+    def call(priority, n):
+        with priority_context(priority):
+            with condition:
+                fair_wait(condition, scheduler, lambda: state["inflight"] < 2)
+                state["inflight"] += 1
+                state["order"].append(f"{priority}-{n}")
+            time.sleep(0.05)
+            with condition:
+                state["inflight"] -= 1
+                condition.notify_all()
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        for n in range(12):
+            executor.submit(call, "bulk", n)
+        time.sleep(0.01)
+        for n in range(8):
+            executor.submit(call, "normal", n)
+        for n in range(2):
+            executor.submit(call, "interactive", n)
+    print(state["order"])
+    print(scheduler.snapshot())
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+from utils.priority import PRIORITY_CLASSES, current_priority
+from utils.tracing import span
+
+# Calls per minute each source accepts from ALL workers together (nodes and processes included).
+# Only enforced in worker mode, where the job queue backend holds the shared schedule; a single
+# CLI run relies on the per-process AIMD limits in utils/concurrency.py alone.
+# Override with RISK_RATE_LIMITS="scrape_urlvoid=60,scrape_ipvoid=20" (0 disables a source's limit).
+# Normal and bulk jobs may only use their class's `rate_share` of a source's rate (utils/priority.py),
+# and together no more than the largest of those shares, so some of every source's budget is always
+# left for interactive lookups.
+SOURCE_RATES = {
+    "scrape_urlvoid": 30,
+    "scrape_ipvoid": 30,
+    "scrape_godaddy_whois": 10,
+    "scrape_similarweb_data": 6,
+    "scrape_mxtoolbox": 6,
+    "scrape_google_safe_browsing": 20,
+    "scrape_tranco_list": 20,
+    "scrape_ssl_org": 20,
+    "scrape_ssltrust_blacklist": 20,
+    "check_social_presence": 10,
+    "get_whois_data": 30,
+    "initiate_scan": 30
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def source_rates():
+    rates = dict(SOURCE_RATES)
+    for item in os.environ.get("RISK_RATE_LIMITS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            rates[name.strip()] = float(value)
+    return rates
+
+
+def use_shared_rate_limits(backend):
+    """
+    Enforces SOURCE_RATES through `backend.acquire_rate(source, interval)` (a job queue backend).
+    Pass None to turn shared limits off again.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _reserve(backend, source, key, interval):
+    try:
+        wait = backend.acquire_rate(key, interval)
+    except Exception as e:
+        print(f"⚠️ Shared rate limit for {source} unavailable ({e}); not waiting")
+        return 0.0
+    if wait > 0:
+        with span("rate_wait", "queue", source=source, budget=key, wait_s=round(wait, 3)):
+            time.sleep(wait)
+    return wait
+
+
+def noninteractive_share():
+    """
+    Share of a source's rate that normal and bulk calls may use together.
+    """
+    return max([spec["rate_share"] for spec in PRIORITY_CLASSES.values() if spec["rate_share"] < 1.0] or [1.0])
+
+
+def wait_for_rate(source):
+    """
+    Blocks until `source` may be called again under its shared rate. Returns the seconds waited.
+    Each caller reserves the next free slot, so concurrent callers are spaced `60 / rate` apart.
+
+    A class with a `rate_share` below 1 first waits for a slot in its own budget for the source
+    (`<source>.<class>`, spaced `60 / (rate * share)` apart), then in the budget all such classes
+    share (`<source>.noninteractive`, at `noninteractive_share()` of the rate), and only then joins
+    the shared schedule. Normal and bulk calls together therefore book the shared schedule slower
+    than the source's rate.
+
+    An interactive call books a slot on the shared schedule too, pushing the normal and bulk calls
+    after it back, but only waits for its own lane (`<source>.interactive`): it never queues behind
+    slots booked ahead of it, and waits at most one interval unless other interactive calls are
+    waiting. It may run one slot early; the source's average rate still holds.
+    """
+    backend = _backend
+    rate = source_rates().get(source) if backend is not None else None
+    if not rate:
+        return 0.0
+    priority = current_priority()
+    share = PRIORITY_CLASSES.get(priority, {}).get("rate_share", 1.0)
+    if share >= 1.0:
+        try:
+            backend.acquire_rate(source, 60.0 / rate)
+        except Exception:
+            pass  # Reported by the lane's reservation below
+        return _reserve(backend, source, f"{source}.{priority}", 60.0 / rate)
+    waited = _reserve(backend, source, f"{source}.{priority}", 60.0 / (rate * share))
+    waited += _reserve(backend, source, f"{source}.noninteractive", 60.0 / (rate * noninteractive_share()))
+    return waited + _reserve(backend, source, source, 60.0 / rate)
@@ -0,0 +1,250 @@
+import json
+import os
+import time
+import uuid
+
+import redis
+
+from utils.job_queue import DEFAULT_LEASE_SECONDS, JOB_STATES, BaseJobQueue, _now, max_attempts, new_job
+from utils.priority import DEFAULT_PRIORITY, PRIORITY_CLASSES, effective_rank
+
+# Job queue on Redis, for workers spread over several hosts. Keys (prefix RISK_REDIS_PREFIX, default "risk"):
+#   <p>:job:<id>          the job document (JSON)
+#   <p>:ready:<class>     list of waiting job ids per priority class, oldest first
+#   <p>:leases            sorted set of claimed job ids scored by lease expiry (Redis server time)
+#   <p>:jobs, <p>:batch:<batch id>    sorted sets of job ids by creation time, for listing
+#   <p>:status:<state>    set of job ids per state, for counts
+#   <p>:events:<id>       list of the job's progress events (JSON)
+#   <p>:rate:<source>     next free call slot of a rate-limited source
+# Lease times come from the Redis server clock, so worker hosts don't need synchronised clocks.
+
+# Pop the oldest waiting job and lease it in one step, so a crash can't lose it in between
+CLAIM_SCRIPT = """
+local id = redis.call('LPOP', KEYS[1])
+if id then redis.call('ZADD', KEYS[2], ARGV[1], id) end
+return id
+"""
+
+# Reserve the next call slot for a source (needs Redis 5+ for TIME before a write)
+RATE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local slot = math.max(now, tonumber(redis.call('GET', KEYS[1]) or '0'))
+local interval = tonumber(ARGV[1])
+redis.call('SET', KEYS[1], tostring(slot + interval), 'EX', math.ceil(slot + interval - now) + 60)
+return tostring(slot - now)
+"""
+
+
+class RedisJobQueue(BaseJobQueue):
+    """
+    Redis-backed job queue. Job documents are updated with WATCH/MULTI, so a worker that lost
+    its lease can't overwrite the state written by the worker that re-claimed the job.
+    """
+
+    def __init__(self, url, prefix=None):
+        self.url = url
+        self.prefix = prefix or os.environ.get("RISK_REDIS_PREFIX", "risk")
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.claim_script = self.redis.register_script(CLAIM_SCRIPT)
+        self.rate_script = self.redis.register_script(RATE_SCRIPT)
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def _server_time(self):
+        seconds, microseconds = self.redis.time()
+        return seconds + microseconds / 1e6
+
+    def _update(self, job_id, mutate):
+        """
+        Applies `mutate(job)` to a job document atomically. `mutate` returns False to leave the job
+        alone, or a list of extra commands (callables taking the pipeline) to run in the same MULTI.
+        Returns the updated job, or None.
+        """
+        key = self._key("job", job_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is None:
+                        pipe.unwatch()
+                        return None
+                    job = json.loads(raw)
+                    old_status = job["status"]
+                    commands = mutate(job)
+                    if commands is False:
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    pipe.set(key, json.dumps(job, default=str))
+                    if job["status"] != old_status:
+                        pipe.srem(self._key("status", old_status), job_id)
+                        pipe.sadd(self._key("status", job["status"]), job_id)
+                    for command in commands or ():
+                        command(pipe)
+                    pipe.execute()
+                    return job
+                except redis.WatchError:
+                    continue  # Someone else changed the job; re-read and try again
+
+    def _ready_key(self, job):
+        return self._key("ready", job.get("priority", DEFAULT_PRIORITY))
+
+    def _event(self, pipe, job_id, kind, source=None, detail=None):
+        pipe.rpush(self._key("events", job_id),
+                   json.dumps({"at": _now(), "kind": kind, "source": source, "detail": detail or {}}, default=str))
+
+    def enqueue(self, domains, profile, options=None, batch_id=None, priority=None):
+        batch_id = batch_id or uuid.uuid4().hex
+        created_at = _now()
+        jobs = [new_job(domain, profile, options, batch_id, created_at, priority) for domain in domains]
+        now = time.time()
+        with self.redis.pipeline() as pipe:
+            for job in jobs:
+                pipe.set(self._key("job", job["id"]), json.dumps(job))
+                pipe.sadd(self._key("status", "queued"), job["id"])
+                pipe.zadd(self._key("jobs"), {job["id"]: now})
+                pipe.zadd(self._key("batch", batch_id), {job["id"]: now})
+                self._event(pipe, job["id"], "queued")
+                pipe.rpush(self._ready_key(job), job["id"])
+            pipe.execute()
+        return jobs
+
+    def _expire_leases(self, now):
+        for job_id in self.redis.zrangebyscore(self._key("leases"), 0, now):
+            if not self.redis.zrem(self._key("leases"), job_id):
+                continue  # Another worker is already re-queueing it
+
+            def expire(job):
+                if job["status"] != "running":
+                    return False
+                if job["attempts"] >= max_attempts():
+                    error = f"lease expired on {job['attempts']} attempt(s); last worker {job['worker']}"
+                    job.update(status="failed", error=error, finished_at=_now(), lease_expires_at=None)
+                    return [lambda pipe: self._event(pipe, job["id"], "failed", detail={"error": error})]
+                worker = job["worker"]
+                job.update(status="queued", worker=None, lease_expires_at=None)
+                return [lambda pipe: self._event(pipe, job["id"], "lease_expired", detail={"worker": worker}),
+                        lambda pipe: pipe.lpush(self._ready_key(job), job["id"])]  # Back to the front
+
+            self._update(job_id, expire)
+
+    def _next_class(self, priorities):
+        """
+        The ready list whose head job has the best aged rank, or None when all are empty.
+        """
+        now = time.time()
+        best = None
+        for priority in priorities or PRIORITY_CLASSES:
+            head = self.redis.lindex(self._key("ready", priority), 0)
+            if head is None:
+                continue
+            enqueued_at = self.redis.zscore(self._key("jobs"), head) or now
+            candidate = (effective_rank(priority, now - enqueued_at), enqueued_at, priority)
+            best = min(best, candidate) if best else candidate
+        return best[2] if best else None
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS, priorities=None):
+        now = self._server_time()
+        self._expire_leases(now)
+        while True:
+            priority = self._next_class(priorities)
+            if priority is None:
+                return None
+            job_id = self.claim_script(keys=[self._key("ready", priority), self._key("leases")], args=[now + lease_seconds])
+            if job_id is None:
+                continue  # Another worker emptied that list; look again
+
+            def start(job):
+                job.update(status="running", worker=worker, attempts=job["attempts"] + 1, started_at=_now(),
+                           lease_expires_at=now + lease_seconds)
+                return [lambda pipe: self._event(pipe, job["id"], "started", detail={"worker": worker})]
+
+            job = self._update(job_id, start)
+            if job is not None:
+                return job
+            self.redis.zrem(self._key("leases"), job_id)  # Document gone; drop the orphaned id
+
+    def heartbeat(self, job_id, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        expires = self._server_time() + lease_seconds
+
+        def renew(job):
+            if job["status"] != "running" or job["worker"] != worker:
+                return False
+            job["lease_expires_at"] = expires
+            return [lambda pipe: pipe.zadd(self._key("leases"), {job_id: expires}, xx=True)]
+
+        return self._update(job_id, renew) is not None
+
+    def release(self, job_id, worker):
+        def give_back(job):
+            if job["status"] != "running" or job["worker"] != worker:
+                return False
+            job.update(status="queued", worker=None, lease_expires_at=None, attempts=max(job["attempts"] - 1, 0))
+            return [lambda pipe: pipe.zrem(self._key("leases"), job_id),
+                    lambda pipe: self._event(pipe, job_id, "released", detail={"worker": worker}),
+                    lambda pipe: pipe.lpush(self._ready_key(job), job_id)]
+
+        return self._update(job_id, give_back) is not None
+
+    def finish(self, job_id, result=None, error=None, worker=None):
+        status = "failed" if error else "done"
+
+        def complete(job):
+            if job["status"] != "running" or (worker is not None and job["worker"] != worker):
+                return False
+            job.update(status=status, error=error, result=result, finished_at=_now(), lease_expires_at=None)
+            return [lambda pipe: pipe.zrem(self._key("leases"), job_id),
+                    lambda pipe: self._event(pipe, job_id, status, detail={"error": error} if error else result)]
+
+        return self._update(job_id, complete) is not None
+
+    def add_event(self, job_id, kind, source=None, **detail):
+        with self.redis.pipeline(transaction=False) as pipe:
+            self._event(pipe, job_id, kind, source, detail)
+            pipe.execute()
+
+    def get(self, job_id):
+        raw = self.redis.get(self._key("job", job_id))
+        return json.loads(raw) if raw else None
+
+    def list(self, batch_id=None, status=None, limit=100):
+        index = self._key("batch", batch_id) if batch_id else self._key("jobs")
+        jobs, start, page = [], 0, max(limit, 100)
+        while len(jobs) < limit:
+            ids = self.redis.zrevrange(index, start, start + page - 1)
+            if not ids:
+                break
+            for raw in self.redis.mget([self._key("job", job_id) for job_id in ids]):
+                job = json.loads(raw) if raw else None
+                if job and (not status or job["status"] == status):
+                    jobs.append(job)
+            start += page
+        return jobs[:limit]
+
+    def events(self, job_id, after=0):
+        return [{"id": number, "job_id": job_id, **json.loads(raw)}
+                for number, raw in enumerate(self.redis.lrange(self._key("events", job_id), after, -1), start=after + 1)]
+
+    def counts(self):
+        with self.redis.pipeline(transaction=False) as pipe:
+            for state in JOB_STATES:
+                pipe.scard(self._key("status", state))
+            return dict(zip(JOB_STATES, pipe.execute()))
+
+    def acquire_rate(self, source, interval):
+        return float(self.rate_script(keys=[self._key("rate", source)], args=[interval]))
+
+    def close(self):
+        self.redis.close()
+
+
+# Example usage (needs a Redis server, e.g. `docker run -p 6379:6379 redis`)
+if __name__ == "__main__":
+    queue = RedisJobQueue("redis://localhost:6379/15", prefix=f"risk-demo-{uuid.uuid4().hex[:6]}")
+    queue.enqueue(["example.com"], "fast")
+    job = queue.claim("worker-1", lease_seconds=30)
+    print(queue.heartbeat(job["id"], "worker-1"), queue.finish(job["id"], {"risk_score": 12}, worker="worker-1"))
+    print(queue.counts(), [event["kind"] for event in queue.events(job["id"])], queue.acquire_rate("demo", 2))
@@ -0,0 +1,173 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from utils.retry_policy import attach_status, classify_failure
+from utils.save_data import data_dir, record_lock, save_data
+from utils.snapshots import latest_snapshots, load_snapshot, snapshot_dir
+
+# Record key -> (scraper name the snapshots are filed under, module with its `parse_snapshot`)
+REPARSERS = {
+    "social_presence": ("check_social_presence", "scrapers.check_linkedin"),
+    "godaddy_whois": ("scrape_godaddy_whois", "scrapers.godaddy_whois_scraper"),
+    "urlvoid": ("scrape_urlvoid", "scrapers.urlvoid_scraper"),
+    "ssltrust_blacklist": ("scrape_ssltrust_blacklist", "scrapers.ssltrust_blacklist_scraper"),
+    "ssl_org_report": ("scrape_ssl_org", "scrapers.ssl_org_scraper"),
+    "google_safe_browsing": ("scrape_google_safe_browsing", "scrapers.google_safe_browsing_scraper"),
+    "tranco_list": ("scrape_tranco_list", "scrapers.tranco_list_scraper"),
+    "similarweb_data": ("scrape_similarweb_data", "scrapers.scrape_similarweb_data"),
+    "mxtoolbox": ("scrape_mxtoolbox", "scrapers.mxtool_scraper"),
+    "popup_and_ads": ("check_popups_ads", "scrapers.check_popup_ads"),
+    "ipvoid": ("scrape_ipvoid", "scrapers.ipvoid_scraper"),
+    "homepage_probe": ("probe_homepage", "scrapers.homepage_probe"),
+    "privacy_and_terms": ("check_privacy_term", "scrapers.check_privacy_term")
+}
+
+def record_target(key, record):
+    """
+    What the source looked up for this record: the domain, or the IP for IPVoid.
+    """
+    if key == "ipvoid":
+        for source in ("ipvoid", "urlvoid"):
+            ip = (record.get(source) or {}).get("ip_address") if isinstance(record.get(source), dict) else None
+            if ip and ip != "unknown":
+                return ip
+        return None
+    return record.get("domain")
+
+
+def load_records(domains=None, directory=None):
+    """
+    Saved records by domain (only the requested domains, if given).
+    """
+    records = {}
+    for path in sorted(glob.glob(os.path.join(directory or data_dir(), "*.json"))):
+        domain = os.path.basename(path)[:-len(".json")]
+        if domains and domain not in domains:
+            continue
+        try:
+            with open(path) as file:
+                records[domain] = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping {path}: {e}")
+    return records
+
+
+def plan(records, keys, directory=None):
+    """
+    One task per (domain, source) with an archived snapshot.
+    """
+    tasks = []
+    for domain, record in records.items():
+        for key in keys:
+            source, module = REPARSERS[key]
+            target = record_target(key, record)
+            entries = latest_snapshots(target, source, directory) if target else {}
+            if entries:
+                tasks.append({"domain": domain, "key": key, "source": source, "module": module,
+                              "target": target, "entries": entries, "directory": directory})
+    return tasks
+
+
+def run_task(task):
+    """
+    Runs one source's extraction over its archived pages. Runs in a worker process.
+    """
+    entries = task["entries"]
+    try:
+        pages = {page: load_snapshot(entry["digest"], task["directory"]) for page, entry in entries.items()}
+        meta = {page: {**entry.get("meta", {}), "url": entry.get("url")} for page, entry in entries.items()}
+        parse = importlib.import_module(task["module"]).parse_snapshot
+        result, error = parse(pages, task["target"], meta=meta), None
+    except Exception as e:
+        result, error = {"error": f"reparse_failed: {type(e).__name__}: {e}"}, e
+    status = {
+        "class": classify_failure(result, error),
+        "reparsed_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "snapshots": {page: {"digest": entry["digest"], "captured_at": entry["captured_at"]}
+                      for page, entry in entries.items()}
+    }
+    return task["domain"], task["key"], result, status
+
+
+def reparse(domains=None, keys=None, workers=None, dry_run=False, rescore=False, records_dir=None, directory=None):
+    """
+    Re-runs extraction for saved records from their archived snapshots, in parallel worker
+    processes, and updates the records. No network access is needed.
+
+    Each updated record is re-read under its record lock and only the re-parsed sources are
+    written back, so a run or scan verdict saved while the re-parse was working isn't lost.
+
+    Returns:
+        dict: Counts of updated, unchanged and failed (domain, source) pairs.
+    """
+    keys = list(keys or REPARSERS)
+    records = load_records(domains, records_dir)
+    tasks = plan(records, keys, directory)
+    print(f"🗂️ {len(tasks)} snapshot(s) to re-parse across {len(records)} record(s) from {directory or snapshot_dir()}")
+    summary = {"updated": 0, "unchanged": 0, "failed": 0}
+    if not tasks:
+        return summary
+
+    updates = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for domain, key, result, status in executor.map(run_task, tasks, chunksize=4):
+            record = records[domain]
+            if status["class"] != "ok":
+                summary["failed"] += 1
+                print(f"⚠️ {domain} {key}: {status['class']} ({str(result.get('error', ''))[:120] if isinstance(result, dict) else ''})")
+                continue
+            previous = record.get(key)
+            if isinstance(previous, dict):
+                previous = {k: v for k, v in previous.items() if k != "scrape_status"}
+            if previous == result:
+                summary["unchanged"] += 1
+                continue
+            updates.setdefault(domain, {})[key] = (result, status)
+            summary["updated"] += 1
+            print(f"🔄 {domain} {key}: updated from snapshot")
+
+    if not dry_run:
+        for domain in sorted(updates):
+            with record_lock(domain):
+                record = load_records({domain}, records_dir).get(domain)
+                if record is None:
+                    print(f"⚠️ {domain}: record is gone, re-parsed results not written")
+                    continue
+                for key, (result, status) in updates[domain].items():
+                    status = {**(record.get("scrape_status") or {}).get(key, {}), **status}
+                    record[key] = attach_status(result, status)
+                    record.setdefault("scrape_status", {})[key] = status
+                save_data(domain, **{k: v for k, v in record.items() if k != "domain"})
+                if rescore:
+                    from utils.risk_scoring import assess_risk
+                    assess_risk(domain)
+
+    print(f"✅ Re-parse done: {summary['updated']} updated, {summary['unchanged']} unchanged, "
+          f"{summary['failed']} failed{' (dry run, nothing written)' if dry_run else ''}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run scraper extraction over archived page snapshots.")
+    parser.add_argument("--domains", help="Comma-separated domains (default: every saved record)")
+    parser.add_argument("--sources", help="Comma-separated record keys (default: all): " + ", ".join(REPARSERS))
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--rescore", action="store_true", help="Re-run the risk assessment for updated records")
+    args = parser.parse_args()
+
+    keys = args.sources.split(",") if args.sources else None
+    unknown = [key for key in keys or [] if key not in REPARSERS]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    reparse(domains=set(args.domains.split(",")) if args.domains else None, keys=keys,
+            workers=args.workers, dry_run=args.dry_run, rescore=args.rescore)
+
+
+if __name__ == "__main__":
+    main()
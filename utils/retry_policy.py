@@ -0,0 +1,177 @@
+import random
+import re
+import time
+
+from utils.concurrency import THROTTLE_RE, TIMEOUT_RE
+from utils.metrics import SCRAPER_ATTEMPTS
+from utils.tracing import span
+
+# Failure classes recorded in `scrape_status`:
+#   ok                  the scraper returned data
+#   timeout             the source (or our wait for it) ran out of time
+#   blocked             rate limited, captcha or access denied by the source
+#   tls_invalid         the host answered, but its certificate or TLS setup is broken. That is a
+#                       finding about the site, not a failed scrape: never retried, and scored
+#   target_unreachable  DNS or connection failure reaching a host
+#   parse_changed       the page loaded but the expected elements/fields were not there
+#   error               anything else
+TLS_INVALID_RE = re.compile(
+    r"CERTIFICATE_VERIFY_FAILED|certificate verify failed|SSLCertVerificationError|ERR_CERT|ERR_SSL|SSLError",
+    re.IGNORECASE)
+UNREACHABLE_RE = re.compile(
+    r"name or service not known|nodename nor servname|getaddrinfo|temporary failure in name resolution|"
+    r"NameResolutionError|ERR_NAME_NOT_RESOLVED|ERR_CONNECTION|ERR_ADDRESS_UNREACHABLE|ERR_INTERNET_DISCONNECTED|"
+    r"connection refused|connection reset|no route to host|network is unreachable|max retries exceeded|"
+    r"ConnectionError|RemoteDisconnected",
+    re.IGNORECASE)
+# Classes whose result is kept for scoring (see `failed_sources`)
+SCORED_CLASSES = {"ok", "tls_invalid"}
+PARSE_CHANGED_RE = re.compile(
+    r"no such element|unable to locate element|NoSuchElement|StaleElementReference|error_extracting|"
+    r"KeyError|IndexError|list index out of range|'NoneType' object|has no attribute|JSONDecodeError",
+    re.IGNORECASE)
+
+# Per-source retry policies. `retry_on` lists the classes worth another attempt.
+DEFAULT_POLICY = {
+    "max_attempts": 3,
+    "base_delay": 2.0,
+    "max_delay": 30.0,
+    "retry_on": {"timeout", "target_unreachable", "blocked"}
+}
+RETRY_POLICIES = {
+    "scrape_mxtoolbox": {"max_attempts": 2, "base_delay": 10.0},   # A single run can take 15 minutes
+    "scrape_godaddy_whois": {"base_delay": 10.0, "max_delay": 60.0},
+    "scrape_similarweb_data": {"base_delay": 10.0, "max_delay": 60.0},
+    "check_social_presence": {"base_delay": 5.0},
+    "get_whois_data": {"max_attempts": 4, "base_delay": 1.0},
+    "scrape_ipvoid": {"max_attempts": 4, "base_delay": 1.0},
+    "initiate_scan": {"max_attempts": 2},
+    # Fast-tier checks have a ~1 s budget: a failure is reported, never retried
+    "probe_tls": {"max_attempts": 1},
+    "probe_homepage": {"max_attempts": 1},
+    "lookup_local_lists": {"max_attempts": 1}
+}
+BLOCKED_DELAY_FACTOR = 3  # Back off harder from a source that is pushing back
+
+
+def get_policy(source):
+    """
+    The retry policy for a source: the defaults overridden by its RETRY_POLICIES entry.
+    """
+    return {**DEFAULT_POLICY, **RETRY_POLICIES.get(source, {})}
+
+
+def classify_failure(result=None, error=None):
+    """
+    Classifies one scraper attempt from its exception or its result
+    (scrapers report most failures as {"error": ...} dicts, some as None).
+    """
+    if error is not None:
+        message = f"{type(error).__name__}: {error}"
+    elif result is None:
+        return "error"
+    elif isinstance(result, dict) and result.get("error"):
+        message = " ".join(str(result.get(key, "")) for key in ("error", "details"))
+    else:
+        return "ok"
+
+    if TLS_INVALID_RE.search(message):
+        return "tls_invalid"
+    if UNREACHABLE_RE.search(message):
+        return "target_unreachable"
+    if THROTTLE_RE.search(message):
+        return "blocked"
+    if TIMEOUT_RE.search(message) or type(error).__name__ == "TimeoutException":
+        return "timeout"
+    if PARSE_CHANGED_RE.search(message):
+        return "parse_changed"
+    return "error"
+
+
+def backoff_delay(policy, attempt, failure_class):
+    """
+    Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2^(attempt - 1))].
+    """
+    base = policy["base_delay"] * (BLOCKED_DELAY_FACTOR if failure_class == "blocked" else 1)
+    return random.uniform(0, min(policy["max_delay"], base * 2 ** (attempt - 1)))
+
+
+def run_with_retries(source, func, *args, **kwargs):
+    """
+    Calls `func(*args)` until it succeeds, fails with a non-retryable class, or runs out of attempts.
+
+    Returns:
+        tuple: (result, status) where status is {"class", "attempts", "history", "retryable", "elapsed_s"}.
+        An exception on the last attempt becomes an {"error": ...} result.
+    """
+    policy = get_policy(source)
+    history = []
+    start = time.monotonic()
+    result = None
+
+    for attempt in range(1, policy["max_attempts"] + 1):
+        error = None
+        with span("attempt", "retry", source=source, attempt=attempt):
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                result = {"error": f"{type(e).__name__}: {e}"}
+        failure_class = classify_failure(result, error)
+        history.append(failure_class)
+        SCRAPER_ATTEMPTS.inc(source=source, outcome=failure_class)
+
+        if failure_class == "ok" or failure_class not in policy["retry_on"] or attempt == policy["max_attempts"]:
+            break
+        delay = backoff_delay(policy, attempt, failure_class)
+        print(f"🔁 {source}: {failure_class} on attempt {attempt}, retrying in {delay:.1f}s")
+        with span("backoff", "retry", source=source, failure_class=failure_class):
+            time.sleep(delay)
+
+    status = {
+        "class": history[-1],
+        "attempts": len(history),
+        "history": history,
+        "retryable": history[-1] in policy["retry_on"],
+        "elapsed_s": round(time.monotonic() - start, 2)
+    }
+    return result, status
+
+
+def attach_status(result, status):
+    """
+    Records the status on a result. Failed attempts that produced no dict become an error dict,
+    so "scrape failed" is never confused with "source said clean".
+    """
+    if isinstance(result, dict):
+        return {**result, "scrape_status": status}
+    if status["class"] != "ok":
+        return {"error": f"{status['class']} after {status['attempts']} attempt(s)", "scrape_status": status}
+    return result  # e.g. JSON strings; the status is still reported separately
+
+
+def failed_sources(data):
+    """
+    Names of sources in a saved record whose scrape did not succeed. A broken certificate
+    (tls_invalid) is a result, so those sources are kept.
+    """
+    statuses = dict(data.get("scrape_status") or {})
+    for name, value in data.items():
+        if isinstance(value, dict) and isinstance(value.get("scrape_status"), dict):
+            statuses.setdefault(name, value["scrape_status"])
+    return {name for name, status in statuses.items() if status.get("class") not in SCORED_CLASSES}
+
+
+# Example usage: a source with a transient DNS failure
+if __name__ == "__main__":
+    calls = []
+
+    def flaky_lookup(domain):
+        calls.append(domain)
+        if len(calls) < 3:
+            raise ConnectionError("Temporary failure in name resolution")
+        return {"domain": domain, "ok": True}
+
+    RETRY_POLICIES["demo"] = {"base_delay": 0.2}
+    print(run_with_retries("demo", flaky_lookup, "example.com"))
+    print(run_with_retries("demo", lambda d: {"error": "error_extracting_data: no such element"}, "example.com"))
@@ -1,7 +1,9 @@
 import json
 import os
 from datetime import datetime
-from utils.save_data import save_data
+from utils.save_data import record_path, save_data
+from utils.retry_policy import failed_sources
+from utils.infra_index import infra_boost_enabled, infrastructure_risk
 
 # Define risk categories
 RISK_CATEGORIES = {
@@ -10,25 +12,61 @@ RISK_CATEGORIES = {
     "high_risk": (81, 100)
 }
 
+# A merchant on a local blocklist is at least medium risk, whatever else the checks say
+BLOCKLIST_PENALTY = RISK_CATEGORIES["med_risk"][0]
+# Cloudflare's URL scanner classifying the site as malicious (phishing, malware, ...)
+CLOUDFLARE_MALICIOUS_PENALTY = 15
+
+
+def assessment_tier(data):
+    """Which tier produced the record: "deep" once the deep profile has run (records saved before
+    profiles existed were full runs, so they count as deep), else "fast"."""
+    profiles = data.get("assessment_profiles")
+    if not profiles:
+        return "deep"
+    return "deep" if "deep" in profiles else "fast"
+
+
 def calculate_risk_score(data):
-    """Calculates the risk score based on boolean-based conditions."""
+    """Calculates the risk score based on boolean-based conditions.
+
+    Sources whose scrape failed (see `scrape_status`) are treated as unknown: they neither add
+    nor remove risk, instead of looking like a clean or missing result.
+
+    The score is tier-aware (see `assessment_tier`). Each signal comes from its deep source when
+    that ran, else from the fast probe that approximates it (homepage_probe, tls_probe,
+    local_lists). Penalties for a *missing* result (no WHOIS date, no SimilarWeb data, no Tranco
+    rank) only apply once the source has actually been checked, so a fast-only record is not
+    penalised for the deep sources it never ran.
+    """
     risk_score = 0
+    tier = assessment_tier(data)
+    failed = failed_sources(data)
+    data = {key: value for key, value in data.items() if key not in failed}
+    checked = lambda key: tier == "deep" or key in data
 
     try:
-        # Privacy & Terms
-        privacy_and_terms = data.get("privacy_and_terms")
+        homepage = data.get("homepage_probe") or {}
+        tls = data.get("tls_probe") or {}
+        local_lists = data.get("local_lists") or {}
+
+        # Privacy & Terms (the fast tier only sees the homepage)
+        privacy_and_terms = data.get("privacy_and_terms") or homepage
         if privacy_and_terms:
             risk_score += 5 if privacy_and_terms.get("is_accessible") is False else 0
             risk_score += 5 if privacy_and_terms.get("terms_of_service_present") is False else 0
             risk_score += 5 if privacy_and_terms.get("privacy_policy_present") is False else 0
 
-        # HTTPS & SSL
-        https_check = data.get("https_check")
+        # HTTPS & SSL (fast tier: one TLS handshake; an untrusted certificate counts as no fingerprint,
+        # a site without HTTPS only gets the HTTPS penalty, as in the deep tier)
+        https_check = data.get("https_check") or tls
         ssl_fingerprint = data.get("ssl_sha_256_fingerprint")
         if https_check:
             risk_score += 12 if not https_check.get("has_https") else 0
         if ssl_fingerprint:
             risk_score += 12 if not ssl_fingerprint.get("has_sha256") else 0
+        elif tls.get("has_https"):
+            risk_score += 12 if not tls.get("certificate_valid") else 0
 
         # Social Media Presence
         social_presence = json.loads(data.get("social_presence", "{}"))
@@ -41,7 +79,8 @@ def calculate_risk_score(data):
         # Domain Age & WHOIS Info
         whois_creation_date = data.get("whois", {}).get("creation_date")
         urlvoid_registered_on = data.get("urlvoid", {}).get("registered_on")
-        if not whois_creation_date and not urlvoid_registered_on:
+        if (not whois_creation_date and not urlvoid_registered_on and not failed & {"whois", "urlvoid"}
+                and (checked("whois") or checked("urlvoid"))):
             risk_score += 8  # Penalize only if both are missing
 
         # URLVoid & IPVoid Security Scans
@@ -52,6 +91,18 @@ def calculate_risk_score(data):
         if ipvoid:
             risk_score += 6 if ipvoid.get("detections_count", {}).get("detected", 0) > 0 else 0
 
+        # Cloudflare URL scan (only once its verdict has been collected; pending scans count for nothing)
+        cloudflare_scan = data.get("cloudflare_scan") or {}
+        if cloudflare_scan.get("status") == "done":
+            risk_score += CLOUDFLARE_MALICIOUS_PENALTY if cloudflare_scan.get("malicious") else 0
+
+        # Infrastructure shared with known high-risk merchants (set by assess_risk with RISK_INFRA_BOOST=1)
+        risk_score += (data.get("infrastructure_risk") or {}).get("boost", 0)
+
+        # Local blocklists (domain, parent domain or IP)
+        if local_lists.get("blocklisted"):
+            risk_score += BLOCKLIST_PENALTY
+
         # SSL Trust & Certificate Issues
         ssltrust_results = data.get("ssltrust_blacklist", {}).get("results", "").lower()
         if ssltrust_results:
@@ -67,14 +118,17 @@ def calculate_risk_score(data):
         if google_safe_status:
             risk_score += 7 if "no unsafe content found" not in google_safe_status else 0
 
-        # Tranco Ranking
-        tranco_rank = data.get("tranco_list", {}).get("Tranco Rank", "--")
-        if tranco_rank in ["--", "0"]:
-            risk_score += 4
+        # Tranco Ranking (fast tier: the local list, when one is configured)
+        if checked("tranco_list"):
+            tranco_rank = data.get("tranco_list", {}).get("Tranco Rank", "--")
+            if tranco_rank in ["--", "0"] and "tranco_list" not in failed:
+                risk_score += 4
+        elif local_lists.get("lists", {}).get("tranco"):
+            risk_score += 4 if not local_lists.get("tranco_rank") else 0
 
         # SimilarWeb Data
         similarweb_data = data.get("similarweb_data", {})
-        if not similarweb_data or all(value == "NA" for value in similarweb_data.values()):
+        if checked("similarweb_data") and "similarweb_data" not in failed and (not similarweb_data or all(value == "NA" for key, value in similarweb_data.items() if key != "scrape_status")):
             risk_score += 4  # Penalize if SimilarWeb data is not available
 
         # MXToolbox Blacklist & Email Issues
@@ -86,16 +140,21 @@ def calculate_risk_score(data):
             elif problem.get("Status") == "Status Problem" and problem.get("Category") == "smtp":
                 risk_score += 8
 
-        # Page Size & Performance
-        page_size_str = data.get("page_size", {}).get("Page Size (KB)", "0 KB").replace("~", "").split()[0]
-        try:
-            page_size_kb = int(page_size_str)
-            risk_score += 9 if page_size_kb < 100 else 0
-        except ValueError:
-            pass
+        # Page Size & Performance (fast tier: the homepage probe's byte count)
+        page_size = data.get("page_size") or {k: v for k, v in homepage.items() if k == "html_bytes"}
+        if isinstance(page_size.get("html_bytes"), int):
+            risk_score += 9 if page_size["html_bytes"] < 100 * 1024 else 0
+        else:
+            # Older records hold EntireTools strings such as "~123 KB"
+            page_size_str = page_size.get("Page Size (KB)", "0 KB").replace("~", "").split()[0]
+            try:
+                page_size_kb = int(page_size_str)
+                risk_score += 9 if page_size_kb < 100 else 0
+            except ValueError:
+                pass
 
         # Popups & Ads
-        popup_ads = data.get("popup_and_ads")
+        popup_ads = data.get("popup_and_ads") or homepage
         if popup_ads:
             risk_score += 7 if popup_ads.get("has_popups") else 0
             risk_score += 4 if popup_ads.get("has_ads") else 0
@@ -115,8 +174,8 @@ def categorize_risk(score):
 
 
 def assess_risk(domain):
-    """Loads JSON data, calculates risk, and saves the updated data."""
-    json_file_path = os.path.join("data", f"{domain}.json")
+    """Loads JSON data, calculates risk, and saves the updated data. Returns the score summary."""
+    json_file_path = record_path(domain)
 
     if not os.path.exists(json_file_path):
         print(f"❌ No data found for domain: {domain}")
@@ -125,19 +184,30 @@ def assess_risk(domain):
     with open(json_file_path, "r") as file:
         data = json.load(file)
 
+    # Shared infrastructure with known high-risk merchants (utils/infra_index.py)
+    if infra_boost_enabled():
+        data["infrastructure_risk"] = infrastructure_risk(domain, data)
+    else:
+        data.pop("infrastructure_risk", None)
+
     # Calculate risk score
     risk_score = calculate_risk_score(data)
     risk_category = categorize_risk(risk_score)
+    risk_tier = assessment_tier(data)
     assessment_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
     # Append risk score to data
     data["risk_score"] = risk_score
     data["risk_category"] = risk_category
+    data["risk_tier"] = risk_tier
+    data["risk_provisional"] = risk_tier == "fast"  # Until the deep tier has run
     data["datetime_assessment"] = assessment_time
 
     # Save updated data
     save_data(domain, **data)
-    print(f"✅ Risk assessment completed for {domain} with score {risk_score} ({risk_category}).")
+    print(f"✅ Risk assessment completed for {domain} with score {risk_score} ({risk_category}, {risk_tier} tier).")
+    return {"risk_score": risk_score, "risk_category": risk_category, "risk_tier": risk_tier,
+            "risk_provisional": data["risk_provisional"], "datetime_assessment": assessment_time}
 
 
 if __name__ == "__main__":
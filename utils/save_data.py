@@ -1,20 +1,49 @@
 import json
 import os
+import threading
+
+DEFAULT_DATA_DIR = "data"
+
+_record_locks = {}
+_record_locks_lock = threading.Lock()
+
+
+def data_dir():
+    """
+    Where records are stored: RISK_DATA_DIR (e.g. a mount shared by several worker hosts), else `data/`.
+    """
+    return os.environ.get("RISK_DATA_DIR", DEFAULT_DATA_DIR)
+
+
+def record_path(domain_name):
+    return os.path.join(data_dir(), f"{domain_name}.json")
+
+
+def record_lock(domain_name):
+    """
+    Lock to hold around a read-modify-write of a domain's record (e.g. the pipeline saving a run
+    while the scan poller merges a verdict into it). Re-entrant; shared within this process only.
+    """
+    with _record_locks_lock:
+        return _record_locks.setdefault(domain_name, threading.RLock())
+
 
 def save_data(domain_name, **scraped_data):
     """
-    Saves the scraped data to a JSON file in the `data/` directory.
+    Saves the scraped data to a JSON file in the `data/` directory (or RISK_DATA_DIR).
+
+    The file is written to a temporary name and renamed into place, so a reader on another
+    worker never sees a half-written record.
 
     Args:
         domain_name (str): The domain name being checked (e.g., "bizzycar.com").
         scraped_data (dict): A dictionary containing scraped data from various sources.
     """
     # Ensure the data directory exists
-    if not os.path.exists("data"):
-        os.makedirs("data")
+    os.makedirs(data_dir(), exist_ok=True)
 
     # Construct file path
-    file_path = f"data/{domain_name}.json"
+    file_path = record_path(domain_name)
 
     # Prepare JSON content
     data_to_save = {
@@ -31,8 +60,15 @@ def save_data(domain_name, **scraped_data):
 
     # Save JSON data to file
     try:
-        with open(file_path, 'w') as f:
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
             f.write(json_data)
+        os.replace(tmp_path, file_path)
         print(f"✅ Data saved successfully to {file_path}")
     except Exception as e:
         print(f"❌ Error: Failed to save data - {e}")
+        return
+
+    # Keep the cross-merchant infrastructure index in step with the record
+    from utils.infra_index import update_infra_index
+    update_infra_index(domain_name, data_to_save)
@@ -0,0 +1,331 @@
+"""
+Collects Cloudflare URL scan verdicts in the background. The pipeline submits a scan at the start of
+a deep assessment (scrapers/cloudflare_scraper.py) and hands the pending UUID to the process-wide
+poller, which checks every pending scan in batches with exponential backoff and merges each verdict
+into its domain's record (and rescores it) when ready.
+
+Scans left pending by a process that exited (a CLI run, a stopped worker) are picked up by a sweep:
+
+    python -m utils.scan_poller                 # every record with a pending scan
+    python -m utils.scan_poller example.com --timeout 300
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from utils.metrics import SCAN_POLLS, register_collector
+from utils.save_data import record_lock, record_path, save_data
+
+SCAN_KEY = "cloudflare_scan"
+DEFAULT_BATCH_SIZE = 20          # Scans checked per round (RISK_SCAN_POLL_BATCH)
+DEFAULT_MAX_WAIT_S = 15 * 60     # Give up on a scan this long after submission (RISK_SCAN_MAX_WAIT_S)
+INITIAL_DELAY_S = 10.0           # Most scans finish in 10-30 s
+MAX_DELAY_S = 120.0
+MAX_ERRORS = 5
+RESULT_RETENTION_S = 3600        # Finished results nobody merged or took are dropped after this
+
+
+def _env_number(name, default):
+    try:
+        return type(default)(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def is_pending(scan):
+    return isinstance(scan, dict) and bool(scan.get("uuid")) and scan.get("status", "pending") == "pending"
+
+
+def merge_scan_result(domain, uuid, update):
+    """
+    Writes a finished scan into the domain's record and rescores it. Does nothing (returns False)
+    if the record doesn't hold this scan, e.g. its assessment hasn't been saved yet or a newer
+    scan replaced it.
+    """
+    from utils.risk_scoring import assess_risk
+
+    with record_lock(domain):
+        try:
+            with open(record_path(domain)) as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return False
+        scan = record.get(SCAN_KEY)
+        if not isinstance(scan, dict) or scan.get("uuid") != uuid:
+            return False
+        record[SCAN_KEY] = {**scan, **update}
+        save_data(domain, **record)
+        assess_risk(domain)
+    return True
+
+
+class ScanPoller:
+    """
+    Pending scans by UUID, each with its own backoff. One background thread polls whatever is due,
+    up to `batch_size` scans per round over a shared connection pool. A 429 pauses every scan.
+    """
+
+    def __init__(self, batch_size=None, max_wait_s=None, initial_delay=INITIAL_DELAY_S, max_delay=MAX_DELAY_S,
+                 merge=merge_scan_result):
+        self.batch_size = batch_size or _env_number("RISK_SCAN_POLL_BATCH", DEFAULT_BATCH_SIZE)
+        self.max_wait_s = max_wait_s or _env_number("RISK_SCAN_MAX_WAIT_S", DEFAULT_MAX_WAIT_S)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.merge = merge
+        self.pending = {}    # uuid -> {"domain", "deadline", "next_poll", "delay", "polls", "errors"}
+        self.finished = {}   # uuid -> (domain, update, finished monotonic), until merged or taken
+        self.delivering = set()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.session = None
+
+    def watch(self, domain, scan, start=True):
+        """
+        Starts polling a submitted scan (a `cloudflare_scan` result). Returns False if it isn't pending.
+        """
+        if not is_pending(scan):
+            return False
+        now = time.monotonic()
+        waited = 0.0
+        if scan.get("submitted_at"):
+            try:
+                waited = max(0.0, (datetime.utcnow() - datetime.strptime(scan["submitted_at"], "%Y-%m-%d %H:%M:%S")).total_seconds())
+            except ValueError:
+                pass
+        with self.condition:
+            if scan["uuid"] not in self.pending:
+                self.pending[scan["uuid"]] = {"domain": domain, "deadline": now + max(self.max_wait_s - waited, 0),
+                                              "next_poll": now + max(self.initial_delay - waited, 0),
+                                              "delay": self.initial_delay, "polls": 0, "errors": 0}
+            self.condition.notify_all()
+        if start:
+            self.start()
+        return True
+
+    def take(self, uuid):
+        """
+        The finished update for a scan, if it finished but wasn't merged yet (the caller saves it).
+        """
+        with self.condition:
+            entry = self.finished.pop(uuid, None)
+        return entry[1] if entry else None
+
+    def start(self):
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="scan-poller", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                wait = min(entry["next_poll"] for entry in self.pending.values()) - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"⚠️ Scan polling failed: {e}")
+                time.sleep(self.initial_delay)
+
+    def _due(self):
+        now = time.monotonic()
+        with self.condition:
+            due = sorted((entry["next_poll"], uuid) for uuid, entry in self.pending.items() if entry["next_poll"] <= now)
+        return [uuid for _, uuid in due[:self.batch_size]]
+
+    def poll_once(self):
+        """
+        Checks one batch of due scans. Returns how many were checked.
+        """
+        from scrapers.cloudflare_scraper import fetch_scan_result
+
+        batch = self._due()
+        if not batch:
+            return 0
+        if self.session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.batch_size))
+            self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.batch_size))
+        with ThreadPoolExecutor(max_workers=min(len(batch), 8)) as executor:
+            outcomes = list(executor.map(lambda uuid: (uuid, fetch_scan_result(uuid, self.session)), batch))
+        for uuid, outcome in outcomes:
+            self._handle(uuid, outcome)
+        self._prune()
+        return len(batch)
+
+    def _handle(self, uuid, outcome):
+        now = time.monotonic()
+        status = outcome["status"]
+        SCAN_POLLS.inc(outcome=status)
+        with self.condition:
+            entry = self.pending.get(uuid)
+            if entry is None:
+                return
+            entry["polls"] += 1
+            if status == "throttled":
+                pause = outcome["retry_after"] * random.uniform(1.0, 1.2)
+                for other in self.pending.values():
+                    other["next_poll"] = max(other["next_poll"], now + pause)
+                print(f"⚠️ Cloudflare is rate limiting scan polls; pausing {pause:.0f}s")
+                return
+            if status == "error":
+                entry["errors"] += 1
+            if status == "done":
+                update = {key: value for key, value in outcome.items() if key != "status"}
+                finished = ("done", update)
+            elif entry["errors"] >= MAX_ERRORS:
+                finished = ("error", {"error": outcome.get("error")})
+            elif now >= entry["deadline"]:
+                finished = ("expired", {})
+            else:
+                entry["delay"] = min(entry["delay"] * 2, self.max_delay)
+                entry["next_poll"] = now + entry["delay"] * random.uniform(0.8, 1.2)
+                return
+            del self.pending[uuid]
+            status, update = finished
+            update = {**update, "status": status, "checked_at": _now(), "polls": entry["polls"]}
+            self.finished[uuid] = (entry["domain"], update, now)
+            self.delivering.add(uuid)
+        try:
+            self._deliver(uuid)
+        finally:
+            with self.condition:
+                self.delivering.discard(uuid)
+                self.condition.notify_all()
+
+    def _deliver(self, uuid):
+        with self.condition:
+            entry = self.finished.get(uuid)
+        if entry is None:
+            return
+        domain, update, _ = entry
+        icon = "🚨" if update.get("malicious") else "🔎"
+        print(f"{icon} Cloudflare scan of {domain}: {update['status']}"
+              + (f", malicious={update['malicious']} {update.get('categories') or ''}" if update["status"] == "done" else ""))
+        # The record lock orders this against the pipeline saving the same domain: either the record
+        # already holds the pending scan and gets the verdict now, or the pipeline `take`s it before saving.
+        with record_lock(domain):
+            with self.condition:
+                if uuid not in self.finished:
+                    return  # The pipeline took it
+            merged = self.merge(domain, uuid, update)
+            if merged:
+                with self.condition:
+                    self.finished.pop(uuid, None)
+
+    def _prune(self):
+        cutoff = time.monotonic() - RESULT_RETENTION_S
+        with self.condition:
+            for uuid in [uuid for uuid, entry in self.finished.items() if entry[2] < cutoff]:
+                del self.finished[uuid]
+
+    def wait(self, timeout):
+        """
+        Blocks until the background thread has finished (and merged) every pending scan, or
+        `timeout` seconds. Returns how many are still pending.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.delivering:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(min(remaining, 1.0))
+            return len(self.pending)
+
+    def drain(self, timeout):
+        """
+        Polls in the calling thread until nothing is pending or `timeout` seconds have passed.
+        Returns how many scans are still pending.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.condition:
+                if not self.pending:
+                    return 0
+                next_poll = min(entry["next_poll"] for entry in self.pending.values())
+                remaining = len(self.pending)
+            if time.monotonic() >= deadline:
+                return remaining
+            wait = next_poll - time.monotonic()
+            if wait > 0:
+                time.sleep(min(wait, max(deadline - time.monotonic(), 0)))
+                continue
+            self.poll_once()
+
+    def snapshot(self):
+        with self.condition:
+            return {"pending": len(self.pending), "unmerged": len(self.finished)}
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_scan_poller():
+    """
+    Returns the process-wide scan poller, created on first use.
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = ScanPoller()
+        return _poller
+
+
+def _collect_poller_metrics():
+    if _poller is None:
+        return []
+    return [("risk_scans_pending", "Submitted URL scans waiting for a verdict", {}, _poller.snapshot()["pending"])]
+
+
+register_collector(_collect_poller_metrics)
+
+
+def sweep(domains=None, timeout=DEFAULT_MAX_WAIT_S):
+    """
+    Polls every pending scan found in saved records (only `domains`, if given) until each has a
+    verdict, gives up, or `timeout` passes. Returns how many are still pending.
+    """
+    from utils.reparse import load_records
+
+    poller = ScanPoller(initial_delay=0.0)
+    # Records from before scans were polled have no submission time: check them once, then give up
+    long_ago = (datetime.utcnow() - timedelta(seconds=poller.max_wait_s)).strftime("%Y-%m-%d %H:%M:%S")
+    for domain, record in load_records(domains).items():
+        scan = record.get(SCAN_KEY)
+        if is_pending(scan):
+            poller.watch(domain, scan if scan.get("submitted_at") else {**scan, "submitted_at": long_ago}, start=False)
+    total = poller.snapshot()["pending"]
+    print(f"🔎 Polling {total} pending Cloudflare scan(s)")
+    left = poller.drain(timeout)
+    print(f"✅ {total - left} scan(s) finished, {left} still pending")
+    return left
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect verdicts of pending Cloudflare URL scans into saved records.")
+    parser.add_argument("domains", nargs="*", help="Only these records (default: all)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_MAX_WAIT_S, help="Seconds to keep polling")
+    args = parser.parse_args()
+    sweep(args.domains or None, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import importlib
+import importlib.util
+import threading
+from datetime import datetime, timedelta
+
+from utils.retry_policy import SCORED_CLASSES
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Every scraper the pipeline can schedule, keyed by the record key its result is saved under.
+# Modules are only imported when a scraper is actually run, so commands that never scrape
+# (rescore, listing, the API's status endpoints) don't pay for selenium, bs4, whois or tldextract.
+#
+#   module, function   where the scraper lives
+#   cost               "browser" (starts Chrome), "http" (plain requests) or "socket" (TLS/WHOIS)
+#   deps               modules it needs, checked without importing them
+#   ttl                seconds a successful result stays fresh enough to reuse
+#   delay              pause after the call, as in the original pipeline
+#   stage              "submit" starts first (its result arrives later, see utils/scan_poller.py),
+#                      "main" concurrently with it, "followup" after the main stage
+#   target             "domain", or "ip" for sources looked up by the IP found in `urlvoid`
+#   profiles           assessment profiles that run it (see PROFILES)
+SCRAPERS = {
+    "cloudflare_scan": {"module": "scrapers.cloudflare_scraper", "function": "initiate_scan", "cost": "http",
+                        "deps": ["requests"], "ttl": DAY, "stage": "submit"},
+    "privacy_and_terms": {"module": "scrapers.check_privacy_term", "function": "check_privacy_term", "cost": "http",
+                          "deps": ["requests", "selenium", "webdriver_manager"], "ttl": 7 * DAY, "delay": 3},
+    "https_check": {"module": "scrapers.check_https", "function": "check_https", "cost": "browser",
+                    "deps": ["selenium"], "ttl": DAY, "delay": 3},
+    "ssl_sha_256_fingerprint": {"module": "scrapers.get_ssl_fingerprint", "function": "get_ssl_fingerprint",
+                                "cost": "socket", "deps": ["selenium", "webdriver_manager"], "ttl": DAY, "delay": 3},
+    "social_presence": {"module": "scrapers.check_linkedin", "function": "check_social_presence", "cost": "browser",
+                        "deps": ["selenium", "requests", "tldextract", "bs4"], "ttl": 7 * DAY, "delay": 3},
+    "whois": {"module": "scrapers.whois_sraper", "function": "get_whois_data", "cost": "socket",
+              "deps": ["whois"], "ttl": 7 * DAY, "delay": 3},
+    "godaddy_whois": {"module": "scrapers.godaddy_whois_scraper", "function": "scrape_godaddy_whois", "cost": "browser",
+                      "deps": ["selenium", "bs4"], "ttl": 7 * DAY, "delay": 5},
+    "urlvoid": {"module": "scrapers.urlvoid_scraper", "function": "scrape_urlvoid", "cost": "browser",
+                "deps": ["selenium", "bs4"], "ttl": DAY, "delay": 3},
+    "ssltrust_blacklist": {"module": "scrapers.ssltrust_blacklist_scraper", "function": "scrape_ssltrust_blacklist",
+                           "cost": "browser", "deps": ["selenium", "bs4"], "ttl": DAY, "delay": 5},
+    "ssl_org_report": {"module": "scrapers.ssl_org_scraper", "function": "scrape_ssl_org", "cost": "browser",
+                       "deps": ["selenium", "bs4"], "ttl": DAY, "delay": 5},
+    "google_safe_browsing": {"module": "scrapers.google_safe_browsing_scraper", "function": "scrape_google_safe_browsing",
+                             "cost": "browser", "deps": ["selenium", "bs4"], "ttl": DAY, "delay": 5},
+    "tranco_list": {"module": "scrapers.tranco_list_scraper", "function": "scrape_tranco_list", "cost": "browser",
+                    "deps": ["selenium", "bs4"], "ttl": 7 * DAY, "delay": 5},
+    "similarweb_data": {"module": "scrapers.scrape_similarweb_data", "function": "scrape_similarweb_data",
+                        "cost": "browser", "deps": ["selenium", "bs4"], "ttl": 30 * DAY, "delay": 5},
+    "mxtoolbox": {"module": "scrapers.mxtool_scraper", "function": "scrape_mxtoolbox", "cost": "browser",
+                  "deps": ["selenium", "bs4"], "ttl": DAY, "delay": 10},
+    "page_size": {"module": "scrapers.pagesize_scraper", "function": "scrape_page_size", "cost": "http",
+                  "deps": ["requests"], "ttl": 7 * DAY, "delay": 3},
+    "popup_and_ads": {"module": "scrapers.check_popup_ads", "function": "check_popups_ads", "cost": "http",
+                      "deps": ["requests", "selenium"], "ttl": 7 * DAY, "delay": 3},
+    "ipvoid": {"module": "scrapers.ipvoid_scraper", "function": "scrape_ipvoid", "cost": "http",
+               "deps": ["requests", "bs4"], "ttl": DAY, "delay": 4, "stage": "followup", "target": "ip"},
+    # Fast tier: one handshake, one GET and local files, no delays
+    "tls_probe": {"module": "scrapers.tls_probe", "function": "probe_tls", "cost": "socket",
+                  "ttl": DAY, "profiles": ["fast", "deep"]},
+    "homepage_probe": {"module": "scrapers.homepage_probe", "function": "probe_homepage", "cost": "http",
+                       "deps": ["requests"], "ttl": DAY, "profiles": ["fast", "deep"]},
+    "local_lists": {"module": "scrapers.local_lookups", "function": "lookup_local_lists", "cost": "local",
+                    "ttl": HOUR, "profiles": ["fast", "deep"]}
+}
+
+SPEC_DEFAULTS = {"deps": [], "ttl": DAY, "delay": 0, "stage": "main", "target": "domain", "profiles": ["deep"]}
+
+# Named assessment profiles. "fast" answers in about a second for real-time onboarding; "deep" runs
+# the full browser-based set, usually in the background after a fast verdict, and updates the record.
+PROFILES = {
+    "fast": {"description": "TLS handshake, one homepage fetch and local Tranco/blocklist/GeoIP lookups",
+             "delays": False},
+    "deep": {"description": "Every registered scraper, browsers included", "delays": True}
+}
+DEFAULT_PROFILE = "deep"
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def register_scraper(key, module, function, cost, **options):
+    """
+    Adds (or replaces) a scraper. Options: deps, ttl, delay, stage, target (see SCRAPERS).
+    """
+    SCRAPERS[key] = {"module": module, "function": function, "cost": cost, **options}
+    _loaded.pop(key, None)
+
+
+def get_spec(key):
+    """
+    The scraper's declaration with defaults filled in, plus its key and function name.
+    """
+    if key not in SCRAPERS:
+        raise KeyError(f"Unknown scraper: {key}")
+    return {**SPEC_DEFAULTS, **SCRAPERS[key], "key": key, "name": SCRAPERS[key]["function"]}
+
+
+def scraper_keys(stage=None, cost=None):
+    """
+    Registered scraper keys in declaration order, optionally filtered by stage and cost.
+    """
+    return [key for key in SCRAPERS
+            if (stage is None or get_spec(key)["stage"] == stage) and (cost is None or get_spec(key)["cost"] in cost)]
+
+
+def profile_keys(profile):
+    """
+    Scraper keys an assessment profile runs, in declaration order.
+    """
+    if profile not in PROFILES:
+        raise KeyError(f"Unknown profile: {profile}")
+    return [key for key in SCRAPERS if profile in get_spec(key)["profiles"]]
+
+
+def missing_dependencies(key):
+    """
+    Declared dependencies (and the scraper's own module) that can't be found, without importing them.
+    """
+    spec = get_spec(key)
+    missing = []
+    for module in spec["deps"] + [spec["module"]]:
+        try:
+            if importlib.util.find_spec(module) is None:
+                missing.append(module)
+        except (ImportError, ValueError):
+            missing.append(module)
+    return missing
+
+
+def load_scraper(key):
+    """
+    Imports the scraper's module on first use and returns its function.
+    Raises ImportError when the module or one of its dependencies is missing.
+    """
+    with _load_lock:
+        if key not in _loaded:
+            spec = get_spec(key)
+            _loaded[key] = getattr(importlib.import_module(spec["module"]), spec["function"])
+        return _loaded[key]
+
+
+def is_fresh(spec, status, now=None):
+    """
+    True when a saved result (per its scrape status) succeeded, or found a broken certificate,
+    within the scraper's TTL.
+    """
+    if not status or status.get("class") not in SCORED_CLASSES or not status.get("checked_at"):
+        return False
+    try:
+        checked_at = datetime.strptime(status["checked_at"], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return False
+    return (now or datetime.utcnow()) - checked_at <= timedelta(seconds=spec["ttl"])
+
+
+# Example usage
+if __name__ == "__main__":
+    for key in SCRAPERS:
+        spec = get_spec(key)
+        missing = missing_dependencies(key)
+        print(f"{key:<24} {spec['cost']:<8} ttl {spec['ttl'] // HOUR:>4}h  {'missing: ' + ', '.join(missing) if missing else 'ok'}")
@@ -0,0 +1,252 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Raw pages the scrapers parsed, kept so extraction can be re-run offline (see utils/reparse.py).
+# Layout:
+#   <dir>/objects/ab/abcdef....html.gz   one gzip blob per distinct page (sha256 of the raw HTML)
+#   <dir>/index/<target>.jsonl           one line per capture: source, page, digest, url, time
+DEFAULT_SNAPSHOT_DIR = os.path.join("data", "snapshots")
+# Retention applied by `python -m utils.snapshots prune`: the newest captures of each page kept
+# (RISK_SNAPSHOT_KEEP), and older captures dropped after this many days (RISK_SNAPSHOT_MAX_AGE_DAYS).
+# The latest capture of a page is always kept, so every record can still be re-parsed.
+DEFAULT_SNAPSHOT_KEEP = 3
+DEFAULT_SNAPSHOT_MAX_AGE_DAYS = 90
+# Unreferenced blobs younger than this may belong to a capture whose index line isn't written yet
+ORPHAN_GRACE_SECONDS = 3600
+
+_index_lock = threading.Lock()
+
+
+def snapshot_dir():
+    return os.environ.get("RISK_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+
+
+def snapshots_enabled():
+    """
+    Snapshots are on unless RISK_SNAPSHOTS=0.
+    """
+    return os.environ.get("RISK_SNAPSHOTS", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _object_path(digest, directory=None):
+    return os.path.join(directory or snapshot_dir(), "objects", digest[:2], f"{digest}.html.gz")
+
+
+def _index_path(target, directory=None):
+    safe = "".join(c if c.isalnum() or c in ".-_" else "_" for c in target)
+    return os.path.join(directory or snapshot_dir(), "index", f"{safe}.jsonl")
+
+
+def store_blob(html, directory=None):
+    """
+    Stores a page once per distinct content. Returns (digest, raw bytes, stored bytes).
+    """
+    raw = html.encode("utf-8", errors="replace") if isinstance(html, str) else html
+    digest = hashlib.sha256(raw).hexdigest()
+    path = _object_path(digest, directory)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(gzip.compress(raw, compresslevel=6))
+        os.replace(tmp_path, path)  # Identical content from another writer is just overwritten
+    return digest, len(raw), os.path.getsize(path)
+
+
+def save_snapshot(source, target, html, page="main", url=None, meta=None, directory=None):
+    """
+    Archives the raw HTML a scraper parsed.
+
+    Args:
+        source (str): Scraper function name (e.g. "scrape_urlvoid").
+        target (str): What was looked up (domain or IP).
+        page (str): Which page of the scrape this is, for scrapers that parse several.
+        meta (dict): Anything else the parser needs offline (e.g. loaded resource URLs).
+
+    Returns:
+        str | None: The content digest, or None when snapshots are off or the write failed.
+    """
+    if html is None or not snapshots_enabled():
+        return None
+    try:
+        digest, raw_bytes, stored_bytes = store_blob(html, directory)
+        entry = {
+            "source": source,
+            "target": target,
+            "page": page,
+            "digest": digest,
+            "url": url,
+            "captured_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            "bytes": raw_bytes,
+            "stored_bytes": stored_bytes
+        }
+        if meta:
+            entry["meta"] = meta
+        path = _index_path(target, directory)
+        with _index_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+        return digest
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Could not archive {source} snapshot for {target}: {e}")
+        return None
+
+
+def snapshot_driver(source, target, driver, page="main", meta=None):
+    """
+    Archives the page currently loaded in a browser. Skips the `page_source` round trip
+    entirely when snapshots are off.
+    """
+    if not snapshots_enabled():
+        return None
+    try:
+        html, url = driver.page_source, driver.current_url
+    except Exception as e:
+        print(f"⚠️ Could not read {source} page for {target}: {e}")
+        return None
+    return save_snapshot(source, target, html, page=page, url=url, meta=meta)
+
+
+def load_snapshot(digest, directory=None):
+    """
+    The archived HTML for a digest.
+    """
+    with open(_object_path(digest, directory), "rb") as file:
+        return gzip.decompress(file.read()).decode("utf-8", errors="replace")
+
+
+def list_snapshots(target, source=None, directory=None):
+    """
+    Index entries for a target, oldest first.
+    """
+    path = _index_path(target, directory)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if source is None or entry["source"] == source:
+                entries.append(entry)
+    return entries
+
+
+def latest_snapshots(target, source, directory=None):
+    """
+    The most recent capture of each page of `source` for `target`, as {page: entry}.
+    """
+    latest = {}
+    for entry in list_snapshots(target, source, directory):
+        latest[entry["page"]] = entry
+    return latest
+
+
+def archived_targets(directory=None):
+    """
+    Every target with at least one snapshot.
+    """
+    index_dir = os.path.join(directory or snapshot_dir(), "index")
+    if not os.path.isdir(index_dir):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(index_dir) if name.endswith(".jsonl"))
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _write_index(path, entries):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        file.writelines(json.dumps(entry) + "\n" for entry in entries)
+    os.replace(tmp_path, path)
+
+
+def prune_snapshots(keep=None, older_than_days=None, directory=None, dry_run=False):
+    """
+    Applies the retention policy: keeps the newest `keep` captures of each (target, source, page),
+    drops captures older than `older_than_days` (the latest of each page is always kept), then
+    deletes blobs no capture refers to any more.
+
+    Index files are rewritten in place, so run it while no other process is archiving (e.g. from
+    cron between batches); captures archived by this process meanwhile are safe.
+
+    Returns:
+        dict: Captures and blobs removed, and the bytes freed.
+    """
+    directory = directory or snapshot_dir()
+    keep = max(1, keep if keep is not None else _env_int("RISK_SNAPSHOT_KEEP", DEFAULT_SNAPSHOT_KEEP))
+    if older_than_days is None:
+        older_than_days = _env_int("RISK_SNAPSHOT_MAX_AGE_DAYS", DEFAULT_SNAPSHOT_MAX_AGE_DAYS)
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S") if older_than_days else None
+    summary = {"captures_removed": 0, "blobs_removed": 0, "bytes_freed": 0}
+
+    referenced = set()
+    for target in archived_targets(directory):
+        path = _index_path(target, directory)
+        with _index_lock:
+            entries = list_snapshots(target, directory=directory)
+            by_page = {}
+            for position, entry in enumerate(entries):
+                by_page.setdefault((entry["source"], entry["page"]), []).append(position)
+            kept = set()
+            for positions in by_page.values():
+                newest = positions[-keep:]
+                kept.update(position for position in newest[:-1]
+                            if cutoff is None or entries[position]["captured_at"] >= cutoff)
+                kept.add(newest[-1])
+            remaining = [entry for position, entry in enumerate(entries) if position in kept]
+            if len(remaining) < len(entries) and not dry_run:
+                _write_index(path, remaining)
+        summary["captures_removed"] += len(entries) - len(remaining)
+        referenced.update(entry["digest"] for entry in remaining)
+
+    objects_dir = os.path.join(directory, "objects")
+    for root, _, names in os.walk(objects_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if not name.endswith(".html.gz") or name[:-len(".html.gz")] in referenced:
+                continue
+            try:
+                stat = os.stat(path)
+                if time.time() - stat.st_mtime < ORPHAN_GRACE_SECONDS:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except OSError:
+                continue
+            summary["blobs_removed"] += 1
+            summary["bytes_freed"] += stat.st_size
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the archive of raw pages the scrapers parsed.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune_parser = subparsers.add_parser("prune", help="Drop old captures and the blobs only they used")
+    prune_parser.add_argument("--keep", type=int, help=f"Captures kept per page (default: RISK_SNAPSHOT_KEEP or {DEFAULT_SNAPSHOT_KEEP})")
+    prune_parser.add_argument("--older-than", type=int, metavar="DAYS",
+                              help=f"Drop captures older than this, 0 to keep them (default: RISK_SNAPSHOT_MAX_AGE_DAYS or {DEFAULT_SNAPSHOT_MAX_AGE_DAYS})")
+    prune_parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    args = parser.parse_args()
+
+    summary = prune_snapshots(keep=args.keep, older_than_days=args.older_than, dry_run=args.dry_run)
+    print(f"🧹 {'Would remove' if args.dry_run else 'Removed'} {summary['captures_removed']} capture(s) and "
+          f"{summary['blobs_removed']} blob(s), {summary['bytes_freed'] / 1e6:.1f} MB from {snapshot_dir()}")
+
+
+if __name__ == "__main__":
+    main()
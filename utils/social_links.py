@@ -0,0 +1,83 @@
+import re
+from html import unescape
+from urllib.parse import urlparse
+
+# Platform -> hosts it is served from (subdomains such as www./m./uk. are matched too).
+SOCIAL_HOSTS = {
+    "linkedin": ["linkedin.com"],
+    "facebook": ["facebook.com", "fb.com"],
+    "instagram": ["instagram.com"],
+    "twitter": ["twitter.com", "x.com"],
+    "youtube": ["youtube.com", "youtu.be"]
+}
+
+# Paths that are share buttons or widgets rather than the merchant's own profile.
+NON_PROFILE_PATHS = ("/sharer", "/share", "/intent", "/plugins", "/dialog", "/embed", "/home?status")
+
+# Platforms whose profile must live under a given path prefix.
+REQUIRED_PATH_PREFIXES = {
+    "linkedin": ("/company/", "/school/", "/showcase/")
+}
+
+HOST_TO_PLATFORM = {host: platform for platform, hosts in SOCIAL_HOSTS.items() for host in hosts}
+
+# One compiled pattern finds every href that points at any social host.
+SOCIAL_HREF_RE = re.compile(
+    r"""href\s*=\s*["']?((?:https?:)?//(?:[a-z0-9-]+\.)*(?:"""
+    + "|".join(re.escape(host) for host in sorted(HOST_TO_PLATFORM, key=len, reverse=True))
+    + r""")(?::\d+)?(?:[/?#][^"'\s<>]*)?)""",
+    re.IGNORECASE
+)
+
+
+def classify_social_url(url):
+    """
+    Returns the platform a URL belongs to, or None if it is not a profile link.
+    """
+    parsed = urlparse(url if "://" in url else f"https:{url}")
+    host = (parsed.hostname or "").lower()
+    platform = None
+    for known_host, name in HOST_TO_PLATFORM.items():
+        if host == known_host or host.endswith("." + known_host):
+            platform = name
+            break
+    if not platform:
+        return None
+
+    path = parsed.path.lower()
+    full_path = path + ("?" + parsed.query.lower() if parsed.query else "")
+    if any(full_path.startswith(p) for p in NON_PROFILE_PATHS):
+        return None
+    prefixes = REQUIRED_PATH_PREFIXES.get(platform)
+    if prefixes and not path.startswith(prefixes):
+        return None
+    if path.strip("/") == "":
+        return None  # Bare platform homepage
+    return platform
+
+
+def extract_social_links(html):
+    """
+    Scans raw or rendered HTML once and collects every social profile link.
+
+    Returns:
+        dict: Platform -> list of unique links in page order.
+    """
+    links = {platform: [] for platform in SOCIAL_HOSTS}
+    seen = set()
+    for match in SOCIAL_HREF_RE.finditer(html):
+        url = unescape(match.group(1))
+        if url.startswith("//"):
+            url = "https:" + url
+        platform = classify_social_url(url)
+        if platform and url not in seen:
+            seen.add(url)
+            links[platform].append(url)
+    return links
+
+
+def first_links(candidates):
+    """
+    Reduces the candidates to the first link per platform (None when absent).
+    """
+    return {platform: (urls[0] if urls else None) for platform, urls in candidates.items()}
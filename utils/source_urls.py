@@ -0,0 +1,74 @@
+import os
+from urllib.parse import urlparse
+
+# Where each third-party source lives. Every scraper builds its URLs from these, so the
+# whole set can be pointed at a local stand-in (see benchmarks/fixture_server.py).
+SOURCE_BASE_URLS = {
+    "urlvoid": "https://www.urlvoid.com",
+    "ipvoid": "https://www.ipvoid.com",
+    "godaddy": "https://in.godaddy.com",
+    "mxtoolbox": "https://mxtoolbox.com",
+    "ssl_org": "https://www.ssl.org",
+    "ssltrust": "https://www.ssltrust.com",
+    "google_safe_browsing": "https://transparencyreport.google.com",
+    "tranco": "https://tranco-list.eu",
+    "similarweb": "https://www.similarweb.com",
+    "linkedin": "https://www.linkedin.com",
+    "cloudflare": "https://api.cloudflare.com/client/v4"
+}
+
+
+def base_url(source):
+    """
+    Base URL for a source, in order of precedence:
+    RISK_URL_<SOURCE> (e.g. RISK_URL_URLVOID), then RISK_FIXTURE_URL + "/<source>", then the live site.
+    """
+    override = os.environ.get(f"RISK_URL_{source.upper()}")
+    if override:
+        return override.rstrip("/")
+    fixture = os.environ.get("RISK_FIXTURE_URL")
+    if fixture:
+        return f"{fixture.rstrip('/')}/{source}"
+    return SOURCE_BASE_URLS[source]
+
+
+def source_url(source, path=""):
+    """
+    Full URL of a page on a source, e.g. source_url("ssl_org", f"/report/{domain}").
+    """
+    return base_url(source) + path
+
+
+def rebase_url(source, url):
+    """
+    Moves a link to a source found on a page (e.g. the merchant's LinkedIn link) onto the
+    configured base URL. Unchanged when the source points at the live site.
+    """
+    base = base_url(source)
+    if base == SOURCE_BASE_URLS[source]:
+        return url
+    parsed = urlparse(url)
+    return base + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def merchant_url(domain, scheme="https"):
+    """
+    Homepage URL of the merchant itself. With RISK_URL_MERCHANT or RISK_FIXTURE_URL set, merchant
+    sites are served from "<base>/<domain>/" instead, so relative links still resolve under it.
+    """
+    override = os.environ.get("RISK_URL_MERCHANT")
+    fixture = os.environ.get("RISK_FIXTURE_URL")
+    if override:
+        return f"{override.rstrip('/')}/{domain}/"
+    if fixture:
+        return f"{fixture.rstrip('/')}/merchant/{domain}/"
+    return f"{scheme}://{domain}"
+
+
+# Example usage
+if __name__ == "__main__":
+    print(source_url("ssl_org", "/report/example.com"))
+    print(merchant_url("example.com"))
+    os.environ["RISK_FIXTURE_URL"] = "http://127.0.0.1:8765"
+    print(source_url("ssl_org", "/report/example.com"))
+    print(merchant_url("example.com"))
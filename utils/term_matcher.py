@@ -0,0 +1,190 @@
+import re
+from collections import deque
+from html.parser import HTMLParser
+
+# Words as the matcher sees them; "&" is kept so "terms & conditions" can match.
+WORD_RE = re.compile(r"[A-Za-z0-9]+|&")
+
+# Elements whose content is never visible text.
+SKIPPED_TAGS = frozenset(["script", "style", "noscript", "template", "svg"])
+
+# Elements that start a new line of text.
+BLOCK_TAGS = frozenset([
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header",
+    "footer", "nav", "aside", "main", "h1", "h2", "h3", "h4", "h5", "h6", "form", "title"
+])
+
+# Inline elements that still separate words, so "Terms</a><a>Privacy" does not become "TermsPrivacy".
+SEPARATING_TAGS = frozenset(["a", "button", "label", "option", "td", "th", "img", "input"])
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Extracts visible text from HTML as it is fed, without building a DOM tree.
+    Content of script/style (and similar) elements is skipped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def _separate(self, tag):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        elif tag in SEPARATING_TAGS:
+            self.parts.append(" ")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        else:
+            self._separate(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._separate(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        else:
+            self._separate(tag)
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def get_text(self):
+        """
+        Returns the text extracted so far.
+        """
+        return "".join(self.parts)
+
+
+def html_to_text(html):
+    """
+    Converts an HTML document to visible text in a single streaming pass.
+    """
+    extractor = StreamingTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.get_text()
+
+
+def build_matcher(patterns_by_label):
+    """
+    Builds an Aho-Corasick automaton over word sequences.
+
+    Args:
+        patterns_by_label (dict): Label -> list of phrases, e.g. {"terms": ["terms of use", ...]}.
+
+    Returns:
+        dict: The compiled automaton, to be passed to `find_matches`.
+    """
+    goto = [{}]
+    outputs = [[]]
+    max_words = 1
+
+    # Build the trie of pattern words
+    for label, phrases in patterns_by_label.items():
+        for phrase in phrases:
+            words = tuple(w.lower() for w in WORD_RE.findall(phrase))
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                if word not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][word] = len(goto) - 1
+                state = goto[state][word]
+            outputs[state].append((label, phrase, len(words)))
+            max_words = max(max_words, len(words))
+
+    # Breadth-first pass to compute failure links and merge outputs
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for word, next_state in goto[state].items():
+            queue.append(next_state)
+            if state:  # Children of the root always fail back to the root
+                f = fail[state]
+                while f and word not in goto[f]:
+                    f = fail[f]
+                fail[next_state] = goto[f].get(word, 0)
+            outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+    return {"goto": goto, "fail": fail, "outputs": outputs, "max_words": max_words}
+
+
+def find_matches(matcher, text):
+    """
+    Scans the text once and reports every pattern occurrence.
+
+    Returns:
+        list: Matches in text order, each a dict with `label`, `pattern`, `start` and `end`.
+    """
+    goto, fail, outputs = matcher["goto"], matcher["fail"], matcher["outputs"]
+    recent_starts = deque(maxlen=matcher["max_words"])
+    matches = []
+    state = 0
+
+    for match in WORD_RE.finditer(text):
+        word = match.group().lower()
+        recent_starts.append(match.start())
+        while state and word not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(word, 0)
+        for label, phrase, length in outputs[state]:
+            matches.append({
+                "label": label,
+                "pattern": phrase,
+                "start": recent_starts[-length],
+                "end": match.end()
+            })
+
+    return matches
+
+
+def summarize_matches(matches):
+    """
+    Groups matches by label, keeping the first position of each matched pattern.
+
+    Returns:
+        dict: Label -> {pattern: first position}.
+    """
+    summary = {}
+    for match in matches:
+        summary.setdefault(match["label"], {}).setdefault(match["pattern"], match["start"])
+    return summary
+
+
+# Example usage / benchmark against the BeautifulSoup path
+if __name__ == "__main__":
+    import time
+    from bs4 import BeautifulSoup
+
+    variants = {
+        "terms": ["terms of service", "terms of use", "terms & conditions", "terms"],
+        "privacy": ["privacy policy", "data protection", "gdpr", "privacy"]
+    }
+    matcher = build_matcher(variants)
+    page = (
+        "<html><head><script>var terms = 'not visible';</script><style>.privacy{}</style></head><body>"
+        + "<div class='hero'><p>Shop our <b>great</b> products today</p><a href='/shop'>Learn more</a></div>" * 3000
+        + "<footer><a href='/terms'>Terms of Use</a><a href='/privacy'>Privacy Policy</a></footer></body></html>"
+    )
+
+    start = time.perf_counter()
+    page_text = BeautifulSoup(page, "html.parser").get_text().lower()
+    legacy = {label: any(v in page_text for v in phrases) for label, phrases in variants.items()}
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = summarize_matches(find_matches(matcher, html_to_text(page)))
+    new_time = time.perf_counter() - start
+
+    print(f"📄 {len(page) // 1024} KB page")
+    print(f"   BeautifulSoup + substring scans: {legacy_time * 1000:.1f} ms -> {legacy}")
+    print(f"   streaming text + automaton:      {new_time * 1000:.1f} ms -> {summary}")
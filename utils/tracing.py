@@ -0,0 +1,173 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# The trace being recorded in this context (None when the domain was not sampled)
+CURRENT_TRACE = contextvars.ContextVar("risk_current_trace", default=None)
+CURRENT_SPAN = contextvars.ContextVar("risk_current_span", default=None)
+
+DEFAULT_TRACE_DIR = os.path.join("data", "traces")
+
+
+def sample_rate():
+    """
+    Share of domains traced: RISK_TRACE_SAMPLE between 0 (off, the default) and 1 (every domain).
+    """
+    try:
+        return max(0.0, min(1.0, float(os.environ.get("RISK_TRACE_SAMPLE", 0))))
+    except ValueError:
+        return 0.0
+
+
+class Trace:
+    """
+    Spans recorded for one domain, as Chrome trace events (complete "X" events, microseconds).
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.started_at = datetime.utcnow()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.span_ids = 0
+        self.lock = threading.Lock()
+
+    def _thread_id(self):
+        ident = threading.get_ident()
+        with self.lock:
+            if ident not in self.threads:
+                self.threads[ident] = (len(self.threads) + 1, threading.current_thread().name)
+            return self.threads[ident][0]
+
+    def next_span_id(self):
+        with self.lock:
+            self.span_ids += 1
+            return self.span_ids
+
+    def add(self, name, category, start, end, args):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": 1,
+            "tid": self._thread_id(),
+            "args": args
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def to_json(self):
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        metadata = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": self.domain}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                     for tid, name in threads.values()]
+        return {
+            "traceEvents": metadata + sorted(events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"domain": self.domain, "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S")}
+        }
+
+    def export(self, directory=None):
+        """
+        Writes the trace as JSON, loadable in chrome://tracing or Perfetto. Returns the path.
+        """
+        directory = directory or os.environ.get("RISK_TRACE_DIR", DEFAULT_TRACE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.domain}-{self.started_at.strftime('%Y%m%dT%H%M%S')}.trace.json")
+        with open(path, "w") as file:
+            json.dump(self.to_json(), file)
+        return path
+
+
+@contextmanager
+def trace_domain(domain, rate=None, export=True):
+    """
+    Records every span of the block into one trace for `domain` (if the domain is sampled)
+    and exports it at the end. Yields the Trace, or None when not sampled.
+    """
+    rate = sample_rate() if rate is None else rate
+    if rate <= 0 or random.random() >= rate:
+        yield None
+        return
+
+    trace = Trace(domain)
+    token = CURRENT_TRACE.set(trace)
+    try:
+        with span("domain", "pipeline", domain=domain):
+            yield trace
+    finally:
+        CURRENT_TRACE.reset(token)
+        if export:
+            try:
+                print(f"🧵 Trace written to {trace.export()}")
+            except OSError as e:
+                print(f"⚠️ Could not write trace for {domain}: {e}")
+
+
+@contextmanager
+def span(name, category="pipeline", **args):
+    """
+    Times the block as a span of the current trace. A no-op (one context lookup) when not tracing.
+    """
+    trace = CURRENT_TRACE.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = trace.next_span_id()
+    parent = CURRENT_SPAN.get()
+    token = CURRENT_SPAN.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = time.perf_counter()
+        CURRENT_SPAN.reset(token)
+        trace.add(name, category, start, end, {"span_id": span_id, "parent_id": parent, **args})
+
+
+def in_context(func):
+    """
+    Binds `func` to a copy of the caller's context, so spans started in a pool thread attach to
+    the caller's trace: `executor.submit(in_context(run_scraper), ...)`.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
+
+
+# Example usage
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    def lookup(n):
+        with span(f"source_{n}", "scraper"):
+            with span("navigation", "phase"):
+                time.sleep(0.02 * n)
+            with span("extraction", "phase"):
+                time.sleep(0.01)
+
+    with trace_domain("example.com", rate=1.0, export=False) as trace:
+        with span("scrapers"):
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                # Bound here, in the caller's context; a wrapper per task, as a context can't be entered twice at once
+                futures = [executor.submit(in_context(lookup), n) for n in range(1, 4)]
+                for future in futures:
+                    future.result()
+    print(json.dumps(trace.to_json(), indent=1)[:800])
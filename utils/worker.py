@@ -0,0 +1,250 @@
+"""
+Worker mode: assessment workers that pull domain jobs off the shared job queue (utils/job_queue.py)
+and write records to the shared store (RISK_DATA_DIR). Start any number of them, on any number of
+hosts, against the same RISK_QUEUE_URL:
+
+    RISK_QUEUE_URL=file:///mnt/shared/queue RISK_DATA_DIR=/mnt/shared/data python -m utils.worker run --workers 2
+    python -m utils.worker enqueue example.com example.org --profile fast
+    python -m utils.worker enqueue --file portfolio.txt --profile deep --priority bulk
+    python -m utils.worker status --batch <batch id>
+
+Each claimed job is leased; a heartbeat renews the lease while the job runs. If the worker dies the
+lease runs out and another worker picks the job up. Source rate limits (utils/rate_limits.py) are
+shared by every worker through the queue backend.
+
+Jobs run at their priority class (utils/priority.py): interactive jobs are claimed first and get the
+next free slot on every source, and each process keeps one worker free for them while the others
+are busy with normal or bulk work.
+"""
+import argparse
+import os
+import signal
+import socket
+import threading
+
+from utils.job_queue import DEFAULT_LEASE_SECONDS, get_job_queue, open_job_queue
+from utils.pipeline import assess_domain, close_browsers
+from utils.priority import DEFAULT_PRIORITY, PRIORITY_CLASSES, priority_context
+from utils.rate_limits import use_shared_rate_limits
+from utils.scraper_registry import DEFAULT_PROFILE, PROFILES
+from utils.tracing import trace_domain
+
+
+class AssessmentWorkers:
+    """
+    Worker threads that take jobs off the queue and assess them, `workers` domains at a time.
+    Each domain's scrapers still run concurrently under the shared concurrency and admission limits.
+
+    `interactive_reserve` workers (default 1, when there are at least two) only take interactive
+    jobs while the rest are busy, so an onboarding lookup never waits for a bulk job to finish.
+    """
+
+    def __init__(self, queue, workers=2, poll_interval=1.0, lease_seconds=DEFAULT_LEASE_SECONDS, interactive_reserve=1):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.interactive_reserve = min(interactive_reserve, max(workers - 1, 0))
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.threads = []
+        self.active = {}
+        self.active_priorities = {}
+        self.lock = threading.Lock()
+        self.claim_lock = threading.Lock()
+        # Unique across hosts and restarts, so a lease is never mistaken for another worker's
+        self.name_prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    def start(self):
+        use_shared_rate_limits(self.queue)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name_prefix}-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        if self.workers:
+            threading.Thread(target=self._heartbeat, name=f"{self.name_prefix}-heartbeat", daemon=True).start()
+
+    def notify(self):
+        self.wakeup.set()
+
+    def stop(self, timeout=None):
+        """
+        Stops claiming jobs and waits up to `timeout` for running ones; whatever is still running
+        is released back to the queue for another worker.
+        """
+        self.stopped.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        with self.lock:
+            active = dict(self.active)
+        for name, job_id in active.items():
+            if self.queue.release(job_id, name):
+                print(f"🔁 Released job {job_id} back to the queue")
+
+    def _heartbeat(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            with self.lock:
+                active = dict(self.active)
+            for name, job_id in active.items():
+                try:
+                    if not self.queue.heartbeat(job_id, name, self.lease_seconds):
+                        print(f"⚠️ {name} lost the lease on job {job_id}; its result will be discarded")
+                except Exception as e:
+                    print(f"⚠️ Heartbeat for job {job_id} failed: {e}")
+
+    def _claimable(self):
+        """
+        Priority classes this process may claim now (None: any). Caller holds the claim lock.
+        """
+        with self.lock:
+            busy = sum(1 for priority in self.active_priorities.values() if priority != "interactive")
+        return ["interactive"] if busy >= self.workers - self.interactive_reserve else None
+
+    def _claim(self, name):
+        with self.claim_lock:
+            job = self.queue.claim(name, self.lease_seconds, self._claimable())
+            if job is not None:
+                with self.lock:
+                    self.active[name] = job["id"]
+                    self.active_priorities[name] = job.get("priority", DEFAULT_PRIORITY)
+            return job
+
+    def _run(self):
+        name = threading.current_thread().name
+        while not self.stopped.is_set():
+            try:
+                job = self._claim(name)
+            except Exception as e:
+                print(f"⚠️ {name} could not claim a job: {e}")
+                job = None
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            try:
+                self.run_job(job, name)
+            finally:
+                with self.lock:
+                    self.active.pop(name, None)
+                    self.active_priorities.pop(name, None)
+
+    def run_job(self, job, worker=None):
+        options = job["options"]
+
+        def progress(kind, key=None, **detail):
+            self.queue.add_event(job["id"], kind, source=key, **detail)
+
+        lease_lost = threading.Event()
+
+        def still_leased():
+            # Renew the lease one last time before writing: if it ran out, another worker has the
+            # job and this run's (older) results must not overwrite its record
+            if worker is None:
+                return True
+            try:
+                if self.queue.heartbeat(job["id"], worker, self.lease_seconds):
+                    return True
+            except Exception as e:
+                print(f"⚠️ Heartbeat for job {job['id']} failed: {e}")
+                return True  # Can't tell; finish() still refuses a job this worker lost
+            lease_lost.set()
+            return False
+
+        priority = job.get("priority", DEFAULT_PRIORITY)
+        print(f"🧾 Job {job['id']}: {job['profile']} assessment of {job['domain']} ({priority}, attempt {job['attempts']})")
+        try:
+            with trace_domain(job["domain"]), priority_context(priority):
+                summary = assess_domain(job["domain"], options.get("keys"), options.get("reuse_fresh", False),
+                                        job["profile"], progress=progress, before_save=still_leased)
+        except Exception as e:
+            print(f"❌ Job {job['id']} failed: {e}")
+            self.queue.finish(job["id"], error=f"{type(e).__name__}: {e}", worker=worker)
+            return
+        if lease_lost.is_set():
+            print(f"⚠️ Job {job['id']} lost its lease before saving; its result was discarded")
+            return
+        result = dict(summary or {})
+        if options.get("then_deep") and job["profile"] != "deep":
+            deep = self.queue.enqueue([job["domain"]], "deep", {"reuse_fresh": True}, batch_id=job["batch_id"],
+                                      priority=priority)[0]
+            result["followup_job"] = deep["id"]
+            self.notify()
+        if not self.queue.finish(job["id"], result, worker=worker):
+            print(f"⚠️ Job {job['id']} finished after its lease expired; another worker owns it now")
+
+    def snapshot(self):
+        with self.lock:
+            return {"workers": self.workers, "interactive_reserve": self.interactive_reserve,
+                    "active_jobs": dict(self.active), "active_priorities": dict(self.active_priorities)}
+
+
+def read_domains(domains, path=None):
+    """
+    Domains from the command line plus one per line of `path` (blank lines and # comments skipped).
+    """
+    domains = list(domains or [])
+    if path:
+        with open(path) as file:
+            domains += [line.split("#", 1)[0].strip() for line in file]
+    return [domain for domain in dict.fromkeys(domains) if domain]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run assessment workers against a shared job queue.")
+    parser.add_argument("--queue", help="Queue URL (default RISK_QUEUE_URL, else SQLite on RISK_JOBS_DB)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Claim and assess jobs until interrupted")
+    run_parser.add_argument("--workers", type=int, default=int(os.environ.get("RISK_WORKERS", 2)),
+                            help="Domains assessed at the same time by this process")
+    run_parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                            help="Seconds a job stays leased without a heartbeat")
+    run_parser.add_argument("--interactive-reserve", type=int, default=1,
+                            help="Workers kept free for interactive jobs while the others are busy")
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue domains for the workers")
+    enqueue_parser.add_argument("domains", nargs="*")
+    enqueue_parser.add_argument("--file", help="File with one domain per line")
+    enqueue_parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE)
+    enqueue_parser.add_argument("--priority", choices=list(PRIORITY_CLASSES), default=DEFAULT_PRIORITY,
+                                help="Priority class (use bulk for scheduled portfolio rescans)")
+    enqueue_parser.add_argument("--reuse-fresh", action="store_true")
+
+    status_parser = subparsers.add_parser("status", help="Show queue counts, or the jobs of a batch")
+    status_parser.add_argument("--batch")
+
+    args = parser.parse_args()
+    queue = open_job_queue(args.queue) if args.queue else get_job_queue()
+
+    if args.command == "run":
+        workers = AssessmentWorkers(queue, args.workers, lease_seconds=args.lease,
+                                    interactive_reserve=args.interactive_reserve)
+        signal.signal(signal.SIGTERM, lambda signum, frame: workers.stopped.set())
+        workers.start()
+        print(f"👷 {args.workers} worker(s) on {queue.url} as {workers.name_prefix}")
+        try:
+            while not workers.stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        print("\n🛑 Shutting down; jobs still running go back to the queue")
+        workers.stop(timeout=5)
+        close_browsers()
+    elif args.command == "enqueue":
+        domains = read_domains(args.domains, args.file)
+        if not domains:
+            parser.error("give domains or --file")
+        jobs = queue.enqueue(domains, args.profile, {"reuse_fresh": args.reuse_fresh}, priority=args.priority)
+        print(f"📥 Queued {len(jobs)} {args.priority} job(s) in batch {jobs[0]['batch_id']}")
+    else:
+        print(queue.counts())
+        if args.batch:
+            for job in reversed(queue.list(args.batch, limit=100000)):
+                score = (job["result"] or {}).get("risk_score")
+                print(f"{job['status']:8} {job.get('priority', DEFAULT_PRIORITY):11} {job['domain']:40} {score if score is not None else '-':>5} {job['error'] or ''}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()